@@ -0,0 +1,115 @@
+#coding:utf-8
+#
+#   PROGRAM:     fdb
+#   MODULE:      benchmarks/aio.py
+#   DESCRIPTION: Python driver for Firebird - Event loop latency benchmark for fdb.aio
+#
+#  Software distributed under the License is distributed AS IS,
+#  WITHOUT WARRANTY OF ANY KIND, either express or implied.
+#  See the License for the specific language governing rights
+#  and limitations under the License.
+#
+#  The Original Code was created by Pavel Cisar
+#
+#  Copyright (c) Pavel Cisar <pcisar@users.sourceforge.net>
+#  and all contributors signed below.
+#
+#  All Rights Reserved.
+#  Contributor(s): ______________________________________.
+"""Event loop latency benchmark for fdb.aio.
+
+Runs concurrent query tasks while a probe task measures how late the event
+loop wakes it up. Tasks call fdb either directly from coroutines (blocking
+the loop), or via fdb.aio, for example::
+
+    python benchmarks/aio.py --database localhost:employee --tasks 20 --queries 50
+"""
+
+import argparse
+import asyncio
+import time
+import fdb
+import fdb.aio
+
+#: Query that returns moderately sized result set from system tables.
+QUERY = """select first %d t1.rdb$type, t1.rdb$field_name, t2.rdb$type_name
+from rdb$types t1, rdb$types t2"""
+
+#: Interval (in seconds) between latency probes.
+PROBE_INTERVAL = 0.001
+
+async def probe(lags):
+    "Record how late the event loop wakes up sleeping task."
+    loop = asyncio.get_event_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(loop.time() - start - PROBE_INTERVAL)
+
+async def blocking_task(args, sql):
+    con = fdb.connect(dsn=args.database, user=args.user, password=args.password,
+                      charset=args.charset)
+    try:
+        for i in range(args.queries):
+            cur = con.cursor()
+            cur.execute(sql)
+            for row in cur:
+                pass
+            con.commit()
+            # Let other tasks run
+            await asyncio.sleep(0)
+    finally:
+        con.close()
+
+async def aio_task(args, sql):
+    con = await fdb.aio.connect(dsn=args.database, user=args.user, password=args.password,
+                                charset=args.charset)
+    try:
+        for i in range(args.queries):
+            cur = con.cursor()
+            await cur.execute(sql)
+            async for row in cur:
+                pass
+            await con.commit()
+    finally:
+        await con.close()
+
+async def run(task, args):
+    "Returns list of event loop lags and elapsed time."
+    sql = QUERY % args.rows
+    lags = []
+    prober = asyncio.ensure_future(probe(lags))
+    start = time.time()
+    await asyncio.gather(*[task(args, sql) for i in range(args.tasks)])
+    elapsed = time.time() - start
+    prober.cancel()
+    return sorted(lags), elapsed
+
+def report(name, lags, elapsed, args):
+    def percentile(p):
+        return lags[min(len(lags) - 1, int(len(lags) * p))] * 1000 if lags else 0.0
+    print("%-9s %6.2f s, %7.1f queries/s, loop lag p50 %8.2f ms, p99 %8.2f ms, max %8.2f ms"
+          % (name, elapsed, args.tasks * args.queries / elapsed, percentile(0.5),
+             percentile(0.99), lags[-1] * 1000 if lags else 0.0))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default='localhost:employee')
+    parser.add_argument('--user', default='SYSDBA')
+    parser.add_argument('--password', default='masterkey')
+    parser.add_argument('--charset', default='UTF8')
+    parser.add_argument('--tasks', type=int, default=20)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--mode', choices=['blocking', 'aio', 'both'], default='both')
+    args = parser.parse_args()
+    loop = asyncio.get_event_loop()
+    if args.mode in ('blocking', 'both'):
+        lags, elapsed = loop.run_until_complete(run(blocking_task, args))
+        report('blocking', lags, elapsed, args)
+    if args.mode in ('aio', 'both'):
+        lags, elapsed = loop.run_until_complete(run(aio_task, args))
+        report('fdb.aio', lags, elapsed, args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#coding:utf-8
+#
+#   PROGRAM:     fdb
+#   MODULE:      benchmarks/blob.py
+#   DESCRIPTION: Python driver for Firebird - Materialized BLOB fetch benchmark
+#
+#  Software distributed under the License is distributed AS IS,
+#  WITHOUT WARRANTY OF ANY KIND, either express or implied.
+#  See the License for the specific language governing rights
+#  and limitations under the License.
+#
+#  The Original Code was created by Pavel Cisar
+#
+#  Copyright (c) Pavel Cisar <pcisar@users.sourceforge.net>
+#  and all contributors signed below.
+#
+#  All Rights Reserved.
+#  Contributor(s): ______________________________________.
+"""Materialized BLOB fetch benchmark.
+
+Fetches result sets where every row carries small BLOB values (the worst case
+for BLOB materialization, as per-BLOB overhead dominates). Run it against the
+same database before and after a change to compare rows per second, for example::
+
+    python benchmarks/blob.py --database localhost:employee --rows 20000
+"""
+
+from __future__ import print_function
+import argparse
+import time
+import fdb
+
+#: Result sets with small text and binary BLOBs (rows are generated by cross
+#: join of system tables, so it works with any database).
+QUERIES = {
+    'text': """select first %d t1.rdb$type,
+  cast(t1.rdb$type_name || ' ' || t2.rdb$type_name as blob sub_type text)
+from rdb$types t1, rdb$types t2""",
+    'binary': """select first %d t1.rdb$type,
+  cast(t1.rdb$type_name || t2.rdb$type_name as blob sub_type binary)
+from rdb$types t1, rdb$types t2""",
+    'multi': """select first %d t1.rdb$type,
+  cast(t1.rdb$type_name as blob sub_type text),
+  cast(t2.rdb$type_name as blob sub_type text),
+  cast(t1.rdb$field_name as blob sub_type binary)
+from rdb$types t1, rdb$types t2""",
+    }
+
+def run(con, sql, rounds):
+    "Returns number of rows and best rows per second achieved in `rounds` runs"
+    best = 0.0
+    for i in range(rounds):
+        cur = con.cursor()
+        start = time.time()
+        cur.execute(sql)
+        count = 0
+        for row in cur:
+            count += 1
+        elapsed = time.time() - start
+        cur.close()
+        con.commit()
+        if elapsed > 0:
+            best = max(best, count / elapsed)
+    return count, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default='localhost:employee')
+    parser.add_argument('--user', default='SYSDBA')
+    parser.add_argument('--password', default='masterkey')
+    parser.add_argument('--charset', default='UTF8')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--query', choices=sorted(QUERIES) + ['all'], default='all')
+    args = parser.parse_args()
+    con = fdb.connect(dsn=args.database, user=args.user, password=args.password,
+                      charset=args.charset)
+    try:
+        names = sorted(QUERIES) if args.query == 'all' else [args.query]
+        for name in names:
+            count, rate = run(con, QUERIES[name] % args.rows, args.rounds)
+            print("%-6s: %d rows, best of %d rounds: %.0f rows/s" % (name, count,
+                                                                   args.rounds, rate))
+    finally:
+        con.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#coding:utf-8
+#
+#   PROGRAM:     fdb
+#   MODULE:      benchmarks/fetch.py
+#   DESCRIPTION: Python driver for Firebird - Row fetch throughput benchmark
+#
+#  Software distributed under the License is distributed AS IS,
+#  WITHOUT WARRANTY OF ANY KIND, either express or implied.
+#  See the License for the specific language governing rights
+#  and limitations under the License.
+#
+#  The Original Code was created by Pavel Cisar
+#
+#  Copyright (c) Pavel Cisar <pcisar@users.sourceforge.net>
+#  and all contributors signed below.
+#
+#  All Rights Reserved.
+#  Contributor(s): ______________________________________.
+"""Fetch throughput benchmark.
+
+Run it against the same database before and after a change to compare
+rows per second, for example::
+
+    python benchmarks/fetch.py --database localhost:employee --rows 100000
+"""
+
+from __future__ import print_function
+import argparse
+import time
+import fdb
+
+#: Narrow result set with the most common data types (rows are generated by
+#: cross join of system tables, so it works with any database).
+NARROW_QUERY = """select first %d
+  t1.rdb$type, t1.rdb$field_name, cast(t1.rdb$type as numeric(18,2)),
+  cast('2018-01-01' as date) + t2.rdb$type, current_timestamp,
+  cast(t2.rdb$type as double precision), nullif(t2.rdb$type, 1)
+from rdb$types t1, rdb$types t2, rdb$types t3"""
+
+#: Result set with wide VARCHAR columns that contain short values.
+WIDE_QUERY = """select first %d
+  t1.rdb$type, cast(t1.rdb$field_name as varchar(4000)),
+  cast(t2.rdb$type_name as varchar(4000)), t2.rdb$type
+from rdb$types t1, rdb$types t2, rdb$types t3"""
+
+QUERIES = {'narrow': NARROW_QUERY, 'wide': WIDE_QUERY}
+
+def run(con, sql, rounds, method, lazy=False):
+    "Returns best rows per second achieved in `rounds` runs"
+    best = 0.0
+    for i in range(rounds):
+        cur = con.cursor()
+        cur.lazy_rows = lazy
+        start = time.time()
+        cur.execute(sql)
+        if method == 'fetchall':
+            count = len(cur.fetchall())
+        else:
+            count = 0
+            for row in cur:
+                count += 1
+        elapsed = time.time() - start
+        cur.close()
+        if elapsed > 0:
+            best = max(best, count / elapsed)
+    return count, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default='localhost:employee')
+    parser.add_argument('--user', default='SYSDBA')
+    parser.add_argument('--password', default='masterkey')
+    parser.add_argument('--charset', default='UTF8')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--method', choices=['fetchall', 'iterate'], default='iterate')
+    parser.add_argument('--query', choices=sorted(QUERIES), default='narrow')
+    parser.add_argument('--lazy', action='store_true', help='Fetch rows in lazy_rows mode')
+    args = parser.parse_args()
+    con = fdb.connect(dsn=args.database, user=args.user, password=args.password,
+                      charset=args.charset)
+    try:
+        count, rate = run(con, QUERIES[args.query] % args.rows, args.rounds, args.method,
+                          args.lazy)
+        print("%s: %d rows, best of %d rounds: %.0f rows/s" % (args.method, count,
+                                                             args.rounds, rate))
+    finally:
+        con.close()
+
+if __name__ == '__main__':
+    main()
@@ -26,9 +26,12 @@ from fdb import services
 from fdb import blr
 from fdb import trace
 from fdb import gstat
+from fdb import pool
+from fdb import slowlog
+from fdb import metrics
 
 __all__ = (# Common with KInterbasDB
-    'BINARY', 'Binary', 'BlobReader', 'Connection', 'ConnectionGroup',
+    'BINARY', 'Binary', 'BlobReader', 'BlobWriter', 'Connection', 'ConnectionGroup',
     'Cursor', 'DATETIME', 'DBAPITypeObject', 'DESCRIPTION_DISPLAY_SIZE',
     'DESCRIPTION_INTERNAL_SIZE', 'DESCRIPTION_NAME', 'DESCRIPTION_NULL_OK',
     'DESCRIPTION_PRECISION', 'DESCRIPTION_SCALE', 'DESCRIPTION_TYPE_CODE',
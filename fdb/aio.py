@@ -0,0 +1,466 @@
+#coding:utf-8
+#
+#   PROGRAM:     fdb
+#   MODULE:      aio.py
+#   DESCRIPTION: Python driver for Firebird - asyncio front-end
+#   CREATED:     17.10.2026
+#
+#  Software distributed under the License is distributed AS IS,
+#  WITHOUT WARRANTY OF ANY KIND, either express or implied.
+#  See the License for the specific language governing rights
+#  and limitations under the License.
+#
+#  The Original Code was created by Pavel Cisar
+#
+#  Copyright (c) Pavel Cisar <pcisar@users.sourceforge.net>
+#  and all contributors signed below.
+#
+#  All Rights Reserved.
+#  Contributor(s): ______________________________________.
+
+""":mod:`asyncio` front-end for database connections, cursors, BLOBs and
+Services Manager connections.
+
+Blocking calls into Firebird client library run on dedicated worker thread
+owned by each connection, so they are serialized in the order in which they
+were awaited, and never block the event loop.
+
+Requires Python 3.7 or newer.
+
+Example:
+    .. code-block:: python
+
+        async def main():
+            async with await fdb.aio.connect(dsn='host:employee', user='sysdba',
+                                             password='masterkey') as con:
+                cur = con.cursor()
+                await cur.execute('select * from country')
+                async for row in cur:
+                    print(row)
+"""
+
+import asyncio
+import collections
+import functools
+import concurrent.futures
+import fdb
+import fdb.services
+from fdb.fbcore import _RowMapping
+
+#: Default number of rows fetched by single call to worker thread during
+#: asynchronous iteration over cursor.
+DEFAULT_BATCH_SIZE = 256
+
+class _Worker(object):
+    """Internal single thread executor for blocking calls of one connection.
+    """
+    def __init__(self):
+        self.__executor = concurrent.futures.ThreadPoolExecutor(1)
+    def run(self, func, *args, **kwargs):
+        "Returns future for `func` executed in worker thread."
+        if kwargs:
+            func = functools.partial(func, **kwargs)
+        return asyncio.get_running_loop().run_in_executor(self.__executor, func, *args)
+    def close(self):
+        self.__executor.shutdown(wait=False)
+
+async def _run_in_thread(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+async def connect(*args, **kwargs):
+    """Establish a connection to database.
+
+    Args:
+        args, kwargs: Arguments for :func:`fdb.connect`.
+
+    Returns:
+        :class:`AsyncConnection`
+    """
+    worker = _Worker()
+    try:
+        connection = await worker.run(fdb.connect, *args, **kwargs)
+    except:
+        worker.close()
+        raise
+    return AsyncConnection(connection, worker)
+
+async def create_database(*args, **kwargs):
+    """Creates a new database.
+
+    Args:
+        args, kwargs: Arguments for :func:`fdb.create_database`.
+
+    Returns:
+        :class:`AsyncConnection`
+    """
+    worker = _Worker()
+    try:
+        connection = await worker.run(fdb.create_database, *args, **kwargs)
+    except:
+        worker.close()
+        raise
+    return AsyncConnection(connection, worker)
+
+async def services_connect(*args, **kwargs):
+    """Establishes a connection to the Services Manager.
+
+    Args:
+        args, kwargs: Arguments for :func:`fdb.services.connect`.
+
+    Returns:
+        :class:`AsyncServiceConnection`
+    """
+    worker = _Worker()
+    try:
+        connection = await worker.run(fdb.services.connect, *args, **kwargs)
+    except:
+        worker.close()
+        raise
+    return AsyncServiceConnection(connection, worker)
+
+class AsyncConnection(object):
+    """Asynchronous wrapper for :class:`fdb.Connection`.
+
+    .. important::
+
+       DO NOT create instances of this class directly! Use only :func:`connect`,
+       :func:`create_database` or :meth:`AsyncConnectionPool.get`.
+    """
+    def __init__(self, connection, worker=None):
+        #: :class:`fdb.Connection`: Wrapped connection. Its methods that call
+        #: Firebird client library should be called only via :meth:`run`.
+        self.connection = connection
+        self._worker = _Worker() if worker is None else worker
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *args):
+        await self.close()
+    def run(self, func, *args, **kwargs):
+        """Run any blocking call in worker thread of this connection.
+
+        Args:
+            func (callable): Function to be called.
+            args: Positional arguments for `func`.
+            kwargs: Keyword arguments for `func`.
+
+        Returns:
+            Awaitable that returns result of `func`.
+        """
+        return self._worker.run(func, *args, **kwargs)
+    def cursor(self):
+        """Return a new :class:`AsyncCursor` bound to :attr:`~fdb.Connection.main_transaction`.
+        """
+        return AsyncCursor(self, self.connection.cursor())
+    async def begin(self, tpb=None):
+        "Starts a transaction explicitly. See :meth:`fdb.Connection.begin`."
+        await self._worker.run(self.connection.begin, tpb)
+    async def commit(self, retaining=False):
+        "Commit pending transaction. See :meth:`fdb.Connection.commit`."
+        await self._worker.run(self.connection.commit, retaining)
+    async def rollback(self, retaining=False, savepoint=None):
+        "Rollback pending transaction. See :meth:`fdb.Connection.rollback`."
+        await self._worker.run(self.connection.rollback, retaining, savepoint)
+    async def savepoint(self, name):
+        "Establishes a named SAVEPOINT. See :meth:`fdb.Connection.savepoint`."
+        await self._worker.run(self.connection.savepoint, name)
+    async def execute_immediate(self, sql, parameters=None, returning=None):
+        "Executes a statement without caching. See :meth:`fdb.Connection.execute_immediate`."
+        return await self._worker.run(self.connection.execute_immediate, sql, parameters,
+                                      returning)
+    async def close(self):
+        """Close the connection. Connections borrowed from :class:`AsyncConnectionPool`
+        are returned to the pool.
+        """
+        try:
+            await self._worker.run(self.connection.close)
+        finally:
+            self._worker.close()
+    #: bool: (R/O) True if connection is closed.
+    closed = property(lambda self: self.connection.closed)
+
+class AsyncCursor(object):
+    """Asynchronous wrapper for :class:`fdb.Cursor`.
+
+    Cursor supports asynchronous iteration (`async for`), that fetches rows from
+    worker thread in batches of :attr:`batch_size` rows.
+
+    Streamed BLOB values (see :meth:`fdb.Cursor.set_stream_blob`) are returned
+    as :class:`AsyncBlobReader` instances.
+
+    .. important::
+
+       DO NOT create instances of this class directly! Use only
+       :meth:`AsyncConnection.cursor`.
+    """
+    #: int: (R/W) Number of rows fetched by single call to worker thread
+    #: during asynchronous iteration.
+    batch_size = DEFAULT_BATCH_SIZE
+
+    def __init__(self, connection, cursor):
+        #: :class:`AsyncConnection`: Connection this cursor belongs to.
+        self.connection = connection
+        #: :class:`fdb.Cursor`: Wrapped cursor.
+        self.cursor = cursor
+        self.__rows = collections.deque()
+        self.__exhausted = False
+        # Information about executed statement is obtained in worker thread,
+        # as it may need call to server
+        self.__description = []
+        self.__rowcount = -1
+    def __update_info(self):
+        # Runs in worker thread
+        self.__description = self.cursor.description
+        self.__rowcount = self.cursor.rowcount
+    def __call(self, func, *args):
+        # Runs in worker thread
+        try:
+            return func(*args)
+        finally:
+            self.__update_info()
+    def __wrap_blobs(self, rows):
+        # Runs in worker thread
+        result = []
+        for row in rows:
+            if isinstance(row, tuple):
+                for value in row:
+                    if isinstance(value, fdb.BlobReader):
+                        row = tuple([AsyncBlobReader(self.connection, value)
+                                     if isinstance(value, fdb.BlobReader) else value
+                                     for value in row])
+                        break
+            result.append(row)
+        return result
+    def __fetch(self, size=None):
+        # Runs in worker thread
+        if size is None:
+            rows = self.cursor.fetchall()
+        else:
+            rows = self.cursor.fetchmany(size)
+        if size is None or len(rows) < size:
+            # Row count is final when result set is exhausted
+            self.__rowcount = self.cursor.rowcount
+        return self.__wrap_blobs(rows)
+    def __to_map(self, rows):
+        if rows:
+            index = self.cursor._ps._get_field_index()
+            return [_RowMapping(index, row) for row in rows]
+        return rows
+    def __reset(self):
+        self.__rows.clear()
+        self.__exhausted = False
+    def __aiter__(self):
+        return self
+    async def __anext__(self):
+        if not self.__rows:
+            if not self.__exhausted:
+                rows = await self.connection._worker.run(self.__fetch, self.batch_size)
+                if len(rows) < self.batch_size:
+                    self.__exhausted = True
+                self.__rows.extend(rows)
+            if not self.__rows:
+                raise StopAsyncIteration
+        return self.__rows.popleft()
+    async def execute(self, operation, parameters=None):
+        """Prepare and execute a database operation. See :meth:`fdb.Cursor.execute`.
+
+        Returns:
+            `self`, so call to execute could be used in `async for` statement.
+        """
+        self.__reset()
+        await self.connection._worker.run(self.__call, self.cursor.execute, operation, parameters)
+        return self
+    async def executemany(self, operation, seq_of_parameters):
+        "Execute operation for all parameter sequences. See :meth:`fdb.Cursor.executemany`."
+        self.__reset()
+        await self.connection._worker.run(self.__call, self.cursor.executemany, operation,
+                                          seq_of_parameters)
+        return self
+    async def executebatch(self, operation, seq_of_parameters):
+        "Execute DML statement for all parameter sequences in batch. See :meth:`fdb.Cursor.executebatch`."
+        self.__reset()
+        return await self.connection._worker.run(self.__call, self.cursor.executebatch,
+                                                 operation, seq_of_parameters)
+    async def callproc(self, procname, parameters=None):
+        "Call a stored database procedure. See :meth:`fdb.Cursor.callproc`."
+        self.__reset()
+        return await self.connection._worker.run(self.__call, self.cursor.callproc, procname,
+                                                 parameters)
+    async def prep(self, operation):
+        "Create prepared statement for repeated execution. See :meth:`fdb.Cursor.prep`."
+        return await self.connection._worker.run(self.cursor.prep, operation)
+    async def fetchone(self):
+        "Fetch the next row of a query result set, or None when no more data is available."
+        if self.__rows:
+            return self.__rows.popleft()
+        rows = await self.connection._worker.run(self.__fetch, 1)
+        return rows[0] if rows else None
+    async def fetchmany(self, size=None):
+        "Fetch the next set of rows of a query result, returning a sequence of sequences."
+        if size is None:
+            size = self.cursor.arraysize
+        rows = []
+        while self.__rows and len(rows) < size:
+            rows.append(self.__rows.popleft())
+        if len(rows) < size:
+            rows.extend(await self.connection._worker.run(self.__fetch, size - len(rows)))
+        return rows
+    async def fetchall(self):
+        "Fetch all (remaining) rows of a query result."
+        rows = list(self.__rows)
+        self.__rows.clear()
+        rows.extend(await self.connection._worker.run(self.__fetch))
+        return rows
+    async def fetchonemap(self):
+        "Fetch the next row as mapping of field names to values. See :meth:`fdb.Cursor.fetchonemap`."
+        row = await self.fetchone()
+        return None if row is None else self.__to_map([row])[0]
+    async def fetchmanymap(self, size=None):
+        "Fetch the next set of rows as mappings. See :meth:`fdb.Cursor.fetchmanymap`."
+        return self.__to_map(await self.fetchmany(size))
+    async def fetchallmap(self):
+        "Fetch all (remaining) rows as mappings. See :meth:`fdb.Cursor.fetchallmap`."
+        return self.__to_map(await self.fetchall())
+    def set_stream_blob(self, blob_name):
+        "Specify BLOB column(s) to work in `stream` mode. See :meth:`fdb.Cursor.set_stream_blob`."
+        self.cursor.set_stream_blob(blob_name)
+    def set_stream_blob_treshold(self, size):
+        "Specify max. blob size for materialized blobs. See :meth:`fdb.Cursor.set_stream_blob_treshold`."
+        self.cursor.set_stream_blob_treshold(size)
+    async def close(self):
+        "Close the cursor. See :meth:`fdb.Cursor.close`."
+        self.__reset()
+        await self.connection._worker.run(self.__call, self.cursor.close)
+    def __get_arraysize(self):
+        return self.cursor.arraysize
+    def __set_arraysize(self, value):
+        self.cursor.arraysize = value
+    #: int: (R/W) Default number of rows fetched by :meth:`fetchmany`.
+    arraysize = property(__get_arraysize, __set_arraysize)
+    #: list: (R/O) Description of result columns. See :attr:`fdb.Cursor.description`.
+    description = property(lambda self: self.__description)
+    #: int: (R/O) Number of rows affected by last execute, or number of rows
+    #: produced by SELECT. Value is obtained when statement is executed and
+    #: when all rows are fetched, so it doesn't change while result set is read.
+    rowcount = property(lambda self: self.__rowcount)
+
+class AsyncBlobReader(object):
+    """Asynchronous wrapper for :class:`fdb.BlobReader`.
+
+    Supports asynchronous iteration over lines of text BLOB (`async for`).
+    """
+    def __init__(self, connection, reader):
+        self.__connection = connection
+        #: :class:`fdb.BlobReader`: Wrapped BLOB reader.
+        self.reader = reader
+    def __run(self, func, *args):
+        return self.__connection._worker.run(func, *args)
+    def __aiter__(self):
+        return self
+    async def __anext__(self):
+        line = await self.__run(self.reader.readline)
+        if not line:
+            raise StopAsyncIteration
+        return line
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *args):
+        await self.close()
+    async def read(self, size=-1):
+        "Read at most `size` bytes (or characters for text BLOB). See :meth:`fdb.BlobReader.read`."
+        return await self.__run(self.reader.read, size)
+    async def readinto(self, b):
+        "Read raw bytes into preallocated buffer `b`. See :meth:`fdb.BlobReader.readinto`."
+        return await self.__run(self.reader.readinto, b)
+    async def readline(self):
+        "Read one line from BLOB. See :meth:`fdb.BlobReader.readline`."
+        return await self.__run(self.reader.readline)
+    async def readlines(self, sizehint=None):
+        "Read all remaining lines from BLOB. See :meth:`fdb.BlobReader.readlines`."
+        return await self.__run(self.reader.readlines, sizehint)
+    async def seek(self, offset, whence=0):
+        "Set current position in BLOB. See :meth:`fdb.BlobReader.seek`."
+        return await self.__run(self.reader.seek, offset, whence)
+    def tell(self):
+        "Return current position in BLOB."
+        return self.reader.tell()
+    async def get_info(self):
+        "Return information about BLOB. See :meth:`fdb.BlobReader.get_info`."
+        return await self.__run(self.reader.get_info)
+    async def close(self):
+        "Close the reader."
+        await self.__run(self.reader.close)
+    #: bool: (R/O) True if BLOB reader is closed.
+    closed = property(lambda self: self.reader.closed)
+
+class AsyncServiceConnection(object):
+    """Asynchronous wrapper for :class:`fdb.services.Connection`.
+
+    All public methods of wrapped connection are available as coroutines
+    (for example `await svc.get_server_version()` or `await svc.backup(...)`).
+    Output of service operations could be read by :meth:`readline` or by
+    asynchronous iteration (`async for line in svc`).
+
+    .. important::
+
+       DO NOT create instances of this class directly! Use only :func:`services_connect`.
+    """
+    def __init__(self, connection, worker=None):
+        #: :class:`fdb.services.Connection`: Wrapped Services Manager connection.
+        self.connection = connection
+        self._worker = _Worker() if worker is None else worker
+    def __getattr__(self, name):
+        attr = getattr(self.connection, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        @functools.wraps(attr)
+        def method(*args, **kwargs):
+            return self._worker.run(attr, *args, **kwargs)
+        return method
+    def __aiter__(self):
+        return self
+    async def __anext__(self):
+        line = await self._worker.run(self.connection.readline)
+        if line is None:
+            raise StopAsyncIteration
+        return line
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *args):
+        await self.close()
+    async def close(self):
+        "Close the connection to Services Manager."
+        try:
+            await self._worker.run(self.connection.close)
+        finally:
+            self._worker.close()
+
+class AsyncConnectionPool(object):
+    """Asynchronous wrapper for :class:`fdb.pool.ConnectionPool`.
+
+    Borrowed connections are returned to pool by :meth:`AsyncConnection.close`
+    (or at the end of `async with` block).
+    """
+    def __init__(self, pool):
+        """
+        Args:
+            pool (:class:`fdb.pool.ConnectionPool`): Wrapped pool.
+        """
+        #: :class:`fdb.pool.ConnectionPool`: Wrapped pool.
+        self.pool = pool
+    async def get(self, timeout=-1):
+        """Borrow connection from pool. Waiting for available connection does
+        not block the event loop. See :meth:`fdb.pool.ConnectionPool.get`.
+
+        Returns:
+            :class:`AsyncConnection`
+        """
+        worker = _Worker()
+        try:
+            connection = await worker.run(self.pool.get, timeout)
+        except:
+            worker.close()
+            raise
+        return AsyncConnection(connection, worker)
+    async def close(self):
+        "Close the pool. See :meth:`fdb.pool.ConnectionPool.close`."
+        await _run_in_thread(self.pool.close)
@@ -0,0 +1,92 @@
+#coding:utf-8
+#
+#   PROGRAM:     fdb
+#   MODULE:      arrow.py
+#   DESCRIPTION: Python driver for Firebird - Export of result sets to Apache Arrow formats
+#   CREATED:     17.10.2026
+#
+#  Software distributed under the License is distributed AS IS,
+#  WITHOUT WARRANTY OF ANY KIND, either express or implied.
+#  See the License for the specific language governing rights
+#  and limitations under the License.
+#
+#  The Original Code was created by Pavel Cisar
+#
+#  Copyright (c) Pavel Cisar <pcisar@users.sourceforge.net>
+#  and all contributors signed below.
+#
+#  All Rights Reserved.
+#  Contributor(s): ______________________________________.
+
+"""Functions that write result set of executed :class:`~fdb.Cursor` to Arrow IPC
+or Parquet files batch by batch (see :meth:`~fdb.Cursor.iter_record_batches`),
+so memory consumption stays bounded by size of single batch.
+
+Requires PyArrow (and NumPy).
+"""
+
+import pyarrow
+import pyarrow.ipc
+
+#: Default number of rows in single record batch.
+DEFAULT_BATCH_ROWS = 65536
+
+def _record_batches(cursor, batch_rows):
+    "Returns schema and iterator over record batches for cursor."
+    batches = cursor.iter_record_batches(batch_rows)
+    first = next(batches, None)
+    if first is None:
+        return cursor._ps._get_arrow_schema(), iter([])
+    def chain():
+        yield first
+        for batch in batches:
+            yield batch
+    return first.schema, chain()
+
+def write_ipc(cursor, sink, batch_rows=DEFAULT_BATCH_ROWS, stream=False):
+    """Write (remaining) rows from executed cursor to Arrow IPC file.
+
+    Args:
+        cursor (:class:`~fdb.Cursor`): Cursor with executed SELECT statement.
+        sink (str or file-like object): File name or writable binary stream.
+
+    Keyword Args:
+        batch_rows (int): Max. number of rows in single record batch.
+        stream (bool): Write IPC streaming format instead IPC file format.
+
+    Returns:
+        int: Number of written rows.
+    """
+    schema, batches = _record_batches(cursor, batch_rows)
+    new_writer = pyarrow.ipc.new_stream if stream else pyarrow.ipc.new_file
+    rows = 0
+    with new_writer(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+def write_parquet(cursor, where, batch_rows=DEFAULT_BATCH_ROWS, **options):
+    """Write (remaining) rows from executed cursor to Parquet file.
+
+    Args:
+        cursor (:class:`~fdb.Cursor`): Cursor with executed SELECT statement.
+        where (str or file-like object): File name or writable binary stream.
+
+    Keyword Args:
+        batch_rows (int): Max. number of rows in single record batch (each batch
+            is written as separate row group).
+        options: Other keyword arguments are passed to :class:`pyarrow.parquet.ParquetWriter`
+            (for example `compression`).
+
+    Returns:
+        int: Number of written rows.
+    """
+    import pyarrow.parquet
+    schema, batches = _record_batches(cursor, batch_rows)
+    rows = 0
+    with pyarrow.parquet.ParquetWriter(where, schema, **options) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
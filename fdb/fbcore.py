@@ -30,6 +30,12 @@ import datetime
 import decimal
 import weakref
 import threading
+import collections
+import codecs
+import io
+import mmap
+import traceback
+import warnings
 try:
     from builtins import dict
 except ImportError:
@@ -46,6 +52,12 @@ try:
 except ImportError:
     # Python 3
     from itertools import zip_longest as izip_longest
+try:
+    # Python 2
+    import Queue as queue
+except ImportError:
+    # Python 3
+    import queue
 from fdb.ibase import (frb_info_att_charset, isc_dpb_activate_shadow,
                        isc_dpb_address_path, isc_dpb_allocation, isc_dpb_begin_log,
                        isc_dpb_buffer_length, isc_dpb_cache_manager, isc_dpb_cdd_pathname,
@@ -149,7 +161,7 @@ from fdb.ibase import (frb_info_att_charset, isc_dpb_activate_shadow,
                        blr_int64, blr_float, blr_d_float, blr_double, blr_timestamp, blr_sql_date,
                        blr_sql_time, blr_cstring, blr_quad, blr_blob, blr_bool,
                        #
-                       SQLDA_version1, isc_segment,
+                       SQLDA_version1, isc_segment, isc_segstr_eof,
                        isc_db_handle, isc_tr_handle, isc_stmt_handle, isc_blob_handle,
                        sys_encoding)
 
@@ -168,9 +180,19 @@ HOOK_DATABASE_ATTACH_REQUEST = 3
 HOOK_DATABASE_DETACH_REQUEST = 4
 HOOK_DATABASE_CLOSED = 5
 HOOK_SERVICE_ATTACHED = 6
+HOOK_STATEMENT_PREPARED = 7
+HOOK_STATEMENT_EXECUTED = 8
+HOOK_STATEMENT_FETCHED = 9
+HOOK_TRANSACTION_COMMITTED = 10
+HOOK_TRANSACTION_ROLLED_BACK = 11
+HOOK_BLOB_READ = 12
+HOOK_BLOB_WRITTEN = 13
 
 hooks = {}
 
+#: High-resolution timer used to measure durations (in seconds) reported to hooks.
+_hook_timer = getattr(time, 'perf_counter', time.time)
+
 def add_hook(hook_type, func):
     """Instals hook function for specified hook_type.
 
@@ -212,6 +234,46 @@ def get_hooks(hook_type):
     """
     return hooks.get(hook_type, list())
 
+HANDLE_STATEMENT = 'statement'
+HANDLE_BLOB = 'blob'
+HANDLE_TRANSACTION = 'transaction'
+
+# Handle tracker installed by enable_handle_tracking(), or None
+_handle_tracker = None
+
+def enable_handle_tracking(capture_stack=True, limits=None, max_age=None):
+    """Starts tracking of live statement, BLOB and transaction handles.
+    Replaces tracker installed before (handles allocated before this call
+    are not tracked).
+
+    Keyword Args:
+        capture_stack (bool): Whether stack of code that allocated handle
+            should be recorded (it's not needed for handle counts and ages).
+        limits (dict): Max. numbers of live handles, as mapping from handle
+            kind (`HANDLE_STATEMENT`, `HANDLE_BLOB` or `HANDLE_TRANSACTION`)
+            to number.
+        max_age (float): Max. age of live handle in seconds.
+
+    Returns:
+        :class:`_HandleTracker` instance.
+
+    When limit is exceeded, :class:`HandleLeakWarning` is issued.
+    """
+    global _handle_tracker
+    _handle_tracker = _HandleTracker(capture_stack, limits, max_age)
+    return _handle_tracker
+
+def disable_handle_tracking():
+    "Stops tracking of handles started by :func:`enable_handle_tracking`."
+    global _handle_tracker
+    _handle_tracker = None
+
+def get_handle_tracker():
+    """Returns :class:`_HandleTracker` instance installed by
+    :func:`enable_handle_tracking`, or None when handles are not tracked.
+    """
+    return _handle_tracker
+
 def load_api(fb_library_name=None):
     """Initializes bindings to Firebird Client Library unless they are already initialized.
     Called automatically by :func:`fdb.connect` and :func:`fdb.create_database`.
@@ -294,6 +356,11 @@ class TransactionConflict(DatabaseError):
 class ParseError(Exception):
     pass
 
+class HandleLeakWarning(UserWarning):
+    """Warning issued by handle tracker (see :func:`enable_handle_tracking`) when
+    number or age of live handles exceeds specified limit."""
+    pass
+
 # Named positional constants to be used as indices into the description
 # attribute of a cursor (these positions are defined by the DB API spec).
 # For example:
@@ -355,6 +422,10 @@ ROWID = DBAPITypeObject()
 
 _FS_ENCODING = sys.getfilesystemencoding()
 DIST_TRANS_MAX_DATABASES = 16
+#: Default max. number of prepared statements kept in per-connection statement cache
+DEFAULT_STATEMENT_CACHE_SIZE = 50
+#: Default max. number of idle statement handles kept in per-connection handle pool
+DEFAULT_STATEMENT_HANDLE_POOL_SIZE = 20
 
 def bs(byte_array):
     return bytes(byte_array) if PYTHON_MAJOR_VER == 3 else ''.join((chr(c) for c in byte_array))
@@ -585,6 +656,718 @@ def uint_to_bytes(val, nbytes):  # Convert int value to little endian bytes.
         raise InternalError
     return struct.pack(fmt, val)
 
+# Row decoder support
+
+#: :mod:`struct` codes for output values of fixed-size SQL types.
+_OUTPUT_STRUCT_CODES = {SQL_FLOAT: 'f', SQL_DOUBLE: 'd', SQL_D_FLOAT: 'd',
+                        SQL_BOOLEAN: '?', SQL_TYPE_DATE: 'i', SQL_TYPE_TIME: 'I',
+                        SQL_TIMESTAMP: '8s', SQL_BLOB: '8s', SQL_ARRAY: '8s'}
+#: :mod:`struct` codes for integer output values by their size.
+_INTEGER_STRUCT_CODES = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}
+#: Value ranges of integer SQL types.
+_INTEGER_RANGES = {SQL_SHORT: (SHRT_MIN, SHRT_MAX), SQL_LONG: (INT_MIN, INT_MAX),
+                   SQL_INT64: (LONG_MIN, LONG_MAX)}
+_ISC_DATE_STRUCT = struct.Struct('=i')
+_ISC_TIME_STRUCT = struct.Struct('=I')
+_ISC_TIMESTAMP_STRUCT = struct.Struct('=iI')
+_VARYING_LENGTH_STRUCT = struct.Struct('=H')
+#: Ordinal of 1858-11-17, the day zero of Firebird dates.
+_ISC_DATE_EPOCH = 678576
+
+#: Record count info codes reported as rowcount for statement types.
+_ROWCOUNT_INFO_CODES = {isc_info_sql_stmt_select: isc_info_req_select_count,
+                        isc_info_sql_stmt_insert: isc_info_req_insert_count,
+                        isc_info_sql_stmt_update: isc_info_req_update_count,
+                        isc_info_sql_stmt_delete: isc_info_req_delete_count}
+#: Max. size of buffer for materialized BLOBs retained by PreparedStatement for reuse
+_MAX_RETAINED_BLOB_BUFFER = 1048576
+
+def _isc_date_to_date(value):
+    "Convert ISC_DATE value to datetime.date"
+    return datetime.date.fromordinal(value + _ISC_DATE_EPOCH)
+
+def _isc_time_to_time(value):
+    "Convert ISC_TIME value to datetime.time"
+    s, fraction = divmod(value, 10000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return datetime.time(h, m, s, fraction * 100)
+
+def _date_to_isc_date(value):
+    "Convert datetime.date (or date part of datetime.datetime) to ISC_DATE value"
+    return value.toordinal() - _ISC_DATE_EPOCH
+
+def _time_to_isc_time(value):
+    "Convert datetime.time (or time part of datetime.datetime) to ISC_TIME value"
+    return ((value.hour * 3600 + value.minute * 60 + value.second) * 10000
+            + value.microsecond // 100)
+
+def _isc_timestamp_to_datetime(raw_value):
+    "Convert raw ISC_TIMESTAMP value to datetime.datetime"
+    nday, ntime = _ISC_TIMESTAMP_STRUCT.unpack(raw_value)
+    return datetime.datetime.combine(_isc_date_to_date(nday), _isc_time_to_time(ntime))
+
+def _make_text_converter(charset, length, size):
+    "Returns converter for CHAR values, or None if value should be returned as is."
+    if charset:
+        if length < size:
+            return lambda value: value.decode(charset, 'replace')[:length]
+        return lambda value: value.decode(charset, 'replace')
+    if length < size:
+        return lambda value: value[:length]
+    return None
+
+def _make_varying_converter(address, charset):
+    "Returns converter that reads VARCHAR value of given length from `address`."
+    string_at = ctypes.string_at
+    if charset:
+        return lambda size: string_at(address, size).decode(charset, 'replace')
+    return lambda size: string_at(address, size)
+
+#: Days between 1858-11-17 (day zero of Firebird dates) and 1970-01-01 (NumPy epoch).
+_ISC_DATE_UNIX_EPOCH = 40587
+
+def _import_numpy():
+    "Returns :mod:`numpy` module. NumPy is optional dependency imported on demand."
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("This feature requires NumPy")
+    return numpy
+
+def _import_pyarrow():
+    "Returns :mod:`pyarrow` module. PyArrow is optional dependency imported on demand."
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("This feature requires PyArrow")
+    return pyarrow
+
+#: Max. number of decimal digits of integer SQL types.
+_INTEGER_DIGITS = {SQL_SHORT: 5, SQL_LONG: 10, SQL_INT64: 19}
+
+def _arrow_decimal_array(pyarrow, numpy, data, nulls, arrow_type):
+    "Returns Arrow decimal128 array for NumPy array of scaled integers."
+    # decimal128 values are 16-byte little-endian two's complement integers
+    values = numpy.empty((len(data), 2), dtype='<i8')
+    values[:, 0] = data
+    values[:, 1] = numpy.right_shift(data.astype('int64'), 63)
+    null_count = int(nulls.sum())
+    validity = None
+    if null_count:
+        validity = pyarrow.py_buffer(numpy.packbits(~nulls, bitorder='little'))
+    return pyarrow.Array.from_buffers(arrow_type, len(data),
+                                      [validity, pyarrow.py_buffer(values)], null_count)
+
+def _grow_array(numpy, data, length):
+    "Returns copy of NumPy array extended to `length` items (rows)."
+    result = numpy.empty((length,) + data.shape[1:], dtype=data.dtype)
+    result[:len(data)] = data
+    return result
+
+def _make_array_scaler(divisor):
+    "Returns function that converts NumPy array of scaled integers to float64 values."
+    return lambda data: data / divisor
+
+def _array_isc_date_to_datetime64(data):
+    "Convert NumPy array of ISC_DATE values to datetime64[D]"
+    return (data.astype('int64') - _ISC_DATE_UNIX_EPOCH).astype('datetime64[D]')
+
+def _array_isc_time_to_timedelta64(data):
+    "Convert NumPy array of ISC_TIME values to timedelta64[us] (time since midnight)"
+    return (data.astype('int64') * 100).astype('timedelta64[us]')
+
+def _array_isc_timestamp_to_datetime64(data):
+    "Convert NumPy array of ISC_TIMESTAMP values to datetime64[us]"
+    return (((data['date'].astype('int64') - _ISC_DATE_UNIX_EPOCH) * 86400000000
+             + data['time'].astype('int64') * 100).astype('datetime64[us]'))
+
+def _datetime64_to_array_isc_date(numpy, data):
+    "Convert NumPy array of dates to ISC_DATE values"
+    return numpy.asarray(data, 'datetime64[D]').astype('int64') + _ISC_DATE_UNIX_EPOCH
+
+def _timedelta64_to_array_isc_time(numpy, data):
+    "Convert NumPy array of timedelta64 values (time since midnight) to ISC_TIME values"
+    return numpy.asarray(data, 'timedelta64[us]').astype('int64') // 100
+
+def _datetime64_to_array_isc_timestamp(numpy, data):
+    "Convert NumPy array of datetime64 values to ISC_TIMESTAMP values"
+    usecs = numpy.asarray(data, 'datetime64[us]').astype('int64')
+    result = numpy.empty(usecs.shape, dtype=[('date', '=i4'), ('time', '=u4')])
+    result['date'] = usecs // 86400000000 + _ISC_DATE_UNIX_EPOCH
+    result['time'] = (usecs % 86400000000) // 100
+    return result
+
+def _make_array_descaler(multiplier):
+    "Returns function that converts NumPy array of numbers to scaled integers."
+    return lambda numpy, data: numpy.rint(numpy.asarray(data, 'float64') * multiplier)
+
+def _get_numpy_array_plan(descriptor):
+    """Returns `(format, decoder, encoder)` tuple for NumPy representation of
+    elements of ARRAY column described by :class:`_ArrayDescriptor`, or None
+    when elements have no native NumPy representation (CHAR and VARCHAR).
+
+    Format is NumPy dtype of ARRAY slice buffer, decoder converts array in
+    this format to values returned to application, and encoder converts values
+    passed by application to this format (None if conversion is not needed).
+    """
+    dtype = descriptor.dtype
+    if dtype in (blr_short, blr_long, blr_int64):
+        fmt = '=i%d' % descriptor.esize
+        if descriptor.subtype or descriptor.scale:
+            factor = float(_tenTo[descriptor.scale])
+            return (fmt, _make_array_scaler(factor), _make_array_descaler(factor))
+        return (fmt, None, None)
+    elif dtype == blr_float:
+        return ('=f4', None, None)
+    elif dtype in (blr_d_float, blr_double):
+        return ('=f8', None, None)
+    elif dtype == blr_bool:
+        return ('?', None, None)
+    elif dtype == blr_sql_date:
+        return ('=i4', _array_isc_date_to_datetime64, _datetime64_to_array_isc_date)
+    elif dtype == blr_sql_time:
+        return ('=u4', _array_isc_time_to_timedelta64, _timedelta64_to_array_isc_time)
+    elif dtype == blr_timestamp:
+        return ([('date', '=i4'), ('time', '=u4')], _array_isc_timestamp_to_datetime64,
+                _datetime64_to_array_isc_timestamp)
+    return None
+
+def _numpy_array_cast(numpy, value, fmt, encoded):
+    """Returns NumPy array `value` converted to format `fmt` of ARRAY slice buffer,
+    or None when values are of different kind (for example floats for INTEGER
+    ARRAY), so they must be validated element by element. Float values for integer
+    format are accepted only when they were `encoded` (scaled) by driver.
+
+    Raises:
+        ValueError: When values are out of range of `fmt`.
+    """
+    target = numpy.dtype(fmt)
+    value = numpy.asarray(value)
+    source = value.dtype
+    if source != target:
+        if target.fields is not None:
+            return None
+        if not (numpy.can_cast(source, target, 'same_kind') or
+                (encoded and source.kind == 'f' and target.kind == 'i')):
+            return None
+        if value.size and target.kind in 'iu':
+            if source.kind == 'f' and not numpy.all(numpy.isfinite(value)):
+                raise ValueError("ARRAY value contains NaN or infinity.")
+            info = numpy.iinfo(target)
+            if value.min() < info.min or value.max() > info.max:
+                raise ValueError("ARRAY value is out of range of column type.")
+        elif value.size and target.kind == 'f' and source.kind == 'f':
+            finite = value[numpy.isfinite(value)]
+            if finite.size and numpy.abs(finite).max() > numpy.finfo(target).max:
+                raise ValueError("ARRAY value is out of range of column type.")
+    return numpy.ascontiguousarray(value, dtype=target)
+
+def _make_raw_decoder(unpacker, offset, converter):
+    """Returns function that decodes value at `offset` from copy of row buffer,
+    where value is moved by `shift` bytes towards the start of copy.
+    """
+    unpack_from = unpacker.unpack_from
+    if converter is None:
+        return lambda raw, shift: unpack_from(raw, offset - shift)[0]
+    return lambda raw, shift: converter(unpack_from(raw, offset - shift)[0])
+
+def _make_raw_varying_decoder(offset, charset):
+    """Returns function that decodes VARCHAR value at `offset` from copy of row
+    buffer, where value is moved by `shift` bytes towards the start of copy.
+    """
+    unpack_from = _VARYING_LENGTH_STRUCT.unpack_from
+    def decode(raw, shift):
+        start = offset - shift + 2
+        return raw[start:start + unpack_from(raw, offset - shift)[0]]
+    if charset:
+        return lambda raw, shift: decode(raw, shift).decode(charset, 'replace')
+    return decode
+
+def _make_scaled_converter(divisor):
+    "Returns converter for scaled integer (NUMERIC and DECIMAL) values."
+    Decimal = decimal.Decimal
+    return lambda value: Decimal(value) / divisor
+
+# Support for statements executed without prepare
+
+#: ID of pseudo character set that stands for character set of the attachment.
+_CS_DYNAMIC = 127
+#: Size of VARCHAR buffers for string and Decimal values returned by statements
+#: executed without prepare.
+_IMMEDIATE_VARYING_SIZE = 32765
+#: Statement types (first keywords) that could be executed by Cursor without prepare.
+_IMMEDIATE_DML = ('INSERT', 'UPDATE', 'DELETE', 'MERGE')
+#: First keywords of statements that may change metadata. EXECUTE BLOCK and
+#: EXECUTE PROCEDURE are included, as they may execute DDL by EXECUTE STATEMENT.
+_DDL_KEYWORDS = ('CREATE', 'ALTER', 'DROP', 'RECREATE', 'COMMENT', 'GRANT', 'REVOKE',
+                 'SET', 'DECLARE', 'EXECUTE')
+
+def _first_keyword(sql):
+    "Returns the first word of `sql` (in uppercase) that isn't part of comment."
+    i = 0
+    length = len(sql)
+    while i < length:
+        if sql[i].isspace():
+            i += 1
+        elif sql.startswith('--', i):
+            end = sql.find('\n', i)
+            i = length if end < 0 else end + 1
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = length if end < 0 else end + 2
+        else:
+            words = sql[i:].split(None, 1)
+            return words[0].split('(', 1)[0].upper()
+    return ''
+
+def _is_immediate_dml(sql):
+    "Returns True if `sql` is DML statement that does not return any values."
+    return _first_keyword(sql) in _IMMEDIATE_DML and 'RETURNING' not in sql.upper()
+
+def _may_change_metadata(sql):
+    "Returns True if `sql` starts with keyword of statement that may change metadata."
+    return _first_keyword(sql) in _DDL_KEYWORDS
+
+def _new_sqlvar_buffer(sqlvar, sqltype, data, is_null=False):
+    """Sets `sqlvar` to describe value stored in `data`, and returns tuple with
+    buffers that must be kept alive while `sqlvar` is used.
+    """
+    buf = ctypes.create_string_buffer(data, len(data))
+    indicator = ISC_SHORT(-1 if is_null else 0)
+    sqlvar.sqltype = sqltype | 1
+    sqlvar.sqllen = len(data)
+    sqlvar.sqldata = ctypes.cast(buf, buf_pointer)
+    sqlvar.sqlind = ctypes.pointer(indicator)
+    return (buf, indicator)
+
+def _make_varying_output_converter(buf, converter):
+    "Returns function that returns VARCHAR value from `buf` (passed through `converter`)."
+    def convert():
+        value = buf.raw[2:2 + _VARYING_LENGTH_STRUCT.unpack_from(buf)[0]]
+        return value if converter is None else converter(value)
+    return convert
+
+def _make_fixed_output_converter(buf, unpacker, converter):
+    "Returns function that returns value unpacked from `buf` (passed through `converter`)."
+    def convert():
+        value = unpacker.unpack_from(buf)[0]
+        return value if converter is None else converter(value)
+    return convert
+
+# Support for batched execution of DML statements via EXECUTE BLOCK
+
+#: Max. size (in bytes) of EXECUTE BLOCK statement text and of its input message.
+_EXECUTE_BLOCK_MAX_SIZE = 65535
+#: Max. number of EXECUTE BLOCK parameters (each one takes two message fields).
+_EXECUTE_BLOCK_MAX_PARAMS = SHRT_MAX // 2
+#: Max. number of EXECUTE BLOCK templates kept per connection.
+_EXECUTE_BLOCK_CACHE_SIZE = 50
+#: Types of statements that could be batched into EXECUTE BLOCK.
+_EXECUTE_BLOCK_STATEMENTS = (isc_info_sql_stmt_insert, isc_info_sql_stmt_update,
+                             isc_info_sql_stmt_delete)
+#: Declarations of EXECUTE BLOCK parameters of fixed-size SQL types.
+_EXECUTE_BLOCK_TYPES = {SQL_SHORT: 'SMALLINT', SQL_LONG: 'INTEGER', SQL_INT64: 'BIGINT',
+                        SQL_FLOAT: 'FLOAT', SQL_DOUBLE: 'DOUBLE PRECISION',
+                        SQL_D_FLOAT: 'DOUBLE PRECISION', SQL_TYPE_DATE: 'DATE',
+                        SQL_TYPE_TIME: 'TIME', SQL_TIMESTAMP: 'TIMESTAMP',
+                        SQL_BOOLEAN: 'BOOLEAN'}
+
+def _split_sql_placeholders(sql):
+    """Returns list of `sql` parts separated by `?` parameter placeholders.
+    Question marks in string literals, quoted identifiers and comments are ignored.
+    """
+    parts = []
+    start = i = 0
+    length = len(sql)
+    while i < length:
+        char = sql[i]
+        if char in '\'"':
+            end = sql.find(char, i + 1)
+            i = length if end < 0 else end + 1
+        elif sql.startswith('--', i):
+            end = sql.find('\n', i)
+            i = length if end < 0 else end + 1
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = length if end < 0 else end + 2
+        elif char == '?':
+            parts.append(sql[start:i])
+            i += 1
+            start = i
+        else:
+            i += 1
+    parts.append(sql[start:])
+    return parts
+
+def _block_parameter_type(sqlvar, charset):
+    """Returns tuple with declaration of EXECUTE BLOCK parameter for value described
+    by `sqlvar` and max. size of its value in bytes, or None if type is not supported.
+    """
+    vartype = sqlvar.sqltype & ~1
+    if vartype in (SQL_TEXT, SQL_VARYING):
+        charset_id = sqlvar.sqlsubtype & 0xFF
+        if charset_id == 1:
+            return ('VARCHAR(%d) CHARACTER SET OCTETS' % max(sqlvar.sqllen, 1),
+                    sqlvar.sqllen + 2)
+        if charset is None:
+            # Values are passed as bytes, so length of column in bytes is used
+            return ('VARCHAR(%d) CHARACTER SET NONE' % max(sqlvar.sqllen, 1),
+                    sqlvar.sqllen + 2)
+        if charset_id in (4, 69):  # UTF8 and GB18030
+            length = sqlvar.sqllen // 4
+        elif charset_id == 3:  # UNICODE_FSS
+            length = sqlvar.sqllen // 3
+        else:
+            length = sqlvar.sqllen
+        length = max(length, 1)
+        if charset in ('UTF8', 'GB18030'):
+            size = length * 4
+        elif charset == 'UNICODE_FSS':
+            size = length * 3
+        else:
+            size = length * 2
+        return ('VARCHAR(%d) CHARACTER SET %s' % (length, charset), size + 2)
+    if vartype in (SQL_SHORT, SQL_LONG, SQL_INT64) and sqlvar.sqlscale:
+        return ('%s(%d,%d)' % ('DECIMAL' if sqlvar.sqlsubtype == SUBTYPE_DECIMAL else 'NUMERIC',
+                               _INTEGER_DIGITS[vartype] - 1, -sqlvar.sqlscale),
+                sqlvar.sqllen)
+    if vartype == SQL_BLOB:
+        if sqlvar.sqlsubtype == 1:
+            return ('BLOB SUB_TYPE 1 CHARACTER SET %s' % (charset or 'NONE'), 8)
+        return ('BLOB SUB_TYPE %d' % sqlvar.sqlsubtype, 8)
+    if vartype in _EXECUTE_BLOCK_TYPES:
+        return (_EXECUTE_BLOCK_TYPES[vartype], sqlvar.sqllen)
+    return None
+
+class _ExecuteBlockTemplate(object):
+    """An internal class that generates EXECUTE BLOCK statements, which execute
+    DML statement for several parameter sets at once. Used by :meth:`Cursor.executemany`.
+
+    Args:
+        sql (str): DML statement.
+        parts (list): Parts of `sql` separated by parameter placeholders.
+        types (list): Declarations of parameters.
+        row_size (int): Max. size of input message for one parameter set.
+        python_charset (str): Python codec used to encode statements.
+    """
+    def __init__(self, sql, parts, types, row_size, python_charset):
+        #: str: DML statement.
+        self.sql = sql
+        #: int: Number of parameters of DML statement.
+        self.n_params = len(types)
+        self.__parts = parts
+        self.__types = types
+        self.__blocks = {}
+        # Max. number of parameter sets in one block is limited by size of input
+        # message, statement text and number of parameters.
+        sample = len(b(self.__declarations(99999) + self.__statements(99999),
+                       python_charset))
+        header = len(self.__make_block(0))
+        #: int: Max. number of parameter sets that could be passed to single block.
+        self.max_rows = min(_EXECUTE_BLOCK_MAX_SIZE // row_size,
+                            (_EXECUTE_BLOCK_MAX_SIZE - header) // sample,
+                            _EXECUTE_BLOCK_MAX_PARAMS // self.n_params)
+    def __declarations(self, row):
+        return ''.join([', p%d_%d %s = ?' % (row, i, decl)
+                        for i, decl in enumerate(self.__types)])
+    def __statements(self, row):
+        parts = self.__parts
+        result = [parts[0]]
+        for i in xrange(self.n_params):
+            result.append(':p%d_%d' % (row, i))
+            result.append(parts[i + 1])
+        # Terminator is on separate line, as statement could end with line comment
+        result.append('\n;\n')
+        return ''.join(result)
+    def __make_block(self, rows):
+        return 'EXECUTE BLOCK (%s)\nAS\nBEGIN\n%sEND' % (
+            ''.join([self.__declarations(row) for row in xrange(rows)])[2:],
+            ''.join([self.__statements(row) for row in xrange(rows)]))
+    def get_block(self, rows):
+        """Returns EXECUTE BLOCK statement for specified number of parameter sets.
+
+        Args:
+            rows (int): Number of parameter sets.
+        """
+        block = self.__blocks.get(rows)
+        if block is None:
+            block = self.__blocks[rows] = self.__make_block(rows)
+        return block
+
+def _make_execute_block_template(statement, charset, python_charset):
+    """Returns :class:`_ExecuteBlockTemplate` for prepared DML statement, or None
+    if statement could not be batched into EXECUTE BLOCK.
+    """
+    if ((statement.statement_type not in _EXECUTE_BLOCK_STATEMENTS) or
+            (statement.n_output_params > 0) or (statement.n_input_params == 0)):
+        return None
+    parts = _split_sql_placeholders(statement.sql.strip().rstrip(';'))
+    if len(parts) != statement.n_input_params + 1:
+        return None
+    types = []
+    row_size = 0
+    for sqlvar in statement._in_sqlda.sqlvar[:statement.n_input_params]:
+        declaration = _block_parameter_type(sqlvar, charset)
+        if declaration is None:
+            return None
+        types.append(declaration[0])
+        # Value aligned to 8 bytes, plus NULL indicator
+        row_size += ((declaration[1] + 7) & ~7) + 8
+    template = _ExecuteBlockTemplate(statement.sql, parts, types, row_size, python_charset)
+    return template if template.max_rows > 1 else None
+
+# Support for batched execution of DML statements via Firebird 4 IBatch interface
+
+#: Max. size (in bytes) of parameter data passed to single IBatch execution.
+_BATCH_BUFFER_SIZE = 8 * 1024 * 1024
+#: Max. number of parameter sets passed to server in single IBatch add() call.
+_BATCH_ADD_ROWS = 1000
+#: Types of statements that could be executed via IBatch.
+_BATCH_STATEMENTS = _EXECUTE_BLOCK_STATEMENTS + (isc_info_sql_stmt_exec_procedure,)
+#: Types of parameters supported by IBatch execution.
+_BATCH_TYPES = (SQL_TEXT, SQL_VARYING, SQL_SHORT, SQL_LONG, SQL_INT64, SQL_FLOAT,
+                SQL_DOUBLE, SQL_D_FLOAT, SQL_TYPE_DATE, SQL_TYPE_TIME, SQL_TIMESTAMP,
+                SQL_BOOLEAN, SQL_BLOB)
+
+def _batch_supported(connection):
+    "Returns True if statements could be executed via IBatch on `connection`."
+    return (connection.engine_version >= 4.0 and
+            getattr(api, 'fb_get_statement_interface', None) is not None)
+
+class _StatementBatch(object):
+    """An internal class that executes prepared DML statement for many parameter
+    sets using Firebird 4 IBatch interface. Used by :meth:`Cursor.executebatch`.
+
+    Parameter values are converted to statement input XSQLDA by the same code
+    that is used for single statement execution, and copied from there into
+    batch messages.
+
+    Args:
+        statement (PreparedStatement): Prepared DML statement.
+        transaction (Transaction): Transaction used for execution.
+    """
+    def __init__(self, statement, transaction):
+        self.__statement = statement
+        self.__transaction = transaction
+        self.__isc_status = ISC_STATUS_ARRAY()
+        self.__master = api.fb_get_master_interface()
+        self.__status = ibase.oo_vtable(self.__master, ibase.IMaster_VTable).getStatus(self.__master)
+        self.__status_vt = ibase.oo_vtable(self.__status, ibase.IStatus_VTable)
+        self.__istatement = None
+        self.__batch = None
+        self.__metadata = None
+        self.__buffer = None
+        self.__rows = 0
+        self.__pending = 0
+        #: bool: False if statement could not be executed via IBatch.
+        self.supported = False
+        #: list: Number of rows affected by each executed parameter set.
+        self.counts = []
+        try:
+            self.__create()
+        except:
+            self.close()
+            raise
+    def __check(self, preamble):
+        if self.__status_vt.getState(self.__status) & ibase.IStatus_STATE_ERRORS:
+            raise self.__error(self.__status, preamble)
+    def __error(self, status, preamble):
+        "Returns DatabaseError for errors stored in IStatus `status`."
+        status_vt = ibase.oo_vtable(status, ibase.IStatus_VTable)
+        errors = ctypes.cast(status_vt.getErrors(status), ctypes.POINTER(ISC_STATUS))
+        vector = self.__isc_status
+        i = 0
+        while errors[i] != ibase.isc_arg_end:
+            size = 3 if errors[i] == ibase.isc_arg_cstring else 2
+            if i + size >= len(vector):
+                break
+            for j in xrange(i, i + size):
+                vector[j] = errors[j]
+            i += size
+        vector[i] = ibase.isc_arg_end
+        error = exception_from_status(DatabaseError, vector, preamble)
+        status_vt.init(status)
+        return error
+    def __create(self):
+        statement = self.__statement
+        sqlvars = statement._in_sqlda.sqlvar[:statement.n_input_params]
+        if ((statement.statement_type not in _BATCH_STATEMENTS) or
+                (statement.n_output_params > 0) or (statement.n_input_params == 0) or
+                [sqlvar for sqlvar in sqlvars if sqlvar.sqltype & ~1 not in _BATCH_TYPES]):
+            return
+        istatement = ctypes.c_void_p()
+        api.fb_get_statement_interface(self.__isc_status, ctypes.byref(istatement),
+                                       statement._stmt_handle)
+        if db_api_error(self.__isc_status):
+            raise exception_from_status(DatabaseError, self.__isc_status,
+                                        "Error while getting statement interface:")
+        self.__istatement = istatement.value
+        statement_vt = ibase.oo_vtable(self.__istatement, ibase.IStatement_VTable)
+        if statement_vt.version < ibase.IStatement_VERSION_BATCH:
+            return
+        # Batch parameters block
+        tags = [(ibase.IBatch_TAG_RECORD_COUNTS, 1)]
+        if [sqlvar for sqlvar in sqlvars if sqlvar.sqltype & ~1 == SQL_BLOB]:
+            tags.append((ibase.IBatch_TAG_BLOB_POLICY, ibase.IBatch_BLOB_ID_ENGINE))
+        bpb = bs([ibase.IBatch_VERSION1]) + b('').join([struct.pack('<BIi', tag, 4, value)
+                                                         for tag, value in tags])
+        self.__batch = statement_vt.createBatch(self.__istatement, self.__status, None,
+                                                len(bpb), bpb)
+        self.__check("Error while creating batch:")
+        self.__batch_vt = ibase.oo_vtable(self.__batch, ibase.IBatch_VTable)
+        self.__metadata = self.__batch_vt.getMetadata(self.__batch, self.__status)
+        self.__check("Error while getting batch metadata:")
+        metadata = self.__metadata
+        metadata_vt = ibase.oo_vtable(metadata, ibase.IMessageMetadata_VTable)
+        status = self.__status
+        self.__fields = []
+        for i, sqlvar in enumerate(sqlvars):
+            vartype = metadata_vt.getType(metadata, status, i) & ~1
+            length = metadata_vt.getLength(metadata, status, i)
+            offset = metadata_vt.getOffset(metadata, status, i)
+            null_offset = metadata_vt.getNullOffset(metadata, status, i)
+            pad = b('\0') if metadata_vt.getCharSet(metadata, status, i) == 1 else b(' ')
+            self.__check("Error while getting batch metadata:")
+            self.__fields.append((sqlvar, vartype, length, offset, null_offset, pad))
+        self.__message_length = metadata_vt.getAlignedLength(metadata, status)
+        self.__check("Error while getting batch metadata:")
+        # Indexes of parameters that need server-side conversion from strings
+        self.__strict = [i for i, field in enumerate(self.__fields)
+                         if field[1] not in (SQL_TEXT, SQL_VARYING, SQL_BLOB)]
+        self.__max_rows = max(1, _BATCH_BUFFER_SIZE // self.__message_length)
+        self.__buffer = ctypes.create_string_buffer(
+            self.__message_length * min(self.__max_rows, _BATCH_ADD_ROWS))
+        self.supported = True
+    def __encode(self, address):
+        "Copies bound values of input parameters to message at `address`."
+        status = self.__status
+        for sqlvar, vartype, length, offset, null_offset, pad in self.__fields:
+            if sqlvar.sqlind[0]:
+                ctypes.c_short.from_address(address + null_offset).value = -1
+                continue
+            ctypes.c_short.from_address(address + null_offset).value = 0
+            value_address = address + offset
+            if vartype == SQL_VARYING:
+                # Input binder passes all strings as SQL_TEXT
+                size = sqlvar.sqllen
+                if size > length:
+                    raise ValueError("Value of parameter is too long,"
+                                     " expected %i, found %i" % (length, size))
+                ctypes.c_ushort.from_address(value_address).value = size
+                ctypes.memmove(value_address + 2, sqlvar.sqldata, size)
+            elif vartype == SQL_TEXT:
+                size = sqlvar.sqllen
+                if size > length:
+                    raise ValueError("Value of parameter is too long,"
+                                     " expected %i, found %i" % (length, size))
+                ctypes.memmove(value_address, sqlvar.sqldata, size)
+                ctypes.memmove(value_address + size, pad * (length - size), length - size)
+            elif vartype == SQL_BLOB:
+                # BLOB was created by input binder, batch needs its own BLOB ID
+                self.__batch_vt.registerBlob(self.__batch, status,
+                                             ctypes.cast(sqlvar.sqldata, ctypes.POINTER(ISC_QUAD)),
+                                             ctypes.cast(value_address, ctypes.POINTER(ISC_QUAD)))
+                self.__check("Error while registering BLOB in batch:")
+            else:
+                ctypes.memmove(value_address, sqlvar.sqldata, length)
+    def add(self, parameters):
+        """Adds parameter set to batch. Batch is executed when it's full.
+
+        Args:
+            parameters (list or tuple): Values of statement parameters.
+        """
+        statement = self.__statement
+        if not isinstance(parameters, (ListType, TupleType)):
+            raise TypeError("parameters must be list or tuple")
+        if len(parameters) != statement.n_input_params:
+            raise ProgrammingError("Statement parameter sequence contains"
+                                   " %d parameters, but %d are required" %
+                                   (len(parameters), statement.n_input_params))
+        for i in self.__strict:
+            if isinstance(parameters[i], (StringType, UnicodeType)):
+                # String value passed for non-text parameter is converted by
+                # server, so this parameter set must be executed separately.
+                self.execute()
+                statement._execute(parameters)
+                self.counts.append(statement.rowcount)
+                return
+        statement._bind(parameters)
+        self.__encode(ctypes.addressof(self.__buffer) + self.__rows * self.__message_length)
+        self.__rows += 1
+        if self.__rows * self.__message_length == len(self.__buffer):
+            self.__flush()
+        if self.__pending >= self.__max_rows:
+            self.execute()
+    def __flush(self):
+        "Passes messages from buffer to batch."
+        if self.__rows:
+            self.__batch_vt.add(self.__batch, self.__status, self.__rows, self.__buffer)
+            self.__check("Error while adding messages to batch:")
+            self.__pending += self.__rows
+            self.__rows = 0
+    def execute(self):
+        """Executes parameter sets added to batch, and appends number of affected
+        rows for each one to :attr:`counts`.
+
+        Raises:
+            fdb.DatabaseError: When error is returned by server. Parameter sets
+                preceding the failed one remain executed.
+        """
+        self.__flush()
+        if not self.__pending:
+            return
+        transaction = ctypes.c_void_p()
+        api.fb_get_transaction_interface(self.__isc_status, ctypes.byref(transaction),
+                                         self.__transaction._tr_handle)
+        if db_api_error(self.__isc_status):
+            raise exception_from_status(DatabaseError, self.__isc_status,
+                                        "Error while getting transaction interface:")
+        trace = hooks.get(HOOK_STATEMENT_EXECUTED)
+        if trace:
+            start = _hook_timer()
+        try:
+            state = self.__batch_vt.execute(self.__batch, self.__status, transaction.value)
+        finally:
+            ibase.oo_vtable(transaction.value,
+                            ibase.IReferenceCounted_VTable).release(transaction.value)
+        self.__check("Error while executing batch:")
+        if trace:
+            elapsed = _hook_timer() - start
+            for hook in trace:
+                hook(self.__statement, elapsed, None)
+        first = len(self.counts)
+        self.__pending = 0
+        state_vt = ibase.oo_vtable(state, ibase.IBatchCompletionState_VTable)
+        try:
+            status = self.__status
+            for i in xrange(state_vt.getSize(state, status)):
+                self.counts.append(state_vt.getState(state, status, i))
+            position = state_vt.findError(state, status, 0)
+            if position != ibase.IBatchCompletionState_NO_MORE_ERRORS:
+                error_status = ibase.oo_vtable(self.__master,
+                                               ibase.IMaster_VTable).getStatus(self.__master)
+                try:
+                    state_vt.getStatus(state, status, error_status, position)
+                    raise self.__error(error_status,
+                                       "Error while executing batch (parameter set %d):"
+                                       % (first + position))
+                finally:
+                    ibase.oo_vtable(error_status, ibase.IStatus_VTable).dispose(error_status)
+        finally:
+            state_vt.dispose(state)
+    def close(self):
+        "Releases batch and all interfaces used by it."
+        for iface, vtable in ((self.__metadata, ibase.IMessageMetadata_VTable),
+                              (self.__batch, ibase.IBatch_VTable),
+                              (self.__istatement, ibase.IStatement_VTable)):
+            if iface:
+                ibase.oo_vtable(iface, vtable).release(iface)
+        self.__metadata = self.__batch = self.__istatement = None
+        if self.__status:
+            self.__status_vt.dispose(self.__status)
+            self.__status = None
+
 def db_api_error(status_vector):
     return status_vector[0] == 1 and status_vector[1] > 0
 
@@ -707,7 +1490,8 @@ def connect(dsn='', user=None, password=None, host=None, port=None, database=Non
             force_write=None, no_reserve=None, db_key_scope=None,
             isolation_level=ISOLATION_LEVEL_READ_COMMITED,
             connection_class=None, fb_library_name=None,
-            no_gc=None, no_db_triggers=None, no_linger=None, utf8params=False):
+            no_gc=None, no_db_triggers=None, no_linger=None, utf8params=False,
+            statement_cache_size=None, statement_handle_pool_size=None):
     """Establish a connection to database.
 
     Keyword Args:
@@ -731,6 +1515,12 @@ def connect(dsn='', user=None, password=None, host=None, port=None, database=Non
         no_db_triggers (int): No database triggers flag (FB 2.1).
         no_linger (int): No linger flag (FB3).
         utf8params (bool): Notify server that database specification and other string parameters are in UTF-8.
+        statement_cache_size (int): Max. number of prepared statements kept in connection's
+            :attr:`~Connection.statement_cache`. Zero disables the cache. If not specified,
+            `DEFAULT_STATEMENT_CACHE_SIZE` is used.
+        statement_handle_pool_size (int): Max. number of idle statement handles kept in
+            connection's :attr:`~Connection.statement_handle_pool`. Zero disables the pool.
+            If not specified, `DEFAULT_STATEMENT_HANDLE_POOL_SIZE` is used.
 
     Returns:
         :class:`Connection`: attached database.
@@ -871,6 +1661,10 @@ def connect(dsn='', user=None, password=None, host=None, port=None, database=Non
 
         con = connection_class(_db_handle, dpbuf, sql_dialect,
                                charset, isolation_level)
+        if statement_cache_size is not None:
+            con.statement_cache.size = statement_cache_size
+        if statement_handle_pool_size is not None:
+            con.statement_handle_pool.size = statement_handle_pool_size
     #
     for hook in get_hooks(HOOK_DATABASE_ATTACHED):
         hook(con)
@@ -990,7 +1784,7 @@ def create_database(sql='', sql_dialect=3, dsn='', user=None, password=None,
 
     con = connection_class(db_handle, sql_dialect=sql_dialect, charset=charset)
     for hook in get_hooks(HOOK_DATABASE_ATTACHED):
-        hook(HOOK_DATABASE_ATTACHED, con)
+        hook(con)
     return con
 
 class _cursor_weakref_callback(object):
@@ -1090,14 +1884,21 @@ class Connection(object):
         self._python_charset = charset_map.get(self.charset, self.charset)
 
         self._default_tpb = isolation_level
+        # Cache of prepared statements used by Cursor.execute
+        self._statement_cache = _StatementCache(self)
+        # Pool of allocated statement handles recycled by PreparedStatement
+        self._statement_handle_pool = _StatementHandlePool(self)
         # Main transaction
         self._main_transaction = Transaction([self], default_tpb=self._default_tpb)
         # ReadOnly ReadCommitted transaction
         self._query_transaction = Transaction([self],
                                               default_tpb=ISOLATION_LEVEL_READ_COMMITED_RO)
         self._transactions = [self._main_transaction, self._query_transaction]
-        self.__precision_cache = {}
-        self.__sqlsubtype_cache = {}
+        # Precision and subtype of fields (could be shared by connections to the same database)
+        self._metadata_cache = _FieldMetadataCache()
+        self._array_desc_cache = {}
+        # EXECUTE BLOCK templates used by Cursor.executemany, by DML statement
+        self._execute_block_cache = collections.OrderedDict()
         self.__conduits = []
         self.__group = None
         self.__schema = None
@@ -1151,9 +1952,15 @@ class Connection(object):
                 for transaction in self._transactions:
                     transaction.default_action = 'rollback' # Required by Python DB API 2.0
                     transaction.close()
+                self._statement_cache.clear()
+                # Detach (or drop) of database releases all statement handles
+                self._statement_handle_pool.clear(drop=False)
                 if detach:
                     api.isc_detach_database(self._isc_status, self._db_handle)
             finally:
+                if _handle_tracker is not None:
+                    # Detach (or drop) of database releases all its handles
+                    _handle_tracker._release_database(self._db_handle.value)
                 self._db_handle = None
                 for hook in get_hooks(HOOK_DATABASE_CLOSED):
                     hook(self)
@@ -1252,6 +2059,10 @@ class Connection(object):
         return self.db_info(isc_info_oldest_snapshot)
     def __get_next_transaction(self):
         return self.db_info(isc_info_next_transaction)
+    def __get_statement_cache(self):
+        return self._statement_cache
+    def __get_statement_handle_pool(self):
+        return self._statement_handle_pool
 
     def __parse_date(self, raw_value):
         "Convert raw data to datetime.date"
@@ -1299,23 +2110,71 @@ class Connection(object):
                 raise ProgrammingError("Monitoring tables are available only " \
                                        "for databases with ODS 11.1 and higher.")
         return self.__monitor
+    def _load_field_metadata(self, relations):
+        """Loads precision and subtype of all fields of given relations (tables,
+        views or stored procedures with output parameters) that are not loaded
+        yet into metadata cache. Uses single query for all tables and views, and
+        another one for stored procedures (only when necessary).
+
+        Args:
+            relations (iterable): Relation names.
+        """
+        cache = self._metadata_cache
+        names = [name for name in set(relations) if not cache.is_loaded(name)]
+        if not names:
+            return
+        fields = dict((name, {}) for name in names)
+        for sql in (_LOAD_RELATION_FIELDS_SQL, _LOAD_PROCEDURE_FIELDS_SQL):
+            pending = [name for name in names if not fields[name]]
+            if not pending:
+                break
+            self.__ic.execute(sql % ','.join('?' * len(pending)), pending)
+            for relation, field, precision, subtype in self.__ic.fetchall():
+                fields[relation.rstrip()][field.rstrip()] = (precision, subtype)
+            self.__ic.close()
+        cache.update(fields)
     def _get_array_sqlsubtype(self, relation, column):
-        subtype = self.__sqlsubtype_cache.get((relation, column))
-        if subtype is not None:
-            return subtype
-        self.__ic.execute("SELECT FIELD_SPEC.RDB$FIELD_SUB_TYPE"
-                          " FROM RDB$FIELDS FIELD_SPEC, RDB$RELATION_FIELDS REL_FIELDS"
-                          " WHERE"
-                          " FIELD_SPEC.RDB$FIELD_NAME = REL_FIELDS.RDB$FIELD_SOURCE"
-                          " AND REL_FIELDS.RDB$RELATION_NAME = ?"
-                          " AND REL_FIELDS.RDB$FIELD_NAME = ?",
-                          (p3fix(relation, self._python_charset),
-                           p3fix(column, self._python_charset)))
-        result = self.__ic.fetchone()
-        self.__ic.close()
-        if result:
-            self.__sqlsubtype_cache[(relation, column)] = result[0]
-            return result[0]
+        relation = p3fix(relation, self._python_charset)
+        self._load_field_metadata([relation])
+        item = self._metadata_cache.get(relation, p3fix(column, self._python_charset))
+        if item:
+            return item[1]
+    def _get_array_desc(self, relation, column, tr_handle):
+        """Returns (and caches) :class:`_ArrayDescriptor` for ARRAY column.
+        """
+        descriptor = self._array_desc_cache.get((relation, column))
+        if descriptor is None:
+            arraydesc = ISC_ARRAY_DESC(0)
+            api.isc_array_lookup_bounds(self._isc_status, self._db_handle, tr_handle,
+                                        relation, column, arraydesc)
+            if db_api_error(self._isc_status):
+                raise exception_from_status(DatabaseError, self._isc_status,
+                                            "Connection._get_array_desc/isc_array_lookup_bounds:")
+            descriptor = _ArrayDescriptor(arraydesc, self._get_array_sqlsubtype(relation, column))
+            self._array_desc_cache[(relation, column)] = descriptor
+        return descriptor
+    def _get_execute_block(self, sql, cursor):
+        """Returns :class:`_ExecuteBlockTemplate` for DML statement, or None if
+        statement could not be batched into EXECUTE BLOCK. Templates are cached.
+
+        Args:
+            sql (str): DML statement.
+            cursor (:class:`Cursor`): Cursor used to prepare the statement.
+        """
+        cache = self._execute_block_cache
+        if sql in cache:
+            template = cache.pop(sql)
+        else:
+            statement = cursor.prep(sql)
+            try:
+                template = _make_execute_block_template(statement, self.charset,
+                                                        self._python_charset)
+            finally:
+                statement._close()
+        cache[sql] = template
+        if len(cache) > _EXECUTE_BLOCK_CACHE_SIZE:
+            cache.popitem(last=False)
+        return template
     def _determine_field_precision(self, sqlvar):
         if sqlvar.relname_length == 0 or sqlvar.sqlname_length == 0:
             # Either or both field name and relation name are not provided,
@@ -1326,43 +2185,12 @@ class Connection(object):
         if ((sqlvar.sqlname_length == 6 and sqlvar.sqlname == 'DB_KEY') or
             (sqlvar.sqlname_length == 10 and sqlvar.sqlname == 'RDB$DB_KEY')):
             return 0
-        precision = self.__precision_cache.get((sqlvar.relname,
-                                                sqlvar.sqlname))
-        if precision is not None:
-            return precision
-        # First, try table
-        self.__ic.execute("SELECT FIELD_SPEC.RDB$FIELD_PRECISION"
-                          " FROM RDB$FIELDS FIELD_SPEC,"
-                          " RDB$RELATION_FIELDS REL_FIELDS"
-                          " WHERE"
-                          " FIELD_SPEC.RDB$FIELD_NAME ="
-                          " REL_FIELDS.RDB$FIELD_SOURCE"
-                          " AND REL_FIELDS.RDB$RELATION_NAME = ?"
-                          " AND REL_FIELDS.RDB$FIELD_NAME = ?",
-                          (p3fix(sqlvar.relname, self._python_charset),
-                           p3fix(sqlvar.sqlname, self._python_charset)))
-        result = self.__ic.fetchone()
-        self.__ic.close()
-        if result:
-            self.__precision_cache[(sqlvar.relname, sqlvar.sqlname)] = result[0]
-            return result[0]
-        # Next, try stored procedure output parameter
-        self.__ic.execute("SELECT FIELD_SPEC.RDB$FIELD_PRECISION"
-                          " FROM RDB$FIELDS FIELD_SPEC,"
-                          " RDB$PROCEDURE_PARAMETERS REL_FIELDS"
-                          " WHERE"
-                          " FIELD_SPEC.RDB$FIELD_NAME ="
-                          " REL_FIELDS.RDB$FIELD_SOURCE"
-                          " AND RDB$PROCEDURE_NAME = ?"
-                          " AND RDB$PARAMETER_NAME = ?"
-                          " AND RDB$PARAMETER_TYPE = 1",
-                          (p3fix(sqlvar.relname, self._python_charset),
-                           p3fix(sqlvar.sqlname, self._python_charset)))
-        result = self.__ic.fetchone()
-        self.__ic.close()
-        if result:
-            self.__precision_cache[(sqlvar.relname, sqlvar.sqlname)] = result[0]
-            return result[0]
+        relation = p3fix(sqlvar.relname, self._python_charset)
+        # Table (or view) field, or stored procedure output parameter
+        self._load_field_metadata([relation])
+        item = self._metadata_cache.get(relation, p3fix(sqlvar.sqlname, self._python_charset))
+        if item:
+            return item[0]
         # We ran out of options
         return 0
     def drop_database(self):
@@ -1384,15 +2212,28 @@ class Connection(object):
             self._db_handle = saved_handle
             raise exception_from_status(DatabaseError, self._isc_status,
                                         "Error while dropping database:")
-    def execute_immediate(self, sql):
+    def execute_immediate(self, sql, parameters=None, returning=None):
         """Executes a statement in context of :attr:`main_transaction` without
         caching its prepared form.
 
         Automatically starts transaction if it's not already started.
 
+        Statement with `parameters` (or `returning`) is executed without prepare
+        in single API call. See :meth:`Transaction.execute_immediate` for details.
+
         Args:
             sql (str): SQL statement to execute.
 
+        Keyword Args:
+            parameters (list or tuple): Sequence of parameters. Must contain one
+                entry for each argument that the statement expects.
+            returning (list or tuple): Sequence of Python types of values returned
+                by singleton statement (for example by `RETURNING` clause).
+
+        Returns:
+            Tuple with values returned by statement when `returning` is specified,
+            otherwise None.
+
         .. important::
 
            **The statement must not be of a type that returns a result set.**
@@ -1406,7 +2247,7 @@ class Connection(object):
             fdb.DatabaseError: When error is returned from server.
         """
         self.__check_attached()
-        self.main_transaction.execute_immediate(sql)
+        return self.main_transaction.execute_immediate(sql, parameters, returning)
     def database_info(self, info_code, result_type, page_number=None):
         """Wraps the Firebird C API function `isc_database_info`.
 
@@ -1884,6 +2725,33 @@ class Connection(object):
             for table, count in stat.items():
                 tables.setdefault(table, _TableAccessStats(table))._set_info(info_code, count)
         return list(tables.values())
+    def profile(self):
+        """Returns context manager that collects server-side execution statistics
+        for statements executed on this connection while it's active.
+
+        For each statement execution it records number of processed records,
+        differences of :attr:`io_stats` counters and of table access counters
+        (see :meth:`get_table_access_stats`), execution plan and time spent in
+        execution and fetch.
+
+        Example::
+
+            with con.profile() as profile:
+                cur.execute('select * from country')
+                cur.fetchall()
+            for stmt in profile.statements:
+                print(stmt.sql, stmt.plan, stmt.sequential_reads)
+
+        Returns:
+            :class:`~fdb.fbcore._StatementProfiler` instance.
+
+        Note:
+           Counters are maintained by server for whole attachment. Work done
+           between completion of two profiled statements (for example by
+           statements executed via :meth:`execute_immediate`) is attributed to
+           the later one.
+        """
+        return _StatementProfiler(self)
 
 
     #: int: (R/O) Internal ID (server-side) for connection.
@@ -1974,6 +2842,12 @@ class Connection(object):
     ost = property(__get_ost)
     #: int: (R/O) ID of Next Transaction.
     next_transaction = property(__get_next_transaction)
+    #: :class:`~fdb.fbcore._StatementCache`: (R/O) Cache of prepared statements
+    #: created by :meth:`Cursor.execute` for SQL command strings.
+    statement_cache = property(__get_statement_cache)
+    #: :class:`~fdb.fbcore._StatementHandlePool`: (R/O) Pool of allocated statement
+    #: handles recycled by :class:`PreparedStatement` instances.
+    statement_handle_pool = property(__get_statement_handle_pool)
 
     #: :class:`~fdb.monitor.Monitor`: Database monitoring object.
     monitor = utils.LateBindingProperty(_get_monitor)
@@ -2278,32 +3152,41 @@ class PreparedStatement(object):
         self._out_sqlda = xsqlda_factory(10)
         # Internal XSQLDA structure for input values.
         self._in_sqlda = xsqlda_factory(10)
-        # Internal list to save original input SQLDA structures when they has
-        # to temporarily augmented.
-        self._in_sqlda_save = []
         # (integer) An integer code that can be matched against the statement
         # type constants in the isc_info_sql_stmt_* series.
         self.statement_type = None
         self.__streamed_blobs = []
         self.__streamed_blob_treshold = 65536
         self.__blob_readers = []
+        # Reusable buffer and handles for materialized BLOBs
+        self.__blob_buffer = None
+        self.__blob_handle = isc_blob_handle()
+        self.__blob_segment_length = ctypes.c_ushort(0)
         self.__executed = False
         self.__prepared = False
         self.__closed = False
         self.__description = None
         self.__output_cache = None
+        self.__array_plan = None
+        self.__arrow_schema = None
+        self.__lazy_plan = None
+        self.__field_index = None
         self._last_fetch_status = ISC_STATUS(self.NO_FETCH_ATTEMPTED_YET)
         connection = self.cursor._connection
         self.__charset = connection.charset
         self.__python_charset = connection._python_charset
         self.__sql_dialect = connection.sql_dialect
-
-        # allocate statement handle
-        self._stmt_handle = isc_stmt_handle(0)
-        api.isc_dsql_allocate_statement(self._isc_status, connection._db_handle, self._stmt_handle)
-        if db_api_error(self._isc_status):
-            raise exception_from_status(DatabaseError, self._isc_status,
-                                        "Error while allocating SQL statement:")
+        # [elapsed, rows] of result set fetch, when HOOK_STATEMENT_FETCHED is installed
+        self.__fetch_stats = None
+        trace = hooks.get(HOOK_STATEMENT_PREPARED)
+        if trace:
+            start = _hook_timer()
+
+        # allocate statement handle (or take recycled one from connection's pool)
+        self._stmt_handle = connection._statement_handle_pool.get()
+        if _handle_tracker is not None:
+            _handle_tracker._register(HANDLE_STATEMENT, self._stmt_handle,
+                                      (connection._db_handle.value,), operation)
         # prepare statement
         op = b(operation, self.__python_charset)
         api.isc_dsql_prepare(self._isc_status, self.cursor._transaction._tr_handle,
@@ -2338,10 +3221,7 @@ class PreparedStatement(object):
                                             "Error while determining SQL statement parameters:")
         # The number of input parameters the statement requires.
         self.n_input_params = self._in_sqlda.sqld
-        # record original type and size information so it can be restored for
-        # subsequent executions (mind the implicit string conversions!)
-        for sqlvar in self._in_sqlda.sqlvar[:self.n_input_params]:
-            self._in_sqlda_save.append((sqlvar.sqltype, sqlvar.sqllen))
+        self.__compile_input_binder()
         # Init output XSQLDA
         api.isc_dsql_describe(self._isc_status, self._stmt_handle, self.__sql_dialect,
                               ctypes.cast(ctypes.pointer(self._out_sqlda), XSQLDA_PTR))
@@ -2360,8 +3240,15 @@ class PreparedStatement(object):
         self.__coerce_xsqlda(self._out_sqlda)
         self.__prepared = True
         self._name = None
+        if trace:
+            elapsed = _hook_timer() - start
+            for hook in trace:
+                hook(self, elapsed)
     def __cursor_deleted(self, obj):
         self.cursor = None
+    def _set_cursor(self, cursor):
+        # Binds internal PreparedStatement taken from statement cache to Cursor
+        self.cursor = weakref.proxy(cursor, _weakref_callback(self.__cursor_deleted))
     def __get_name(self):
         return self._name
     def __set_name(self, name):
@@ -2470,10 +3357,24 @@ class PreparedStatement(object):
             return 'SQL_BOOLEAN'
         else:
             return 'UNKNOWN'
+    def __needs_precision(self, sqlvar):
+        "Returns True if description of output field requires its precision."
+        vartype = sqlvar.sqltype & ~1
+        if vartype in (SQL_SHORT, SQL_LONG, SQL_INT64):
+            return bool(sqlvar.sqlsubtype or sqlvar.sqlscale)
+        elif vartype in (SQL_FLOAT, SQL_DOUBLE, SQL_D_FLOAT):
+            return self.__sql_dialect < 3 and bool(sqlvar.sqlscale)
+        return False
     def __get_description(self):
         if not self.__description:
             desc = []
             if self.__prepared and (self._out_sqlda.sqld > 0):
+                # Load precision of all fields that need it at once
+                relations = [p3fix(sqlvar.relname, self.__python_charset)
+                             for sqlvar in self._out_sqlda.sqlvar[:self._out_sqlda.sqld]
+                             if sqlvar.relname_length and self.__needs_precision(sqlvar)]
+                if relations:
+                    self.cursor._connection._load_field_metadata(relations)
                 for sqlvar in self._out_sqlda.sqlvar[:self._out_sqlda.sqld]:
                     # Field name (or alias)
                     sqlname = p3fix(sqlvar.sqlname[:sqlvar.sqlname_length],
@@ -2552,29 +3453,35 @@ class PreparedStatement(object):
         result = -1
         if (self.__executed and self.statement_type in [isc_info_sql_stmt_select, isc_info_sql_stmt_insert,
                                                         isc_info_sql_stmt_update, isc_info_sql_stmt_delete]):
-            info = b(' ') * 64
-            api.isc_dsql_sql_info(self._isc_status, self._stmt_handle, 2,
-                                  bs([isc_info_sql_records, isc_info_end]), len(info), info)
-            if db_api_error(self._isc_status):
-                raise exception_from_status(DatabaseError, self._isc_status,
-                                            "Error while determining rowcount:")
-            if ord2(info[0]) != isc_info_sql_records:
-                raise InternalError("Cursor.get_rowcount:\n"
-                                    "first byte must be 'isc_info_sql_records'")
-            res_walk = 3
-            short_size = ctypes.sizeof(ctypes.c_short)
-            while ord2(info[res_walk]) != isc_info_end:
-                cur_count_type = ord2(info[res_walk])
-                res_walk += 1
-                size = bytes_to_uint(info[res_walk:res_walk + short_size])
-                res_walk += short_size
-                count = bytes_to_uint(info[res_walk:res_walk + size])
-                if ((cur_count_type == isc_info_req_select_count and self.statement_type == isc_info_sql_stmt_select)
-                    or (cur_count_type == isc_info_req_insert_count and self.statement_type == isc_info_sql_stmt_insert)
-                        or (cur_count_type == isc_info_req_update_count and self.statement_type == isc_info_sql_stmt_update)
-                        or (cur_count_type == isc_info_req_delete_count and self.statement_type == isc_info_sql_stmt_delete)):
-                    result = count
-                res_walk += size
+            counts = self._get_record_counts()
+            result = counts.get(_ROWCOUNT_INFO_CODES[self.statement_type], result)
+        return result
+    def _get_record_counts(self):
+        """Returns dictionary that maps `isc_info_req_*_count` codes to number of
+        records selected, inserted, updated and deleted by last execution.
+        """
+        result = {}
+        info = b(' ') * 64
+        api.isc_dsql_sql_info(self._isc_status, self._stmt_handle, 2,
+                              bs([isc_info_sql_records, isc_info_end]), len(info), info)
+        if db_api_error(self._isc_status):
+            raise exception_from_status(DatabaseError, self._isc_status,
+                                        "Error while determining rowcount:")
+        if ord2(info[0]) == isc_info_end:
+            # Statement doesn't process records (DDL etc.)
+            return result
+        if ord2(info[0]) != isc_info_sql_records:
+            raise InternalError("Cursor.get_rowcount:\n"
+                                "first byte must be 'isc_info_sql_records'")
+        res_walk = 3
+        short_size = ctypes.sizeof(ctypes.c_short)
+        while ord2(info[res_walk]) != isc_info_end:
+            cur_count_type = ord2(info[res_walk])
+            res_walk += 1
+            size = bytes_to_uint(info[res_walk:res_walk + short_size])
+            res_walk += short_size
+            result[cur_count_type] = bytes_to_uint(info[res_walk:res_walk + size])
+            res_walk += size
         return result
     def _parse_date(self, raw_value):
         "Convert raw data to datetime.date"
@@ -2651,71 +3558,58 @@ class PreparedStatement(object):
                                 str(vmin), str(vmax))
             raise ProgrammingError(msg, -802)
     def __coerce_xsqlda(self, xsqlda):
-        """Allocate space for SQLVAR data.
+        """Allocate space for SQLVAR data and compile the row decoder.
+
+        Data of all output columns live in single contiguous buffer (and NULL
+        indicators in another one), so whole row could be unpacked by single
+        :meth:`struct.Struct.unpack_from` call. Conversion to Python values is
+        then done by per-column converters selected here, so decisions that
+        depend only on column metadata are not repeated for every fetched row.
         """
-        for sqlvar in xsqlda.sqlvar[:self._out_sqlda.sqld]:
-            if sqlvar.sqltype & 1:
-                sqlvar.sqlind = ctypes.pointer(ISC_SHORT(0))
-            vartype = sqlvar.sqltype & ~1
-            if vartype in [SQL_TEXT, SQL_VARYING]:
-                sqlvar.sqldata = ctypes.create_string_buffer(sqlvar.sqllen + 2)
-            elif vartype == SQL_SHORT:
-                sqlvar.sqldata = ctypes.cast(ctypes.create_string_buffer(
-                    sqlvar.sqllen), buf_pointer)
-            elif vartype == SQL_LONG:
-                sqlvar.sqldata = ctypes.cast(ctypes.create_string_buffer(
-                    sqlvar.sqllen), buf_pointer)
-            elif vartype == SQL_INT64:
-                sqlvar.sqldata = ctypes.cast(ctypes.create_string_buffer(
-                    sqlvar.sqllen), buf_pointer)
-            elif vartype == SQL_FLOAT:
-                sqlvar.sqldata = ctypes.cast(ctypes.create_string_buffer(
-                    sqlvar.sqllen), buf_pointer)
-            elif vartype == SQL_DOUBLE:
-                sqlvar.sqldata = ctypes.cast(ctypes.create_string_buffer(
-                    sqlvar.sqllen), buf_pointer)
-            elif vartype == SQL_D_FLOAT:
-                sqlvar.sqldata = ctypes.cast(ctypes.create_string_buffer(
-                    sqlvar.sqllen), buf_pointer)
-            elif vartype == SQL_BLOB:
-                sqlvar.sqldata = ctypes.cast(ctypes.create_string_buffer(
-                    sqlvar.sqllen), buf_pointer)
-            elif vartype == SQL_TIMESTAMP:
-                sqlvar.sqldata = ctypes.cast(ctypes.create_string_buffer(
-                    sqlvar.sqllen), buf_pointer)
-            elif vartype == SQL_TYPE_DATE:
-                sqlvar.sqldata = ctypes.cast(ctypes.create_string_buffer(
-                    sqlvar.sqllen), buf_pointer)
-            elif vartype == SQL_TYPE_TIME:
-                sqlvar.sqldata = ctypes.cast(ctypes.create_string_buffer(
-                    sqlvar.sqllen), buf_pointer)
-            elif vartype == SQL_ARRAY:
-                sqlvar.sqldata = ctypes.cast(ctypes.create_string_buffer(
-                    sqlvar.sqllen), buf_pointer)
-            elif vartype == SQL_BOOLEAN:
-                sqlvar.sqldata = ctypes.cast(ctypes.create_string_buffer(
-                    sqlvar.sqllen), buf_pointer)
+        count = xsqlda.sqld
+        layout = []
+        offset = 0
+        for sqlvar in xsqlda.sqlvar[:count]:
+            code = _OUTPUT_STRUCT_CODES.get(sqlvar.sqltype & ~1)
+            if code is None:
+                if sqlvar.sqltype & ~1 in (SQL_SHORT, SQL_LONG, SQL_INT64):
+                    code = _INTEGER_STRUCT_CODES[sqlvar.sqllen]
+                else:
+                    # SQL_TEXT, SQL_VARYING and unknown types
+                    code = '%ds' % sqlvar.sqllen
+            # Align all values to 8 bytes
+            pad = -offset % 8
+            offset += pad
+            layout.append((pad, code, offset))
+            if sqlvar.sqltype & ~1 == SQL_VARYING:
+                offset += sqlvar.sqllen + 2
             else:
-                pass
-    def __xsqlda2tuple(self, xsqlda):
-        """Move data from output XSQLDA to result tuple.
-        """
-        values = []
-        for sqlvar in xsqlda.sqlvar[:xsqlda.sqld]:
-            value = '<NOT_IMPLEMENTED>'
+                offset += struct.calcsize('=' + code)
+        self.__out_buffer = ctypes.create_string_buffer(max(offset, 1))
+        self.__out_indicators = (ISC_SHORT * max(count, 1))()
+        buf_address = ctypes.addressof(self.__out_buffer)
+        ind_address = ctypes.addressof(self.__out_indicators)
+        ind_size = ctypes.sizeof(ISC_SHORT)
+        ind_pointer = ctypes.POINTER(ISC_SHORT)
+        # Converters must not hold strong reference to self, otherwise
+        # statement handle would not be released promptly.
+        ps = weakref.proxy(self)
+        charset = self.__python_charset if (self.__charset or PYTHON_MAJOR_VER == 3) else None
+        fmt = ['=']
+        converters = []
+        has_nullable = False
+        for i, sqlvar in enumerate(xsqlda.sqlvar[:count]):
+            pad, code, offset = layout[i]
+            if pad:
+                fmt.append('%dx' % pad)
+            sqlvar.sqldata = ctypes.cast(buf_address + offset, buf_pointer)
+            if sqlvar.sqltype & 1:
+                sqlvar.sqlind = ctypes.cast(ind_address + i * ind_size, ind_pointer)
+                has_nullable = True
             vartype = sqlvar.sqltype & ~1
-            scale = sqlvar.sqlscale
-            # NULL handling
-            if ((sqlvar.sqltype & 1) != 0) and (bool(sqlvar.sqlind)
-                                                and sqlvar.sqlind.contents.value == -1):
-                value = None
-            elif vartype == SQL_TEXT:
-                value = ctypes.string_at(sqlvar.sqldata, sqlvar.sqllen)
-                #value = sqlvar.sqldata[:sqlvar.sqllen]
-                ### Todo: verify handling of P version differences
-                if ((self.__charset or PYTHON_MAJOR_VER == 3) and
-                    sqlvar.sqlsubtype != 1):   # non OCTETS
-                    value = b2u(value, self.__python_charset)
+            converter = None
+            if vartype == SQL_TEXT:
+                fmt.append(code)
                 # CHAR with multibyte encoding requires special handling
                 if sqlvar.sqlsubtype in (4, 69):  # UTF8 and GB18030
                     reallength = sqlvar.sqllen // 4
@@ -2723,184 +3617,219 @@ class PreparedStatement(object):
                     reallength = sqlvar.sqllen // 3
                 else:
                     reallength = sqlvar.sqllen
-                value = value[:reallength]
+                converter = _make_text_converter(None if sqlvar.sqlsubtype == 1 else charset,
+                                                 reallength, sqlvar.sqllen)
             elif vartype == SQL_VARYING:
-                size = bytes_to_uint(sqlvar.sqldata[:2])
-                #value = ctypes.string_at(sqlvar.sqldata[2],2+size)
-                ### Todo: verify handling of P version differences
-                if PYTHON_MAJOR_VER == 3:
-                    value = bytes(sqlvar.sqldata[2:2 + size])
-                else:
-                    value = str(sqlvar.sqldata[2:2 + size])
-                if ((self.__charset or PYTHON_MAJOR_VER == 3) and
-                    sqlvar.sqlsubtype != 1):   # non OCTETS
-                    value = b2u(value, self.__python_charset)
-            elif vartype == SQL_BOOLEAN:
-                value = bool(bytes_to_int(sqlvar.sqldata.contents.value))
-            elif vartype in [SQL_SHORT, SQL_LONG, SQL_INT64]:
-                value = bytes_to_int(sqlvar.sqldata[:sqlvar.sqllen])
+                # Only the length is unpacked, value is read directly from buffer
+                fmt.append('H%dx' % sqlvar.sqllen)
+                converter = _make_varying_converter(buf_address + offset + 2,
+                                                    None if sqlvar.sqlsubtype == 1 else charset)
+            elif vartype in (SQL_SHORT, SQL_LONG, SQL_INT64):
+                fmt.append(code)
                 # It's scalled integer?
-                if sqlvar.sqlsubtype or scale:
-                    value = decimal.Decimal(value) / _tenTo[abs(scale)]
+                if sqlvar.sqlsubtype or sqlvar.sqlscale:
+                    converter = _make_scaled_converter(_tenTo[abs(sqlvar.sqlscale)])
             elif vartype == SQL_TYPE_DATE:
-                yyyy, mm, dd = self._parse_date(sqlvar.sqldata[:sqlvar.sqllen])
-                value = datetime.date(yyyy, mm, dd)
+                fmt.append(code)
+                converter = _isc_date_to_date
             elif vartype == SQL_TYPE_TIME:
-                h, m, s, ms = self._parse_time(sqlvar.sqldata[:sqlvar.sqllen])
-                value = datetime.time(h, m, s, ms)
+                fmt.append(code)
+                converter = _isc_time_to_time
             elif vartype == SQL_TIMESTAMP:
-                yyyy, mm, dd = self._parse_date(sqlvar.sqldata[:4])
-                h, m, s, ms = self._parse_time(sqlvar.sqldata[4:sqlvar.sqllen])
-                value = datetime.datetime(yyyy, mm, dd, h, m, s, ms)
-            elif vartype == SQL_FLOAT:
-                value = struct.unpack('f', sqlvar.sqldata[:sqlvar.sqllen])[0]
-            elif vartype == SQL_DOUBLE:
-                value = struct.unpack('d', sqlvar.sqldata[:sqlvar.sqllen])[0]
-            elif vartype == SQL_BOOLEAN:
-                value = bytes_to_int(sqlvar.sqldata[:sqlvar.sqllen])
-                value = value == 1
+                fmt.append(code)
+                converter = _isc_timestamp_to_datetime
+            elif vartype in (SQL_FLOAT, SQL_DOUBLE, SQL_D_FLOAT, SQL_BOOLEAN):
+                fmt.append(code)
             elif vartype == SQL_BLOB:
-                val = sqlvar.sqldata[:sqlvar.sqllen]
-                blobid = ISC_QUAD(bytes_to_uint(val[:4]), bytes_to_uint(val[4:sqlvar.sqllen]))
-                # Check if stream BLOB is requested instead materialized one
-                use_stream = False
-                if self.__streamed_blobs:
-                    # Get the BLOB name
-                    sqlname = p3fix(sqlvar.sqlname[:sqlvar.sqlname_length],
-                                    self.__python_charset)
-                    alias = p3fix(sqlvar.aliasname[:sqlvar.aliasname_length],
-                                  self.__python_charset)
-                    if alias != sqlname:
-                        sqlname = alias
-                    if sqlname in self.__streamed_blobs:
-                        use_stream = True
-                if use_stream:
-                    # Stream BLOB
-                    value = BlobReader(blobid, self.cursor._connection._db_handle,
-                                       self.cursor._transaction._tr_handle,
-                                       sqlvar.sqlsubtype == 1,
-                                       self.__charset)
-                    self.__blob_readers.append(value)
-                else:
-                    # Materialized BLOB
-                    blob_handle = isc_blob_handle()
-                    api.isc_open_blob2(self._isc_status, self.cursor._connection._db_handle,
-                                       self.cursor._transaction._tr_handle,
-                                       blob_handle, blobid, 0, None)
-                    if db_api_error(self._isc_status):
-                        raise exception_from_status(DatabaseError,
-                                                    self._isc_status,
-                                                    "Cursor.read_output_blob/isc_open_blob2:")
-                    # Get BLOB total length and max. size of segment
-                    result = ctypes.cast(ctypes.create_string_buffer(20),
-                                         buf_pointer)
-                    api.isc_blob_info(self._isc_status, blob_handle, 2,
-                                      bs([isc_info_blob_total_length, isc_info_blob_max_segment]),
-                                      20, result)
-                    if db_api_error(self._isc_status):
-                        raise exception_from_status(DatabaseError,
-                                                    self._isc_status,
-                                                    "Cursor.read_output_blob/isc_blob_info:")
-                    offset = 0
-                    while bytes_to_uint(result[offset]) != isc_info_end:
-                        code = bytes_to_uint(result[offset])
-                        offset += 1
-                        if code == isc_info_blob_total_length:
-                            length = bytes_to_uint(result[offset:offset + 2])
-                            blob_length = bytes_to_uint(result[
-                                offset + 2:offset + 2 + length])
-                            offset += length + 2
-                        elif code == isc_info_blob_max_segment:
-                            length = bytes_to_uint(result[offset:offset + 2])
-                            segment_size = bytes_to_uint(result[
-                                offset + 2:offset + 2 + length])
-                            offset += length + 2
-                    # Does the blob size exceeds treshold for streamed one?
-                    if ((self.__streamed_blob_treshold >= 0) and
-                        (blob_length > self.__streamed_blob_treshold)):
-                        # Stream BLOB
-                        value = BlobReader(blobid, self.cursor._connection._db_handle,
-                                           self.cursor._transaction._tr_handle,
-                                           sqlvar.sqlsubtype == 1,
-                                           self.__charset)
-                        self.__blob_readers.append(value)
-                    else:
-                        # Load BLOB
-                        allow_incomplete_segment_read = True
-                        status = ISC_STATUS(0)
-                        blob = ctypes.create_string_buffer(blob_length)
-                        bytes_read = 0
-                        bytes_actually_read = ctypes.c_ushort(0)
-                        while bytes_read < blob_length:
-                            status = api.isc_get_segment(self._isc_status, blob_handle,
-                                                         bytes_actually_read,
-                                                         min(segment_size, blob_length - bytes_read),
-                                                         ctypes.byref(blob, bytes_read))
-                            if status != 0:
-                                if (status == isc_segment) and allow_incomplete_segment_read:
-                                    bytes_read += bytes_actually_read.value
-                                else:
-                                    raise exception_from_status(DatabaseError, self._isc_status,
-                                                                "Cursor.read_output_blob/isc_get_segment:")
-                            else:
-                                bytes_read += bytes_actually_read.value
-                        # Finalize value
-                        value = blob.raw
-                        if (self.__charset or PYTHON_MAJOR_VER == 3) and sqlvar.sqlsubtype == 1:
-                            value = b2u(value, self.__python_charset)
-                    # Close blob
-                    api.isc_close_blob(self._isc_status, blob_handle)
-                    if db_api_error(self._isc_status):
-                        raise exception_from_status(DatabaseError,
-                                                    self._isc_status,
-                                                    "Cursor.read_otput_blob/isc_close_blob:")
+                fmt.append(code)
+                converter = lambda value, index=i: ps.__read_blob(index, value)
             elif vartype == SQL_ARRAY:
-                value = []
-                val = sqlvar.sqldata[:sqlvar.sqllen]
-                arrayid = ISC_QUAD(bytes_to_uint(val[:4]), bytes_to_uint(val[4:sqlvar.sqllen]))
-                arraydesc = ISC_ARRAY_DESC(0)
-                sqlsubtype = self.cursor._connection._get_array_sqlsubtype(sqlvar.relname,
-                                                                           sqlvar.sqlname)
-                api.isc_array_lookup_bounds(self._isc_status, self.cursor._connection._db_handle,
-                                            self.cursor._transaction._tr_handle,
-                                            sqlvar.relname, sqlvar.sqlname, arraydesc)
-                if db_api_error(self._isc_status):
-                    raise exception_from_status(DatabaseError,
-                                                self._isc_status,
-                                                "Cursor.read_otput_array/isc_array_lookup_bounds:")
-                value_type = arraydesc.array_desc_dtype
-                value_scale = arraydesc.array_desc_scale
-                value_size = arraydesc.array_desc_length
-                if value_type in (blr_varying, blr_varying2):
-                    value_size += 2
-                dimensions = []
-                total_num_elements = 1
-                for dimension in xrange(arraydesc.array_desc_dimensions):
-                    bounds = arraydesc.array_desc_bounds[dimension]
-                    dimensions.append((bounds.array_bound_upper+1)-bounds.array_bound_lower)
-                    total_num_elements *= dimensions[dimension]
-                total_size = total_num_elements * value_size
-                buf = ctypes.create_string_buffer(total_size)
-                value_buffer = ctypes.cast(buf,
-                                           buf_pointer)
-                tsize = ISC_LONG(total_size)
-                api.isc_array_get_slice(self._isc_status, self.cursor._connection._db_handle,
-                                        self.cursor._transaction._tr_handle, arrayid, arraydesc,
-                                        value_buffer, tsize)
-                if db_api_error(self._isc_status):
-                    raise exception_from_status(DatabaseError,
-                                                self._isc_status,
-                                                "Cursor.read_otput_array/isc_array_get_slice:")
-
-                (value, bufpos) = self.__extract_db_array_to_list(value_size,
-                                                                  value_type,
-                                                                  sqlsubtype,
-                                                                  value_scale,
-                                                                  0, dimensions,
-                                                                  value_buffer, 0)
-            values.append(value)
-
-        return tuple(values)
+                fmt.append(code)
+                converter = lambda value, index=i: ps.__read_array(index, value)
+            else:
+                fmt.append(code)
+                converter = lambda value: '<NOT_IMPLEMENTED>'
+            converters.append(converter)
+        self.__out_layout = layout
+        self.__out_sqlda_ptr = ctypes.cast(ctypes.pointer(xsqlda), XSQLDA_PTR)
+        self.__row_struct = struct.Struct(''.join(fmt))
+        self.__ind_struct = struct.Struct('=%dh' % count)
+        self.__converters = tuple(converters)
+        self.__has_nullable = has_nullable
+    def __decode_row(self):
+        """Move data from output XSQLDA to result tuple using compiled row decoder.
+        """
+        values = self.__row_struct.unpack_from(self.__out_buffer)
+        if self.__has_nullable:
+            return tuple([None if ind == -1 else (value if conv is None else conv(value))
+                          for value, ind, conv
+                          in zip(values, self.__ind_struct.unpack_from(self.__out_indicators),
+                                 self.__converters)])
+        return tuple([value if conv is None else conv(value)
+                      for value, conv in zip(values, self.__converters)])
+    def __load_blob(self, blob_handle, limit):
+        """Reads content of open BLOB into reusable statement buffer.
+
+        Args:
+            blob_handle: Handle of open BLOB.
+            limit (int): Max. number of bytes to read (negative value means no limit).
+
+        Returns:
+            Number of bytes read, or None when BLOB is larger than `limit`.
+        """
+        buf = self.__blob_buffer
+        if buf is None:
+            buf = self.__blob_buffer = ctypes.create_string_buffer(MAX_BLOB_SEGMENT_SIZE)
+        segment_length = self.__blob_segment_length
+        bytes_read = 0
+        while True:
+            free = len(buf) - bytes_read
+            if free == 0:
+                # Grow the buffer
+                new_buf = ctypes.create_string_buffer(len(buf) * 2)
+                ctypes.memmove(new_buf, buf, bytes_read)
+                buf = self.__blob_buffer = new_buf
+                free = len(buf) - bytes_read
+            status = api.isc_get_segment(self._isc_status, blob_handle, segment_length,
+                                         min(free, MAX_BLOB_SEGMENT_SIZE),
+                                         ctypes.byref(buf, bytes_read))
+            if status == 0 or status == isc_segment:
+                bytes_read += segment_length.value
+                if 0 <= limit < bytes_read:
+                    return None
+            elif status == isc_segstr_eof:
+                return bytes_read
+            else:
+                error = exception_from_status(DatabaseError, self._isc_status,
+                                              "Cursor.read_output_blob/isc_get_segment:")
+                # Release the handle so it could be reused
+                if _handle_tracker is not None:
+                    _handle_tracker._release(HANDLE_BLOB, blob_handle)
+                api.isc_cancel_blob(self._isc_status, blob_handle)
+                blob_handle.value = 0
+                raise error
+    def __read_blob(self, index, value):
+        """Returns value for BLOB column from current output row.
+        """
+        sqlvar = self._out_sqlda.sqlvar[index]
+        blobid = ISC_QUAD.from_buffer_copy(value)
+        # Check if stream BLOB is requested instead materialized one
+        use_stream = False
+        if self.__streamed_blobs:
+            # Get the BLOB name
+            sqlname = p3fix(sqlvar.sqlname[:sqlvar.sqlname_length],
+                            self.__python_charset)
+            alias = p3fix(sqlvar.aliasname[:sqlvar.aliasname_length],
+                          self.__python_charset)
+            if alias != sqlname:
+                sqlname = alias
+            if sqlname in self.__streamed_blobs:
+                use_stream = True
+        if use_stream:
+            # Stream BLOB
+            value = BlobReader(blobid, self.cursor._connection._db_handle,
+                               self.cursor._transaction._tr_handle,
+                               sqlvar.sqlsubtype == 1,
+                               self.__charset)
+            self.__blob_readers.append(value)
+        else:
+            # Materialized BLOB
+            cache = self.cursor._transaction._blob_cache
+            if cache.size:
+                key = (self.cursor._connection._db_handle.value, blobid.gds_quad_high,
+                       blobid.gds_quad_low, sqlvar.sqlsubtype == 1)
+                value = cache.get(key)
+                if value is not None:
+                    return value
+            trace = hooks.get(HOOK_BLOB_READ)
+            if trace:
+                start = _hook_timer()
+            blob_handle = self.__blob_handle
+            api.isc_open_blob2(self._isc_status, self.cursor._connection._db_handle,
+                               self.cursor._transaction._tr_handle,
+                               blob_handle, blobid, 0, None)
+            if db_api_error(self._isc_status):
+                raise exception_from_status(DatabaseError,
+                                            self._isc_status,
+                                            "Cursor.read_output_blob/isc_open_blob2:")
+            if _handle_tracker is not None:
+                _handle_tracker._register(HANDLE_BLOB, blob_handle,
+                                          (self.cursor._connection._db_handle.value,))
+            # BLOB is read without asking for its length first (that would cost
+            # another round trip), so BLOB that exceeds the treshold for streamed
+            # BLOBs is detected while reading.
+            bytes_read = self.__load_blob(blob_handle, self.__streamed_blob_treshold)
+            if _handle_tracker is not None:
+                _handle_tracker._release(HANDLE_BLOB, blob_handle)
+            # Close blob
+            api.isc_close_blob(self._isc_status, blob_handle)
+            if db_api_error(self._isc_status):
+                raise exception_from_status(DatabaseError,
+                                            self._isc_status,
+                                            "Cursor.read_otput_blob/isc_close_blob:")
+            if trace:
+                elapsed = _hook_timer() - start
+                for hook in trace:
+                    hook(self, elapsed, bytes_read or 0)
+            if bytes_read is None:
+                # Stream BLOB
+                value = BlobReader(blobid, self.cursor._connection._db_handle,
+                                   self.cursor._transaction._tr_handle,
+                                   sqlvar.sqlsubtype == 1,
+                                   self.__charset)
+                self.__blob_readers.append(value)
+            else:
+                # Finalize value
+                buf = self.__blob_buffer
+                if ((self.__charset or PYTHON_MAJOR_VER == 3) and sqlvar.sqlsubtype == 1
+                        and self.__python_charset):
+                    # Decode directly from buffer
+                    value = codecs.decode(memoryview(buf)[:bytes_read],
+                                          self.__python_charset, 'replace')
+                else:
+                    value = ctypes.string_at(buf, bytes_read)
+                if len(buf) > _MAX_RETAINED_BLOB_BUFFER:
+                    self.__blob_buffer = None
+                if cache.size:
+                    cache.put(key, value, bytes_read)
+        return value
+    def __read_array(self, index, value):
+        """Returns value for ARRAY column from current output row.
+        """
+        sqlvar = self._out_sqlda.sqlvar[index]
+        arrayid = ISC_QUAD.from_buffer_copy(value)
+        connection = self.cursor._connection
+        descriptor = connection._get_array_desc(sqlvar.relname, sqlvar.sqlname,
+                                                self.cursor._transaction._tr_handle)
+        if self.cursor.numpy_arrays:
+            numpy = _import_numpy()
+            plan = descriptor.get_numpy_plan()
+            if plan is not None:
+                # Read ARRAY slice directly into NumPy array
+                fmt, decoder, encoder = plan
+                value = numpy.empty(descriptor.dimensions, dtype=fmt)
+                self.__get_array_slice(connection, arrayid, descriptor, value.ctypes.data)
+                return value if decoder is None else decoder(value)
+        buf = ctypes.create_string_buffer(descriptor.total_size)
+        value_buffer = ctypes.cast(buf, buf_pointer)
+        self.__get_array_slice(connection, arrayid, descriptor, value_buffer)
+        (value, bufpos) = self.__extract_db_array_to_list(descriptor.esize,
+                                                          descriptor.dtype,
+                                                          descriptor.subtype,
+                                                          descriptor.desc.array_desc_scale,
+                                                          0, descriptor.dimensions,
+                                                          value_buffer, 0)
+        if self.cursor.numpy_arrays:
+            value = numpy.array(value, dtype=object)
+        return value
+    def __get_array_slice(self, connection, arrayid, descriptor, target):
+        api.isc_array_get_slice(self._isc_status, connection._db_handle,
+                                self.cursor._transaction._tr_handle, arrayid,
+                                descriptor.desc, target, ISC_LONG(descriptor.total_size))
+        if db_api_error(self._isc_status):
+            raise exception_from_status(DatabaseError,
+                                        self._isc_status,
+                                        "Cursor.read_otput_array/isc_array_get_slice:")
     def __extract_db_array_to_list(self, esize, dtype, subtype, scale, dim, dimensions,
                                    buf, bufpos):
         """Extracts ARRRAY column data from buffer to Python list(s).
@@ -3110,214 +4039,236 @@ class PreparedStatement(object):
             if not ok:
                 return False
         return ok
-    def __tuple2xsqlda(self, xsqlda, parameters):
-        """Move data from parameters to input XSQLDA.
+    def __compile_input_binder(self):
+        """Allocate reusable buffers for input parameters and compile parameter encoders.
+
+        Each input parameter gets a fixed slot in single contiguous data buffer
+        (and NULL indicator in another one) that is overwritten in place on
+        every execution, so repeated executions do not allocate new buffers.
         """
-        for i in xrange(xsqlda.sqld):
-            sqlvar = xsqlda.sqlvar[i]
-            value = parameters[i]
-            vartype = sqlvar.sqltype & ~1
-            scale = sqlvar.sqlscale
+        count = self.n_input_params
+        slots = []
+        offset = 0
+        for sqlvar in self._in_sqlda.sqlvar[:count]:
+            # Align all slots to 8 bytes, BLOB and ARRAY slots hold ISC_QUAD
+            offset += -offset % 8
+            slots.append(offset)
+            offset += max(sqlvar.sqllen, 8)
+        self.__in_buffer = ctypes.create_string_buffer(max(offset, 1))
+        self.__in_indicators = (ISC_SHORT * max(count, 1))()
+        # Buffers for string values that does not fit into their slots
+        self.__in_overflow = [None] * count
+        buf_address = ctypes.addressof(self.__in_buffer)
+        ind_address = ctypes.addressof(self.__in_indicators)
+        ind_size = ctypes.sizeof(ISC_SHORT)
+        ind_pointer = ctypes.POINTER(ISC_SHORT)
+        encoders = []
+        for i, sqlvar in enumerate(self._in_sqlda.sqlvar[:count]):
+            sqlvar.sqlind = ctypes.cast(ind_address + i * ind_size, ind_pointer)
+            sqlvar.sqldata = ctypes.cast(buf_address + slots[i], buf_pointer)
+            encoders.append(self.__make_param_encoder(i, sqlvar, slots[i],
+                                                      max(sqlvar.sqllen, 8)))
+        self.__encoders = tuple(encoders)
+    def __make_param_encoder(self, index, sqlvar, offset, slot_size):
+        """Returns function that stores value of input parameter into its slot.
+        """
+        # Encoders must not hold strong reference to self, otherwise
+        # statement handle would not be released promptly.
+        ps = weakref.proxy(self)
+        buf = self.__in_buffer
+        indicators = self.__in_indicators
+        overflow = self.__in_overflow
+        python_charset = self.__python_charset
+        slot_address = ctypes.addressof(buf) + offset
+        slot_pointer = ctypes.cast(slot_address, buf_pointer)
+        sqltype = sqlvar.sqltype
+        sqllen = sqlvar.sqllen
+        vartype = sqltype & ~1
+        scale = sqlvar.sqlscale
+        is_text = vartype in (SQL_TEXT, SQL_VARYING)
+        is_blob = vartype == SQL_BLOB
+        text_type = SQL_TEXT | (sqltype & 1)
+        # Store function for non-NULL values that are not passed as strings
+        if vartype in (SQL_SHORT, SQL_LONG, SQL_INT64):
+            packer = struct.Struct('=' + _INTEGER_STRUCT_CODES[sqllen])
+            vmin, vmax = _INTEGER_RANGES[vartype]
+            multiplier = _tenTo[abs(scale)]
+            dialect = self.__sql_dialect
+            def store(value):
+                # It's scalled integer?
+                if sqlvar.sqlsubtype or scale:
+                    if isinstance(value, decimal.Decimal):
+                        value = int((value * multiplier).to_integral())
+                    elif isinstance(value, (int, mylong, float,)):
+                        value = int(value * multiplier)
+                    else:
+                        raise TypeError('Objects of type %s are not '
+                                        ' acceptable input for'
+                                        ' a fixed-point column.' % str(type(value)))
+                if (value < vmin) or (value > vmax):
+                    ps._check_integer_range(value, dialect, vartype, sqlvar.sqlsubtype, scale)
+                packer.pack_into(buf, offset, value)
+        elif vartype == SQL_TYPE_DATE:
+            def store(value):
+                _ISC_DATE_STRUCT.pack_into(buf, offset, _date_to_isc_date(value))
+        elif vartype == SQL_TYPE_TIME:
+            def store(value):
+                _ISC_TIME_STRUCT.pack_into(buf, offset, _time_to_isc_time(value))
+        elif vartype == SQL_TIMESTAMP:
+            def store(value):
+                if isinstance(value, datetime.datetime):
+                    ntime = _time_to_isc_time(value)
+                elif isinstance(value, datetime.date):
+                    ntime = 0
+                else:
+                    raise ValueError("datetime.datetime or datetime.date expected")
+                _ISC_TIMESTAMP_STRUCT.pack_into(buf, offset, _date_to_isc_date(value), ntime)
+        elif vartype in (SQL_FLOAT, SQL_DOUBLE, SQL_D_FLOAT):
+            packer = struct.Struct('=' + _OUTPUT_STRUCT_CODES[vartype])
+            def store(value):
+                packer.pack_into(buf, offset, value)
+        elif vartype == SQL_BOOLEAN:
+            packer = struct.Struct('=' + _INTEGER_STRUCT_CODES[sqllen])
+            def store(value):
+                packer.pack_into(buf, offset, 1 if value else 0)
+        elif vartype == SQL_BLOB:
+            def store(value):
+                blobid = ps.__write_blob(sqlvar, value)
+                ctypes.memmove(slot_address, ctypes.byref(blobid), ctypes.sizeof(ISC_QUAD))
+        elif vartype == SQL_ARRAY:
+            def store(value):
+                arrayid = ps.__write_array(sqlvar, value)
+                ctypes.memmove(slot_address, ctypes.byref(arrayid), ctypes.sizeof(ISC_QUAD))
+        else:
+            def store(value):
+                pass
+        def encode(value):
             # NULL handling
             if value is None:
                 # Set the null flag whether sqlvar definition allows it or not,
                 # to give BEFORE triggers to act on value without
                 # our interference.
-                if (sqlvar.sqltype & 1) == 0:
-                    # NULLs were not allowed, so set it allowed or FB will complain
-                    sqlvar.sqltype += 1
-                sqlvar.sqlind = ctypes.pointer(ISC_SHORT(-1))
-                sqlvar.sqldata = None
+                sqlvar.sqltype = sqltype | 1
+                indicators[index] = -1
+            elif is_text or (not is_blob and isinstance(value, (StringType, UnicodeType))):
+                # Place for Implicit Conversion of Input Parameters
+                # to Strings
+                if not isinstance(value, (UnicodeType, StringType, ibase.mybytes)):
+                    value = str(value)
+                # Place for Implicit Conversion of Input Parameters
+                # from Strings
+                if isinstance(value, UnicodeType):
+                    value = value.encode(python_charset)
+                size = len(value)
+                if is_text and size > sqllen:
+                    raise ValueError("Value of parameter (%i) is too long,"
+                                     " expected %i, found %i" % (index, sqllen, size))
+                sqlvar.sqltype = text_type
+                sqlvar.sqllen = size
+                indicators[index] = 0
+                if size <= slot_size:
+                    ctypes.memmove(slot_address, value, size)
+                    sqlvar.sqldata = slot_pointer
+                else:
+                    # Value doesn't fit into slot, reuse (or grow) overflow buffer
+                    extra = overflow[index]
+                    if extra is None or len(extra) < size:
+                        extra = overflow[index] = ctypes.create_string_buffer(size)
+                    ctypes.memmove(extra, value, size)
+                    sqlvar.sqldata = ctypes.cast(extra, buf_pointer)
             else:
-                # if sqlvar allows null, allocate the null flag
-                # I don't know whether it's necessary,
-                # but we'll do it anyway for safety
-                if (sqlvar.sqltype & 1) != 0:
-                    sqlvar.sqlind = ctypes.pointer(ISC_SHORT(0))
-                # Fill in value by type
-                if ((vartype != SQL_BLOB and isinstance(value, (StringType, UnicodeType)))
-                    or vartype in [SQL_TEXT, SQL_VARYING]):
-                    # Place for Implicit Conversion of Input Parameters
-                    # to Strings
-                    if not isinstance(value, (UnicodeType, StringType, ibase.mybytes)):
-                        value = str(value)
-                    # Place for Implicit Conversion of Input Parameters
-                    # from Strings
-                    if isinstance(value, UnicodeType):
-                        value = value.encode(self.__python_charset)
-                    if vartype in [SQL_TEXT, SQL_VARYING] and len(value) > sqlvar.sqllen:
-                        raise ValueError("Value of parameter (%i) is too long,"
-                                         " expected %i, found %i" % (i, sqlvar.sqllen,
-                                                                     len(value)))
-                    sqlvar.sqltype = SQL_TEXT | (sqlvar.sqltype & 1)
-                    sqlvar.sqllen = ctypes.c_short(len(value))
-                    sqlvar.sqldata = ctypes.cast(ctypes.pointer(
-                        ctypes.create_string_buffer(value)), buf_pointer)
-                elif vartype in [SQL_SHORT, SQL_LONG,
-                                 SQL_INT64]:
-                    # It's scalled integer?
-                    if sqlvar.sqlsubtype or scale:
-                        if isinstance(value, decimal.Decimal):
-                            value = int(
-                                (value * _tenTo[abs(scale)]).to_integral())
-                        elif isinstance(value, (int, mylong, float,)):
-                            value = int(value * _tenTo[abs(scale)])
-                        else:
-                            raise TypeError('Objects of type %s are not '
-                                            ' acceptable input for'
-                                            ' a fixed-point column.' % str(type(value)))
-                    self._check_integer_range(value,
-                                              self.__sql_dialect,
-                                              vartype, sqlvar.sqlsubtype,
-                                              sqlvar.sqlscale)
-                    sqlvar.sqldata = ctypes.cast(ctypes.pointer(
-                        ctypes.create_string_buffer(
-                            int_to_bytes(value, sqlvar.sqllen))), buf_pointer)
-                elif vartype == SQL_TYPE_DATE:
-                    sqlvar.sqldata = ctypes.cast(ctypes.pointer(
-                        ctypes.create_string_buffer(
-                            self._convert_date(value))), buf_pointer)
-                elif vartype == SQL_TYPE_TIME:
-                    sqlvar.sqldata = ctypes.cast(ctypes.pointer(
-                        ctypes.create_string_buffer(
-                            self._convert_time(value))), buf_pointer)
-                elif vartype == SQL_TIMESTAMP:
-                    sqlvar.sqldata = ctypes.cast(ctypes.pointer(
-                        ctypes.create_string_buffer(
-                            self._convert_timestamp(value))), buf_pointer)
-                elif vartype == SQL_FLOAT:
-                    sqlvar.sqldata = ctypes.cast(
-                        ctypes.pointer(ctypes.create_string_buffer(
-                            struct.pack('f', value))), buf_pointer)
-                elif vartype == SQL_DOUBLE:
-                    sqlvar.sqldata = ctypes.cast(
-                        ctypes.pointer(ctypes.create_string_buffer(
-                            struct.pack('d', value))), buf_pointer)
-                elif vartype == SQL_BOOLEAN:
-                    sqlvar.sqldata = ctypes.cast(ctypes.pointer(
-                        ctypes.create_string_buffer(
-                            int_to_bytes(1 if value else 0, sqlvar.sqllen))), buf_pointer)
-                elif vartype == SQL_BLOB:
-                    blobid = ISC_QUAD(0, 0)
-                    blob_handle = isc_blob_handle()
-                    if hasattr(value, 'read'):
-                        # It seems we've got file-like object, use stream BLOB
-                        api.isc_create_blob2(self._isc_status,
-                                             self.cursor._connection._db_handle,
-                                             self.cursor._transaction._tr_handle,
-                                             blob_handle, blobid, 4,
-                                             bs([ibase.isc_bpb_version1,
-                                                 ibase.isc_bpb_type, 1,
-                                                 ibase.isc_bpb_type_stream]))
-                        if db_api_error(self._isc_status):
-                            raise exception_from_status(DatabaseError,
-                                                        self._isc_status,
-                                                        "Cursor.write_input_blob/isc_create_blob2:")
-                        sqlvar.sqldata = ctypes.cast(ctypes.pointer(blobid),
-                                                     buf_pointer)
-                        blob = ctypes.create_string_buffer(MAX_BLOB_SEGMENT_SIZE)
-                        value_chunk = value.read(MAX_BLOB_SEGMENT_SIZE)
-                        blob.raw = ibase.b(value_chunk)
-                        while len(value_chunk) > 0:
-                            api.isc_put_segment(self._isc_status, blob_handle,
-                                                len(value_chunk), ctypes.byref(blob))
-                            if db_api_error(self._isc_status):
-                                raise exception_from_status(DatabaseError, self._isc_status,
-                                                            "Cursor.write_input_blob/isc_put_segment:")
-                            ctypes.memset(blob, 0, MAX_BLOB_SEGMENT_SIZE)
-                            value_chunk = value.read(MAX_BLOB_SEGMENT_SIZE)
-                            blob.raw = ibase.b(value_chunk)
-                        api.isc_close_blob(self._isc_status, blob_handle)
-                        if db_api_error(self._isc_status):
-                            raise exception_from_status(DatabaseError,
-                                                        self._isc_status,
-                                                        "Cursor.write_input_blob/isc_close_blob:")
-                    else:
-                        # Non-stream BLOB
-                        if isinstance(value, myunicode):
-                            if sqlvar.sqlsubtype == 1:
-                                value = value.encode(self.__python_charset)
-                            else:
-                                raise TypeError('Unicode strings are not'
-                                                ' acceptable input for'
-                                                ' a non-textual BLOB column.')
-                        blob = ctypes.create_string_buffer(value)
-                        api.isc_create_blob2(self._isc_status, self.cursor._connection._db_handle,
-                                             self.cursor._transaction._tr_handle,
-                                             blob_handle, blobid, 0, None)
-                        if db_api_error(self._isc_status):
-                            raise exception_from_status(DatabaseError,
-                                                        self._isc_status,
-                                                        "Cursor.write_input_blob/isc_create_blob2:")
-                        sqlvar.sqldata = ctypes.cast(ctypes.pointer(blobid),
-                                                     buf_pointer)
-                        total_size = len(value)
-                        bytes_written_so_far = 0
-                        bytes_to_write_this_time = MAX_BLOB_SEGMENT_SIZE
-                        while bytes_written_so_far < total_size:
-                            if (total_size - bytes_written_so_far) < MAX_BLOB_SEGMENT_SIZE:
-                                bytes_to_write_this_time = (total_size -
-                                                            bytes_written_so_far)
-                            api.isc_put_segment(self._isc_status, blob_handle,
-                                                bytes_to_write_this_time,
-                                                ctypes.byref(blob, bytes_written_so_far))
-                            if db_api_error(self._isc_status):
-                                raise exception_from_status(DatabaseError, self._isc_status,
-                                                            "Cursor.write_input_blob/isc_put_segment:")
-                            bytes_written_so_far += bytes_to_write_this_time
-                        api.isc_close_blob(self._isc_status, blob_handle)
-                        if db_api_error(self._isc_status):
-                            raise exception_from_status(DatabaseError,
-                                                        self._isc_status,
-                                                        "Cursor.write_input_blob/isc_close_blob:")
-                elif vartype == SQL_ARRAY:
-                    arrayid = ISC_QUAD(0, 0)
-                    arrayid_ptr = ctypes.pointer(arrayid)
-                    arraydesc = ISC_ARRAY_DESC(0)
-                    sqlvar.sqldata = ctypes.cast(ctypes.pointer(arrayid),
-                                                 buf_pointer)
-                    sqlsubtype = self.cursor._connection._get_array_sqlsubtype(sqlvar.relname,
-                                                                               sqlvar.sqlname)
-                    api.isc_array_lookup_bounds(self._isc_status,
-                                                self.cursor._connection._db_handle,
-                                                self.cursor._transaction._tr_handle,
-                                                sqlvar.relname, sqlvar.sqlname, arraydesc)
-                    if db_api_error(self._isc_status):
-                        raise exception_from_status(DatabaseError,
-                                                    self._isc_status,
-                                                    "Cursor.write_otput_array/isc_array_lookup_bounds:")
-                    value_type = arraydesc.array_desc_dtype
-                    value_scale = arraydesc.array_desc_scale
-                    value_size = arraydesc.array_desc_length
-                    if value_type in (blr_varying, blr_varying2):
-                        value_size += 2
-                    dimensions = []
-                    total_num_elements = 1
-                    for dimension in xrange(arraydesc.array_desc_dimensions):
-                        bounds = arraydesc.array_desc_bounds[dimension]
-                        dimensions.append((bounds.array_bound_upper+1)-bounds.array_bound_lower)
-                        total_num_elements *= dimensions[dimension]
-                    total_size = total_num_elements * value_size
-                    # Validate value to make sure it matches the array structure
-                    if not self.__validate_array_value(0, dimensions, value_type,
-                                                       sqlsubtype,
-                                                       value_scale, value):
-                        raise ValueError("Incorrect ARRAY field value.")
-                    value_buffer = ctypes.create_string_buffer(total_size)
-                    tsize = ISC_LONG(total_size)
-                    self.__copy_list_to_db_array(value_size, value_type,
-                                                 sqlsubtype, value_scale,
-                                                 0, dimensions,
-                                                 value, value_buffer, 0)
-                    api.isc_array_put_slice(self._isc_status, self.cursor._connection._db_handle,
-                                            self.cursor._transaction._tr_handle, arrayid_ptr, arraydesc,
-                                            value_buffer, tsize)
-                    if db_api_error(self._isc_status):
-                        raise exception_from_status(DatabaseError,
-                                                    self._isc_status,
-                                                    "Cursor.read_otput_array/isc_array_put_slice:")
-                    sqlvar.sqldata = ctypes.cast(arrayid_ptr, buf_pointer)
+                sqlvar.sqltype = sqltype
+                sqlvar.sqllen = sqllen
+                sqlvar.sqldata = slot_pointer
+                indicators[index] = 0
+                store(value)
+        return encode
+    def __bind_parameters(self, parameters):
+        """Move data from parameters to input XSQLDA.
+        """
+        encoders = self.__encoders
+        for i in xrange(self.n_input_params):
+            encoders[i](parameters[i])
+    def __write_blob(self, sqlvar, value):
+        """Writes `value` to new BLOB for input parameter. Returns BLOB ID.
+        """
+        if isinstance(value, BlobWriter):
+            # BLOB was already written by application
+            value.close()
+            return value.blob_id
+        if isinstance(value, ISC_QUAD):
+            # ID of BLOB already written by application
+            return value
+        if hasattr(value, 'read'):
+            # It seems we've got file-like object, use stream BLOB
+            writer = BlobWriter(self.cursor._connection._db_handle,
+                                self.cursor._transaction._tr_handle, stream=True)
+            writer.write_from(value)
+        else:
+            # Non-stream BLOB
+            if isinstance(value, myunicode):
+                if sqlvar.sqlsubtype == 1:
+                    value = value.encode(self.__python_charset)
+                else:
+                    raise TypeError('Unicode strings are not'
+                                    ' acceptable input for'
+                                    ' a non-textual BLOB column.')
+            writer = BlobWriter(self.cursor._connection._db_handle,
+                                self.cursor._transaction._tr_handle, stream=False)
+            writer.write(value)
+        writer.close()
+        return writer.blob_id
+    def __write_array(self, sqlvar, value):
+        """Writes `value` to new ARRAY for input parameter. Returns ARRAY ID.
+        """
+        arrayid = ISC_QUAD(0, 0)
+        arrayid_ptr = ctypes.pointer(arrayid)
+        connection = self.cursor._connection
+        descriptor = connection._get_array_desc(sqlvar.relname, sqlvar.sqlname,
+                                                self.cursor._transaction._tr_handle)
+        value_buffer = None
+        if hasattr(value, '__array_interface__'):
+            # NumPy array
+            numpy = _import_numpy()
+            plan = descriptor.get_numpy_plan()
+            if numpy.shape(value) != tuple(descriptor.dimensions):
+                raise ValueError("Incorrect ARRAY field value.")
+            data = None
+            if plan is not None:
+                # Pass array data directly to server (converted only when necessary)
+                fmt, decoder, encoder = plan
+                data = _numpy_array_cast(numpy, value if encoder is None
+                                         else encoder(numpy, value), fmt, encoder is not None)
+            if data is None:
+                # Values of other kind are validated like list
+                value = numpy.asarray(value).tolist()
+            else:
+                value = data
+                value_buffer = value.ctypes.data
+        if value_buffer is None:
+            # Validate value to make sure it matches the array structure
+            if not self.__validate_array_value(0, descriptor.dimensions, descriptor.dtype,
+                                               descriptor.subtype,
+                                               descriptor.desc.array_desc_scale, value):
+                raise ValueError("Incorrect ARRAY field value.")
+            value_buffer = ctypes.create_string_buffer(descriptor.total_size)
+            self.__copy_list_to_db_array(descriptor.esize, descriptor.dtype,
+                                         descriptor.subtype,
+                                         descriptor.desc.array_desc_scale,
+                                         0, descriptor.dimensions,
+                                         value, value_buffer, 0)
+        api.isc_array_put_slice(self._isc_status, connection._db_handle,
+                                self.cursor._transaction._tr_handle, arrayid_ptr,
+                                descriptor.desc, value_buffer,
+                                ISC_LONG(descriptor.total_size))
+        if db_api_error(self._isc_status):
+            raise exception_from_status(DatabaseError,
+                                        self._isc_status,
+                                        "Cursor.read_otput_array/isc_array_put_slice:")
+        return arrayid
     def _free_handle(self):
+        if self.__fetch_stats is not None:
+            self.__report_fetch()
         if self._stmt_handle != None and not self.__closed:
             self.__executed = False
             self.__closed = True
@@ -3331,10 +4282,19 @@ class PreparedStatement(object):
                     raise exception_from_status(DatabaseError, self._isc_status,
                                                 "Error while releasing SQL statement handle:")
     def _close(self):
+        if self.__fetch_stats is not None:
+            self.__report_fetch()
         if self._stmt_handle != None:
             while len(self.__blob_readers) > 0:
                 self.__blob_readers.pop().close()
             stmt_handle = self._stmt_handle
+            if _handle_tracker is not None:
+                _handle_tracker._release(HANDLE_STATEMENT, stmt_handle)
+            open_cursor = (self.__executed and not self.__closed and
+                           self.statement_type in (isc_info_sql_stmt_select,
+                                                   isc_info_sql_stmt_select_for_upd))
+            # Named cursors are not recycled, as handle would keep the name
+            recyclable = self._name is None
             self._stmt_handle = None
             self.__executed = False
             self.__prepared = False
@@ -3345,27 +4305,33 @@ class PreparedStatement(object):
             if is_dead_proxy(self.cursor):
                 self.cursor = None
             connection = self.cursor._connection if self.cursor else None
-            if (not connection) or (connection and not connection.closed):
+            if recyclable and connection and not connection.closed:
+                connection._statement_handle_pool.put(stmt_handle, open_cursor)
+            elif (not connection) or (connection and not connection.closed):
                 api.isc_dsql_free_statement(self._isc_status, stmt_handle, ibase.DSQL_drop)
                 if (db_api_error(self._isc_status) and
                     (self._isc_status[1] not in [335544528, 335544485])):
                     raise exception_from_status(DatabaseError, self._isc_status,
                                                 "Error while closing SQL statement:")
+    def _bind(self, parameters):
+        """Moves values from parameters to input XSQLDA.
+        """
+        if not isinstance(parameters, (ListType, TupleType)):
+            raise TypeError("parameters must be list or tuple")
+        if len(parameters) > self._in_sqlda.sqln:
+            raise ProgrammingError("Statement parameter sequence contains"
+                                   " %d parameters, but only %d are allowed" %
+                                   (len(parameters), self._in_sqlda.sqln))
+        self.__bind_parameters(parameters)
     def _execute(self, parameters=None):
+        if self.__fetch_stats is not None:
+            self.__report_fetch()
+        trace = hooks.get(HOOK_STATEMENT_EXECUTED)
+        if trace:
+            start = _hook_timer()
         # Bind parameters
         if parameters:
-            if not isinstance(parameters, (ListType, TupleType)):
-                raise TypeError("parameters must be list or tuple")
-            if len(parameters) > self._in_sqlda.sqln:
-                raise ProgrammingError("Statement parameter sequence contains"
-                                       " %d parameters, but only %d are allowed" %
-                                       (len(parameters), self._in_sqlda.sqln))
-            # Restore original type and size information for input parameters
-            i = 0
-            for sqlvar in self._in_sqlda.sqlvar[:self.n_input_params]:
-                sqlvar.sqltype, sqlvar.sqllen = self._in_sqlda_save[i]
-                i += 1
-            self.__tuple2xsqlda(self._in_sqlda, parameters)
+            self._bind(parameters)
             xsqlda_in = ctypes.cast(ctypes.pointer(self._in_sqlda), XSQLDA_PTR)
         else:
             xsqlda_in = None
@@ -3384,7 +4350,7 @@ class PreparedStatement(object):
             # via fetch*() calls as Python DB API requires. However, it's not
             # possible to call fetch on open such statement, so we'll cache
             # the result and return it in fetchone instead calling fetch.
-            self.__output_cache = self.__xsqlda2tuple(self._out_sqlda)
+            self.__output_cache = self.__decode_row()
         else:
             api.isc_dsql_execute2(self._isc_status, self.cursor._transaction._tr_handle,
                                   self._stmt_handle, self.__sql_dialect, xsqlda_in, None)
@@ -3392,20 +4358,40 @@ class PreparedStatement(object):
                 raise exception_from_status(DatabaseError, self._isc_status,
                                             "Error while executing SQL statement:")
             self.__output_cache = None
+        if self.statement_type == isc_info_sql_stmt_ddl:
+            self.cursor._transaction._ddl_executed = True
         self.__executed = True
         self.__closed = False
         self._last_fetch_status = ISC_STATUS(self.NO_FETCH_ATTEMPTED_YET)
-    def _fetchone(self):
+        if trace:
+            elapsed = _hook_timer() - start
+            for hook in trace:
+                hook(self, elapsed, parameters)
+        if self.n_output_params and hooks.get(HOOK_STATEMENT_FETCHED):
+            self.__fetch_stats = [0.0, 0]
+    def __report_fetch(self):
+        "Passes collected result set fetch statistics to HOOK_STATEMENT_FETCHED hooks."
+        stats = self.__fetch_stats
+        self.__fetch_stats = None
+        for hook in hooks.get(HOOK_STATEMENT_FETCHED, ()):
+            hook(self, stats[0], stats[1])
+    def _fetch_row(self):
+        """Fetch next row of result set into output buffer.
+
+        Returns:
+            True if next row is available in output buffer, False when result
+            set is exhausted.
+        """
         if self._last_fetch_status == self.RESULT_SET_EXHAUSTED and not self.__output_cache:
-            return None
+            return False
         if self.__executed:
             if self.__output_cache:
                 if self._last_fetch_status == self.RESULT_SET_EXHAUSTED:
                     self._free_handle()
-                    return None
+                    return False
                 else:
                     self._last_fetch_status = self.RESULT_SET_EXHAUSTED
-                    return self.__output_cache
+                    return True
             else:
                 if self.n_output_params == 0:
                     raise DatabaseError("Attempt to fetch row of results after statement"
@@ -3414,44 +4400,354 @@ class PreparedStatement(object):
                     self._isc_status,
                     self._stmt_handle,
                     self.__sql_dialect,
-                    ctypes.cast(ctypes.pointer(self._out_sqlda), XSQLDA_PTR))
+                    self.__out_sqlda_ptr)
                 if self._last_fetch_status == 0:
-                    return self.__xsqlda2tuple(self._out_sqlda)
+                    return True
                 elif self._last_fetch_status == self.RESULT_SET_EXHAUSTED:
                     self._free_handle()
-                    return None
+                    return False
                 else:
                     if db_api_error(self._isc_status):
                         raise exception_from_status(DatabaseError, self._isc_status, "Cursor.fetchone:")
+                    return False
         elif self.__closed:
             raise ProgrammingError("Cannot fetch from closed cursor.")
         else:
             raise ProgrammingError("Cannot fetch from this cursor because"
                                    " it has not executed a statement.")
-    def _set_cursor_name(self, name):
-        api.isc_dsql_set_cursor_name(self._isc_status, self._stmt_handle, b(name), 0)
-        if db_api_error(self._isc_status):
-            raise exception_from_status(OperationalError, self._isc_status,
-                                        "Could not set cursor name:")
-        self._name = name
-    def set_stream_blob(self, blob_spec):
-        """Specify a BLOB column(s) to work in `stream` mode instead classic,
-        materialized mode.
-
-        Args:
-            blob_spec (str or list): Single name or sequence of column names. Name must
-                be in format as it's stored in database (refer
-                to :attr:`description` for real value).
-
-                .. important::
-
-                   BLOB name is **permanently** added to the list of BLOBs handled
-                   as `stream` BLOBs by this instance.
-
-            blob_spec (str): Name of BLOB column.
-        """
-        if isinstance(blob_spec, ibase.StringType):
-            self.__streamed_blobs.append(blob_spec)
+    def _fetchone(self, lazy=False):
+        if self.__fetch_stats is not None:
+            return self.__traced_fetchone(lazy)
+        if self._fetch_row():
+            if self.__output_cache:
+                return self.__output_cache
+            if lazy:
+                return self.__make_lazy_row()
+            return self.__decode_row()
+        return None
+    def __traced_fetchone(self, lazy):
+        "Calls :meth:`_fetchone` and adds its duration to result set fetch statistics."
+        stats = self.__fetch_stats
+        self.__fetch_stats = None
+        start = _hook_timer()
+        try:
+            row = self._fetchone(lazy)
+        finally:
+            self.__fetch_stats = stats
+        stats[0] += _hook_timer() - start
+        if row is None:
+            self.__report_fetch()
+        else:
+            stats[1] += 1
+        return row
+    def _get_field_index(self):
+        """Returns (and caches) :class:`_FieldIndex` for result set.
+        """
+        if self.__field_index is None:
+            self.__field_index = _FieldIndex(self.description)
+        return self.__field_index
+    def __get_lazy_plan(self):
+        """Returns (and caches) :class:`_LazyRowPlan` for result set.
+        """
+        if self.__lazy_plan is None:
+            charset = self.__python_charset if (self.__charset or PYTHON_MAJOR_VER == 3) else None
+            decoders = []
+            eager = []
+            varying = []
+            groups = []
+            for i, sqlvar in enumerate(self._out_sqlda.sqlvar[:self.n_output_params]):
+                pad, code, offset = self.__out_layout[i]
+                vartype = sqlvar.sqltype & ~1
+                groups.append(len(varying))
+                if vartype in (SQL_BLOB, SQL_ARRAY):
+                    # BLOB and ARRAY values must be read while statement
+                    # and transaction are active, so they're decoded on fetch.
+                    decoders.append(None)
+                    eager.append(i)
+                elif vartype == SQL_VARYING:
+                    varying.append((offset, sqlvar.sqllen))
+                    decoders.append(_make_raw_varying_decoder(offset, None if sqlvar.sqlsubtype == 1
+                                                              else charset))
+                else:
+                    decoders.append(_make_raw_decoder(struct.Struct('=' + code), offset,
+                                                      self.__converters[i]))
+            self.__lazy_plan = _LazyRowPlan(self._get_field_index(), decoders, eager,
+                                            varying, groups)
+        return self.__lazy_plan
+    def __make_lazy_row(self):
+        """Returns :class:`_LazyRow` for row in output buffer.
+
+        Copy of row buffer contains only used part of VARCHAR values, so values
+        after each VARCHAR are moved towards the start of copy by number of
+        unused bytes in preceding VARCHAR slots (`shifts`).
+        """
+        plan = self.__get_lazy_plan()
+        buf = self.__out_buffer
+        nulls = self.__ind_struct.unpack_from(self.__out_indicators)
+        values = [_UNDECODED] * self.n_output_params
+        if plan.eager:
+            row = self.__row_struct.unpack_from(buf)
+            for i in plan.eager:
+                values[i] = None if nulls[i] == -1 else self.__converters[i](row[i])
+        if not plan.varying:
+            return _LazyRow(plan, buf.raw, nulls, values, _NO_SHIFTS)
+        unpack_from = _VARYING_LENGTH_STRUCT.unpack_from
+        parts = []
+        shifts = [0]
+        start = shift = 0
+        for offset, size in plan.varying:
+            end = offset + 2 + unpack_from(buf, offset)[0]
+            parts.append(buf[start:end])
+            start = offset + 2 + size
+            shift += start - end
+            shifts.append(shift)
+        parts.append(buf[start:len(buf)])
+        return _LazyRow(plan, b''.join(parts), nulls, values, shifts)
+    def __get_array_plan(self, numpy):
+        """Returns (and caches) plan for columnar fetch to NumPy arrays.
+
+        Plan is a tuple with NumPy dtype that maps output buffer to values of
+        columns with native NumPy representation, and list of
+        `(index, native, finalizer)` tuples, one for each column.
+        """
+        if self.__array_plan is None:
+            names = []
+            formats = []
+            offsets = []
+            columns = []
+            for i, sqlvar in enumerate(self._out_sqlda.sqlvar[:self.n_output_params]):
+                pad, code, offset = self.__out_layout[i]
+                vartype = sqlvar.sqltype & ~1
+                fmt = None
+                finalizer = None
+                if vartype in (SQL_SHORT, SQL_LONG, SQL_INT64):
+                    fmt = '=' + code
+                    # Scaled integers are returned as float64
+                    if sqlvar.sqlsubtype or sqlvar.sqlscale:
+                        finalizer = _make_array_scaler(float(_tenTo[abs(sqlvar.sqlscale)]))
+                elif vartype in (SQL_FLOAT, SQL_DOUBLE, SQL_D_FLOAT, SQL_BOOLEAN):
+                    fmt = '=' + code
+                elif vartype == SQL_TYPE_DATE:
+                    fmt = '=i4'
+                    finalizer = _array_isc_date_to_datetime64
+                elif vartype == SQL_TYPE_TIME:
+                    fmt = '=u4'
+                    finalizer = _array_isc_time_to_timedelta64
+                elif vartype == SQL_TIMESTAMP:
+                    fmt = [('date', '=i4'), ('time', '=u4')]
+                    finalizer = _array_isc_timestamp_to_datetime64
+                if fmt is not None:
+                    names.append('c%d' % i)
+                    formats.append(fmt)
+                    offsets.append(offset)
+                columns.append((i, fmt is not None, finalizer))
+            dtype = numpy.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                                 'itemsize': len(self.__out_buffer)})
+            self.__array_plan = (dtype, columns)
+        return self.__array_plan
+    def __fetch_columns(self, numpy, size):
+        """Fetch up to `size` rows (all remaining rows when `size` is None) of
+        result set into column data.
+
+        Returns:
+            Tuple with number of fetched rows, structured NumPy array with raw
+            values of columns with native NumPy representation, 2D NumPy array
+            with NULL flags and dictionary that maps indices of other columns
+            to NumPy object arrays with their values.
+        """
+        stats = self.__fetch_stats
+        if stats is not None:
+            # Add duration and rows to result set fetch statistics
+            self.__fetch_stats = None
+            start = _hook_timer()
+            try:
+                result = self.__fetch_columns(numpy, size)
+            finally:
+                self.__fetch_stats = stats
+            stats[0] += _hook_timer() - start
+            stats[1] += result[0]
+            if size is None or result[0] < size:
+                self.__report_fetch()
+            return result
+        dtype, columns = self.__get_array_plan(numpy)
+        count = self.n_output_params
+        capacity = size if size is not None else 1024
+        raw = numpy.empty(capacity, dtype=dtype)
+        indicators = numpy.empty((capacity, count), dtype=numpy.int16)
+        objects = [(i, numpy.empty(capacity, dtype=object)) for i, native, finalizer
+                   in columns if not native]
+        row_size = dtype.itemsize
+        ind_size = count * ctypes.sizeof(ISC_SHORT)
+        rows = 0
+        while (size is None or rows < size) and self._fetch_row():
+            if rows == capacity:
+                # Grow arrays when fetching all rows
+                capacity *= 2
+                raw = _grow_array(numpy, raw, capacity)
+                indicators = _grow_array(numpy, indicators, capacity)
+                objects = [(i, _grow_array(numpy, values, capacity)) for i, values in objects]
+            ctypes.memmove(raw.ctypes.data + rows * row_size, self.__out_buffer, row_size)
+            ctypes.memmove(indicators.ctypes.data + rows * ind_size,
+                           self.__out_indicators, ind_size)
+            if objects:
+                values = self.__row_struct.unpack_from(self.__out_buffer)
+                for i, column in objects:
+                    if indicators[rows, i] == -1:
+                        column[rows] = None
+                    else:
+                        converter = self.__converters[i]
+                        column[rows] = values[i] if converter is None else converter(values[i])
+            rows += 1
+        return (rows, raw[:rows], indicators[:rows] == -1,
+                dict((i, values[:rows]) for i, values in objects))
+    def _fetch_arrays(self, size=None):
+        """Fetch up to `size` rows (all remaining rows when `size` is None) of
+        result set into NumPy arrays, one for each column.
+
+        Returns:
+            :class:`collections.OrderedDict` that maps column names to
+            :class:`numpy.ma.MaskedArray` instances (masked values are NULLs).
+            Arrays are empty when no more rows are available.
+        """
+        numpy = _import_numpy()
+        dtype, columns = self.__get_array_plan(numpy)
+        rows, raw, nulls, objects = self.__fetch_columns(numpy, size)
+        # Columns with the same name (like unaliased expressions) get unique
+        # keys with numeric suffix (NAME, NAME_1, NAME_2...)
+        names = []
+        for desc in self.description:
+            name = key = desc[DESCRIPTION_NAME]
+            suffix = 0
+            while key in names:
+                suffix += 1
+                key = '%s_%d' % (name, suffix)
+            names.append(key)
+        result = collections.OrderedDict()
+        for i, native, finalizer in columns:
+            if native:
+                data = raw['c%d' % i]
+                if finalizer is not None:
+                    data = finalizer(data)
+                else:
+                    data = data.copy()
+            else:
+                data = objects[i]
+            result[names[i]] = numpy.ma.MaskedArray(data, mask=nulls[:, i])
+        return result
+    def _get_arrow_schema(self):
+        """Returns (and caches) :class:`pyarrow.Schema` for result set.
+        """
+        if self.__arrow_schema is None:
+            pyarrow = _import_pyarrow()
+            charset = self.__python_charset if (self.__charset or PYTHON_MAJOR_VER == 3) else None
+            fields = []
+            for i, sqlvar in enumerate(self._out_sqlda.sqlvar[:self.n_output_params]):
+                vartype = sqlvar.sqltype & ~1
+                if vartype in (SQL_SHORT, SQL_LONG, SQL_INT64):
+                    if sqlvar.sqlsubtype or sqlvar.sqlscale:
+                        # Precision is given by storage type, as values could
+                        # exceed declared precision of NUMERIC/DECIMAL.
+                        arrow_type = pyarrow.decimal128(_INTEGER_DIGITS[vartype],
+                                                        abs(sqlvar.sqlscale))
+                    else:
+                        arrow_type = {SQL_SHORT: pyarrow.int16(), SQL_LONG: pyarrow.int32(),
+                                      SQL_INT64: pyarrow.int64()}[vartype]
+                elif vartype == SQL_FLOAT:
+                    arrow_type = pyarrow.float32()
+                elif vartype in (SQL_DOUBLE, SQL_D_FLOAT):
+                    arrow_type = pyarrow.float64()
+                elif vartype == SQL_BOOLEAN:
+                    arrow_type = pyarrow.bool_()
+                elif vartype == SQL_TYPE_DATE:
+                    arrow_type = pyarrow.date32()
+                elif vartype == SQL_TYPE_TIME:
+                    arrow_type = pyarrow.time64('us')
+                elif vartype == SQL_TIMESTAMP:
+                    arrow_type = pyarrow.timestamp('us')
+                elif vartype in (SQL_TEXT, SQL_VARYING):
+                    arrow_type = (pyarrow.string() if charset and sqlvar.sqlsubtype != 1
+                                  else pyarrow.binary())
+                elif vartype == SQL_BLOB:
+                    arrow_type = (pyarrow.large_string() if charset and sqlvar.sqlsubtype == 1
+                                  else pyarrow.large_binary())
+                elif vartype == SQL_ARRAY:
+                    # Element type is not known without ARRAY descriptor
+                    arrow_type = pyarrow.list_(pyarrow.null())
+                else:
+                    arrow_type = pyarrow.string()
+                desc = self.description[i]
+                fields.append(pyarrow.field(desc[DESCRIPTION_NAME], arrow_type,
+                                            desc[DESCRIPTION_NULL_OK]))
+            self.__arrow_schema = pyarrow.schema(fields)
+        return self.__arrow_schema
+    def _fetch_record_batch(self, size):
+        """Fetch up to `size` rows of result set into Apache Arrow record batch.
+
+        Returns:
+            :class:`pyarrow.RecordBatch`, or None when no more rows are available.
+        """
+        pyarrow = _import_pyarrow()
+        numpy = _import_numpy()
+        schema = self._get_arrow_schema()
+        dtype, columns = self.__get_array_plan(numpy)
+        rows, raw, nulls, objects = self.__fetch_columns(numpy, size)
+        if rows == 0:
+            return None
+        arrays = []
+        for i, native, finalizer in columns:
+            arrow_type = schema.field(i).type
+            mask = nulls[:, i]
+            if native:
+                data = raw['c%d' % i]
+                if pyarrow.types.is_decimal(arrow_type):
+                    arrays.append(_arrow_decimal_array(pyarrow, numpy, data, mask, arrow_type))
+                    continue
+                if pyarrow.types.is_time(arrow_type):
+                    data = data.astype('int64') * 100
+                elif finalizer is not None:
+                    data = finalizer(data)
+                else:
+                    data = numpy.ascontiguousarray(data)
+            else:
+                data = objects[i]
+                if pyarrow.types.is_large_string(arrow_type) or pyarrow.types.is_large_binary(arrow_type):
+                    # Stream BLOBs are materialized
+                    for j, value in enumerate(data):
+                        if isinstance(value, BlobReader):
+                            data[j] = value.read()
+                            value.close()
+                elif pyarrow.types.is_list(arrow_type):
+                    arrays.append(pyarrow.array(data, mask=mask))
+                    continue
+            arrays.append(pyarrow.array(data, mask=mask, type=arrow_type))
+        if any(pyarrow.types.is_list(field.type) for field in schema):
+            # Types of ARRAY columns are given by their values
+            return pyarrow.RecordBatch.from_arrays(arrays, names=schema.names)
+        return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+    def _set_cursor_name(self, name):
+        api.isc_dsql_set_cursor_name(self._isc_status, self._stmt_handle, b(name), 0)
+        if db_api_error(self._isc_status):
+            raise exception_from_status(OperationalError, self._isc_status,
+                                        "Could not set cursor name:")
+        self._name = name
+    def set_stream_blob(self, blob_spec):
+        """Specify a BLOB column(s) to work in `stream` mode instead classic,
+        materialized mode.
+
+        Args:
+            blob_spec (str or list): Single name or sequence of column names. Name must
+                be in format as it's stored in database (refer
+                to :attr:`description` for real value).
+
+                .. important::
+
+                   BLOB name is **permanently** added to the list of BLOBs handled
+                   as `stream` BLOBs by this instance.
+
+            blob_spec (str): Name of BLOB column.
+        """
+        if isinstance(blob_spec, ibase.StringType):
+            self.__streamed_blobs.append(blob_spec)
         else:
             self.__streamed_blobs.extend(blob_spec)
     def set_stream_blob_treshold(self, size):
@@ -3524,6 +4820,44 @@ class Cursor(object):
     #: efficiency because the database engine only supports fetching a single row
     #: at a time.
     arraysize = 1
+    #: bool: (R/W) When True, fetch methods return rows that hold copy of raw
+    #: row data and decode field values only when they are accessed for the
+    #: first time (by position or by name). This could save a lot of time when
+    #: only few fields of wide result set rows are actually used. BLOB and ARRAY
+    #: values are always read when row is fetched.
+    lazy_rows = False
+    #: int: (R/W) When greater than zero, rows of result set are fetched and
+    #: decoded ahead in background thread, while application processes rows
+    #: fetched earlier. The value is max. number of rows that could be fetched
+    #: ahead (the depth of queue between background thread and fetch methods).
+    #: This could hide most of network latency when rows are fetched from
+    #: remote server. Background fetch is stopped when cursor is closed,
+    #: executes another statement or its transaction ends, and any error
+    #: reported by the fetch is raised by the next fetch method call.
+    prefetch = 0
+    #: (Read/Write) When True, values of ARRAY columns are returned as NumPy
+    #: arrays (with shape given by ARRAY dimensions) that are read directly from
+    #: server into array memory. Integers with scale are returned as float64,
+    #: dates and times as datetime64/timedelta64 values, and arrays of CHAR or
+    #: VARCHAR as arrays of objects. NumPy arrays are accepted as values of ARRAY
+    #: parameters regardless of this setting.
+    numpy_arrays = False
+    #: bool: (R/W) When True, INSERT, UPDATE, DELETE and MERGE statements without
+    #: RETURNING clause passed to :meth:`execute` as strings are not prepared, but
+    #: executed in single API call via :meth:`Transaction.execute_immediate` (with
+    #: parameter values described by their Python types). This saves several
+    #: server round trips for statements that are executed only once, but
+    #: :attr:`rowcount` is not available for such statements.
+    immediate_dml = False
+    #: int: (R/W) When greater than one, :meth:`executemany` executes INSERT, UPDATE
+    #: and DELETE statements (without RETURNING clause) in batches of up to this
+    #: number of parameter sets, each packed into single generated EXECUTE BLOCK
+    #: statement. Batches are made smaller when necessary to fit into limits of
+    #: statement and message size.
+    executemany_batch_size = 0
+    #: Value returned by :meth:`executebatch` for parameter sets executed
+    #: successfully, when number of affected rows is not known.
+    BATCH_SUCCESS_NO_INFO = ibase.IBatchCompletionState_SUCCESS_NO_INFO
 
     def __init__(self, connection, transaction):
         """
@@ -3540,6 +4874,10 @@ class Cursor(object):
         self._connection = connection
         self._transaction = transaction
         self._ps = None  # current prepared statement
+        self._prefetcher = None
+        # Serializes use of statement handle by background fetch and
+        # by accessors of statement information
+        self.__ps_lock = threading.RLock()
     def next(self):
         """Return the next item from the container. Part of *iterator protocol*.
 
@@ -3561,15 +4899,17 @@ class Cursor(object):
         except ReferenceError:
             return False
     def __get_description(self):
-        if self.__valid_ps():
-            return self._ps.description
-        else:
-            return []
+        with self.__ps_lock:
+            if self.__valid_ps():
+                return self._ps.description
+            else:
+                return []
     def __get_rowcount(self):
-        if self.__valid_ps():
-            return self._ps.rowcount
-        else:
-            return -1
+        with self.__ps_lock:
+            if self.__valid_ps():
+                return self._ps.rowcount
+            else:
+                return -1
     def __get_name(self):
         if self.__valid_ps():
             return self._ps._name
@@ -3586,12 +4926,14 @@ class Cursor(object):
         if self._ps._name:
             raise ProgrammingError("Cursor's name has already been declared in"
                                    " context of currently executed statement")
-        self._ps._set_cursor_name(name)
+        with self.__ps_lock:
+            self._ps._set_cursor_name(name)
     def __get_plan(self):
-        if self.__valid_ps():
-            return self._ps.plan
-        else:
-            return None
+        with self.__ps_lock:
+            if self.__valid_ps():
+                return self._ps.plan
+            else:
+                return None
     def __get_connection(self):
         return self._connection
     def __get_transaction(self):
@@ -3600,6 +4942,22 @@ class Cursor(object):
         self._connection = None
     def __ps_deleted(self, obj):
         self._ps = None
+    def __stop_prefetch(self):
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+    def __check_prefetch(self):
+        if self._prefetcher is not None:
+            raise ProgrammingError("Cannot fetch columns from cursor while"
+                                   " rows are prefetched.")
+    def __release_ps(self):
+        ps = self._ps
+        ps.close()
+        self._ps = None
+        # Internally created PreparedStatements are returned to statement cache
+        if not isinstance(ps, weakref.ProxyType):
+            if self._connection is not None and not is_dead_proxy(self._connection):
+                self._connection._statement_cache.put(ps, self._transaction)
     def _set_as_internal(self):
         self._connection = weakref.proxy(self._connection,
                                          _weakref_callback(self.__connection_deleted))
@@ -3650,11 +5008,11 @@ class Cursor(object):
            If you’ll take advantage of this anomaly, your code would be less
            portable to other Python DB API 2.0 compliant drivers.
         """
+        self.__stop_prefetch()
         if is_dead_proxy(self._ps):
             self._ps = None
         if self._ps != None:
-            self._ps.close()
-            self._ps = None
+            self.__release_ps()
     def execute(self, operation, parameters=None):
         """Prepare and execute a database operation (query or command).
 
@@ -3662,8 +5020,9 @@ class Cursor(object):
            Execution is handled by :class:`PreparedStatement` that is either
            supplied as `operation` parameter, or created internally when
            `operation` is a string. Internally created PreparedStatements are
-           stored in cache for later reuse, when the same `operation` string is
-           used again.
+           stored in :attr:`Connection.statement_cache` for later reuse, when
+           the same `operation` string is used again in context of the same
+           :class:`Transaction`.
 
         Returns:
             `self` so call to execute could be used as iterator.
@@ -3681,24 +5040,38 @@ class Cursor(object):
             fdb.ProgrammingError: When more parameters than expected are suplied.
             fdb.DatabaseError: When error is returned by server.
         """
+        self.__stop_prefetch()
         if is_dead_proxy(self._ps):
             self._ps = None
         if self._ps != None:
             # Dirty trick to check whether operation when it's
             # PreparedStatement is the one we (may) have weak proxy for
             if self._ps.__repr__.__self__ is not operation:
-                self._ps.close()
+                self.__release_ps()
         if not self._transaction.active:
             self._transaction.begin()
+        if (self.immediate_dml and isinstance(operation, (StringType, UnicodeType)) and
+                _is_immediate_dml(operation)):
+            self._transaction._execute_immediate2(self._connection, operation,
+                                                  parameters, None)
+            return self
+        self.__set_statement(operation)
+        self._ps._execute(parameters)
+        # return self so `execute` call could be used as iterable
+        return self
+    def __set_statement(self, operation):
+        "Makes `operation` (or cached statement prepared for it) current statement."
         if isinstance(operation, PreparedStatement):
             if operation.cursor is not self:
                 raise ValueError("PreparedStatement was created by different Cursor.")
             self._ps = weakref.proxy(operation, _weakref_callback(self.__ps_deleted))
         else:
-            self._ps = PreparedStatement(operation, self, True)
-        self._ps._execute(parameters)
-        # return self so `execute` call could be used as iterable
-        return self
+            ps = self._connection._statement_cache.get(operation, self._transaction)
+            if ps is None:
+                ps = PreparedStatement(operation, self, True)
+            else:
+                ps._set_cursor(self)
+            self._ps = ps
     def prep(self, operation):
         """Create prepared statement for repeated execution.
 
@@ -3732,6 +5105,12 @@ class Cursor(object):
            direct use of prepared statement and calling `execute` in a loop
            directly in application.
 
+           When :attr:`executemany_batch_size` is set, DML statements are executed
+           in batches packed into EXECUTE BLOCK statements instead, so one server
+           round trip executes many parameter sets. Each batch is executed as
+           a whole (if any parameter set fails, none from the same batch is
+           applied), and :attr:`rowcount` is not available.
+
         Returns:
             `self` so call to executemany could be used as iterator.
 
@@ -3748,11 +5127,113 @@ class Cursor(object):
             fdb.ProgrammingError: When there are more parameters in any sequence than expected.
             fdb.DatabaseError: When error is returned by server.
         """
+        if self.executemany_batch_size > 1:
+            if isinstance(operation, PreparedStatement):
+                if operation.cursor is not self:
+                    raise ValueError("PreparedStatement was created by different Cursor.")
+                sql = operation.sql
+            else:
+                sql = operation
+            if not self._transaction.active:
+                self._transaction.begin()
+            template = self._connection._get_execute_block(sql, self)
+            if template is not None:
+                self.__execute_blocks(template, seq_of_parameters)
+                return self
         if not isinstance(operation, PreparedStatement):
             operation = self.prep(operation)
         for parameters in seq_of_parameters:
             self.execute(operation, parameters)
         return self
+    def __execute_blocks(self, template, seq_of_parameters):
+        """Executes DML statement for all parameter sets in batches packed into
+        EXECUTE BLOCK statements.
+        """
+        batch_size = min(self.executemany_batch_size, template.max_rows)
+        n_params = template.n_params
+        batch = []
+        for parameters in seq_of_parameters:
+            if not isinstance(parameters, (ListType, TupleType)):
+                raise TypeError("parameters must be list or tuple")
+            if len(parameters) != n_params:
+                raise ProgrammingError("Statement parameter sequence contains"
+                                       " %d parameters, but %d are required" %
+                                       (len(parameters), n_params))
+            batch.extend(parameters)
+            if len(batch) == batch_size * n_params:
+                self.execute(template.get_block(batch_size), batch)
+                batch = []
+        # Remaining parameter sets are executed in blocks of power-of-two sizes,
+        # so only few distinct blocks have to be prepared (and cached).
+        rows = len(batch) // n_params
+        start = 0
+        while rows:
+            size = 1 << (rows.bit_length() - 1)
+            end = start + size * n_params
+            self.execute(template.sql if size == 1 else template.get_block(size),
+                         batch[start:end])
+            start = end
+            rows -= size
+    def executebatch(self, operation, seq_of_parameters):
+        """Execute DML statement for all parameter sets found in `seq_of_parameters`
+        using native batch interface of Firebird 4, which passes many parameter
+        sets to server in single round trip.
+
+        When batch interface is not available (server or client library older
+        than Firebird 4), or statement could not be executed in batch (it returns
+        values or has ARRAY parameters), it's executed for each parameter set
+        separately like in :meth:`executemany`.
+
+        Note:
+           Execution stops at first parameter set that fails, and error is raised.
+           Parameter sets that precede it remain executed.
+
+        Args:
+            operation (str or :class:`PreparedStatement`): SQL command specification.
+            seq_of_parameters (list or tuple): Sequence of sequences of parameters.
+                Must contain one sequence of parameters for each execution that has
+                one entry for each argument that the operation expects.
+
+        Returns:
+            List with number of rows affected by execution for each parameter set,
+            or :attr:`BATCH_SUCCESS_NO_INFO` for each parameter set when number is
+            not known.
+
+        Raises:
+            ValueError: When operation PreparedStatement belongs to different Cursor instance.
+            TypeError: When parameter set is not List or Tuple.
+            fdb.ProgrammingError: When number of parameters in any set does not match
+                the statement.
+            fdb.DatabaseError: When error is returned by server.
+        """
+        self.__stop_prefetch()
+        if is_dead_proxy(self._ps):
+            self._ps = None
+        if self._ps != None:
+            if self._ps.__repr__.__self__ is not operation:
+                self.__release_ps()
+        if not self._transaction.active:
+            self._transaction.begin()
+        self.__set_statement(operation)
+        batch = None
+        if _batch_supported(self._connection):
+            batch = _StatementBatch(self._ps, self._transaction)
+            if not batch.supported:
+                batch.close()
+                batch = None
+        if batch is None:
+            counts = []
+            for parameters in seq_of_parameters:
+                self._ps._execute(parameters)
+                counts.append(self.BATCH_SUCCESS_NO_INFO)
+            return counts
+        try:
+            for parameters in seq_of_parameters:
+                batch.add(parameters)
+            batch.execute()
+        finally:
+            batch.close()
+        return batch.counts
     def fetchone(self):
         """Fetch the next row of a query result set.
 
@@ -3766,7 +5247,19 @@ class Cursor(object):
                 unknown status is returned by fetch operation.
         """
         if self._ps:
-            return self._ps._fetchone()
+            if self.prefetch > 0:
+                if self._prefetcher is None:
+                    self._prefetcher = _RowPrefetcher(self._ps, self.prefetch, self.lazy_rows,
+                                                      self.__ps_lock)
+                try:
+                    row = self._prefetcher.get()
+                except:
+                    self.__stop_prefetch()
+                    raise
+                if row is None:
+                    self.__stop_prefetch()
+                return row
+            return self._ps._fetchone(self.lazy_rows)
         else:
             raise ProgrammingError("Cannot fetch from this cursor because"
                                    " it has not executed a statement.")
@@ -3831,7 +5324,7 @@ class Cursor(object):
         """
         row = self.fetchone()
         if row:
-            row = _RowMapping(self.description, row)
+            row = _RowMapping(self._ps._get_field_index(), row)
         return row
     def fetchmanymap(self, size=arraysize):
         """Fetch the next set of rows of a query result, like :meth:`fetchmany`,
@@ -3891,6 +5384,99 @@ class Cursor(object):
             Iterator that yields :class:`fbcore._RowMapping` instance like :meth:`fetchonemap`.
         """
         return utils.Iterator(self.fetchonemap, None)
+    def fetch_arrays(self, size=None):
+        """Fetch the next set of rows (or all remaining rows) of a query result
+        as columns, each stored in single NumPy array.
+
+        Values are decoded directly from output buffer into typed arrays, without
+        creating Python object for each value:
+
+        * SMALLINT, INTEGER and BIGINT values are stored as `int16`, `int32` and `int64`.
+        * NUMERIC and DECIMAL values are stored as `float64`.
+        * FLOAT and DOUBLE PRECISION values are stored as `float32` and `float64`.
+        * BOOLEAN values are stored as `bool`.
+        * DATE and TIMESTAMP values are stored as `datetime64[D]` and `datetime64[us]`.
+        * TIME values are stored as `timedelta64[us]` (time since midnight).
+        * Values of other data types are stored as Python objects (like in :meth:`fetchone`).
+
+        Keyword Args:
+           size (int): Max. number of rows to fetch. If it's not specified, all
+               remaining rows are fetched.
+
+        Returns:
+            :class:`collections.OrderedDict` that maps column names to
+            :class:`numpy.ma.MaskedArray` instances, where masked values represent NULLs.
+            Arrays are empty when no more rows are available. When several columns
+            have the same name, second and next ones are stored under name with
+            numeric suffix (for example `ADD`, `ADD_1`, `ADD_2`).
+
+        Raises:
+            ImportError: When NumPy is not installed.
+            fdb.DatabaseError: When error is returned by server.
+            fdb.ProgrammingError: When underlying :class:`PreparedStatement` is
+                closed, statement was not yet executed, or
+                unknown status is returned by fetch operation.
+
+        .. note:: NumPy is optional dependency, that is required only by this method
+           and :meth:`iter_arrays`.
+        """
+        if self._ps:
+            self.__check_prefetch()
+            return self._ps._fetch_arrays(size)
+        else:
+            raise ProgrammingError("Cannot fetch from this cursor because"
+                                   " it has not executed a statement.")
+    def iter_arrays(self, batch=10000):
+        """Equivalent to the :meth:`fetch_arrays`, except that it returns iterator
+        over batches of rows rather than all rows at once.
+
+        Keyword Args:
+           batch (int): Max. number of rows in single batch.
+
+        Returns:
+            Iterator that yields :class:`collections.OrderedDict` of column arrays
+            like :meth:`fetch_arrays`, one for each batch of rows.
+        """
+        while True:
+            columns = self.fetch_arrays(batch)
+            if not columns or len(next(iter(columns.values()))) == 0:
+                return
+            yield columns
+    def iter_record_batches(self, batch_rows=65536):
+        """Returns iterator over result set as Apache Arrow record batches.
+
+        Values are decoded directly from output buffer into Arrow arrays (see
+        :meth:`fetch_arrays` for details). Arrow data types are derived from
+        :attr:`description`: NUMERIC and DECIMAL are `decimal128`, DATE, TIME and
+        TIMESTAMP are `date32`, `time64[us]` and `timestamp[us]`, CHAR and VARCHAR
+        are `string` (or `binary` for OCTETS) and BLOBs are `large_string` or
+        `large_binary`. Types of ARRAY columns are inferred from values.
+
+        Keyword Args:
+           batch_rows (int): Max. number of rows in single batch.
+
+        Returns:
+            Iterator that yields :class:`pyarrow.RecordBatch` instances.
+
+        Raises:
+            ImportError: When PyArrow or NumPy is not installed.
+            fdb.DatabaseError: When error is returned by server.
+            fdb.ProgrammingError: When underlying :class:`PreparedStatement` is
+                closed, statement was not yet executed, or
+                unknown status is returned by fetch operation.
+
+        .. seealso:: :mod:`fdb.arrow` for functions that write result set to
+           Arrow IPC or Parquet files.
+        """
+        if not self._ps:
+            raise ProgrammingError("Cannot fetch from this cursor because"
+                                   " it has not executed a statement.")
+        self.__check_prefetch()
+        while True:
+            batch = self._ps._fetch_record_batch(batch_rows)
+            if batch is None:
+                return
+            yield batch
     def setinputsizes(self, sizes):
         """Required by Python DB API 2.0, but pointless for Firebird, so it
         does nothing."""
@@ -3938,6 +5524,23 @@ class Cursor(object):
             self._ps.set_stream_blob_treshold(size)
         else:
             raise ProgrammingError
+    def create_blob(self, stream=True):
+        """Create new BLOB in cursor's transaction, and return :class:`BlobWriter`
+        for writing its content. Pass returned writer (or its
+        :attr:`~BlobWriter.blob_id`) as value of BLOB parameter to store the BLOB.
+
+        Keyword Args:
+            stream (bool): Create `stream` BLOB (True) or segmented BLOB (False).
+
+        Returns:
+            :class:`BlobWriter` instance.
+
+        Raises:
+            fdb.DatabaseError: When error is returned by server.
+        """
+        if not self._transaction.active:
+            self._transaction.begin()
+        return BlobWriter(self._connection._db_handle, self._transaction._tr_handle, stream)
     def __del__(self):
         self.close()
     #: list: (R/O) List of tuples (with 7-item).
@@ -4030,6 +5633,9 @@ class Transaction(object):
         self._cursors = []  # Weak references to cursors
         self._isc_status = ISC_STATUS_ARRAY()
         self._tr_handle = None
+        # True when statement that may change metadata was executed
+        self._ddl_executed = False
+        self._blob_cache = _BlobCache()
         self.__closed = False
     def __enter__(self):
         return self
@@ -4038,6 +5644,8 @@ class Transaction(object):
     def __get_closed(self):
         return self.__closed
         #return self._tr_handle == None
+    def __get_blob_cache(self):
+        return self._blob_cache
     def __get_active(self):
         return self._tr_handle != None
     def __get_cursors(self):
@@ -4050,6 +5658,19 @@ class Transaction(object):
             c = cursor()
             if c:
                 c.close()
+    def __invalidate_statement_caches(self, transaction_closed=False):
+        # Prepared statements may not survive metadata changes
+        for connection in self._connections:
+            con = connection()
+            if con is not None and not con.closed:
+                if self._ddl_executed:
+                    con._statement_cache.clear()
+                    con._array_desc_cache.clear()
+                    con._metadata_cache.clear()
+                    con._execute_block_cache.clear()
+                elif transaction_closed:
+                    con._statement_cache.invalidate(self)
+        self._ddl_executed = False
     def __con_in_list(self, connection):
         for con in self._connections:
             if con() == connection:
@@ -4077,15 +5698,35 @@ class Transaction(object):
     def __get_lock_timeout(self):
         return self.trans_info(isc_info_tra_lock_timeout)
 
-    def execute_immediate(self, sql):
+    def execute_immediate(self, sql, parameters=None, returning=None):
         """Executes a statement without caching its prepared form on
            **all connections** this transaction is bound to.
 
         Automatically starts transaction if it's not already started.
 
+        Statement with `parameters` (or `returning`) is executed without prepare
+        in single API call (`isc_dsql_exec_immed2`). As statement is not described
+        by server, parameter values are passed to server in types determined by
+        their Python types (strings longer than 32767 bytes and file-like objects
+        are written into BLOBs), and server converts them to types required by
+        the statement.
+
         Args:
             sql (str): SQL statement to execute.
 
+        Keyword Args:
+            parameters (list or tuple): Sequence of parameters. Must contain one
+                entry for each argument that the statement expects.
+            returning (list or tuple): Sequence of Python types (`int`, `float`,
+                `decimal.Decimal`, `str`, `bytes`, `bool`, `datetime.date`,
+                `datetime.time` or `datetime.datetime`) of values returned by
+                singleton statement (for example by `RETURNING` clause of INSERT),
+                one for each returned value.
+
+        Returns:
+            Tuple with values returned by statement when `returning` is specified,
+            otherwise None.
+
         .. important::
 
             **The statement must not be of a type that returns a result set.**
@@ -4094,14 +5735,199 @@ class Transaction(object):
             create a cursor using the connection’s cursor method, then execute
             the statement using one of the cursor’s execute methods.
 
+        Note:
+           Statements executed with `parameters` or `returning` are considered to
+           be DML statements, so they don't invalidate cached prepared statements.
+
         Raises:
+            TypeError: When parameters is not List or Tuple, or `returning` contains
+                unsupported type.
+            fdb.ProgrammingError: When `returning` is specified for transaction
+                bound to more than one connection.
             fdb.DatabaseError: When error is returned from server.
         """
+        if parameters is None and returning is None:
+            if _may_change_metadata(sql):
+                self._ddl_executed = True
+            self.__execute_immediate(sql)
+            return None
+        if returning is not None and len(self._connections) > 1:
+            raise ProgrammingError("Values returned by statement are not supported"
+                                   " for transaction bound to more than one connection.")
+        if not self.active:
+            self.begin()
+        result = None
+        for connection in self._connections:
+            result = self._execute_immediate2(connection(), sql, parameters, returning)
+        return result
+    def _execute_immediate2(self, connection, sql, parameters, returning):
+        """Executes statement with parameters without prepare via `isc_dsql_exec_immed2`
+        on specified connection. Transaction must be active.
+        """
+        if parameters is None:
+            parameters = ()
+        elif not isinstance(parameters, (ListType, TupleType)):
+            raise TypeError("parameters must be list or tuple")
+        trace = hooks.get(HOOK_STATEMENT_EXECUTED)
+        if trace:
+            start = _hook_timer()
+        keep = []
+        in_sqlda = self.__describe_immediate_input(connection, parameters, keep)
+        out_sqlda = None
+        converters = ()
+        if returning:
+            out_sqlda, converters = self.__describe_immediate_output(connection, returning, keep)
+        command = b(sql, connection._python_charset)
+        api.isc_dsql_exec_immed2(self._isc_status, connection._db_handle, self._tr_handle,
+                                 len(command), command, connection.sql_dialect,
+                                 ctypes.cast(ctypes.pointer(in_sqlda), XSQLDA_PTR),
+                                 None if out_sqlda is None else
+                                 ctypes.cast(ctypes.pointer(out_sqlda), XSQLDA_PTR))
+        if db_api_error(self._isc_status):
+            raise exception_from_status(DatabaseError, self._isc_status,
+                                        "Error while executing SQL statement:")
+        if trace:
+            elapsed = _hook_timer() - start
+            for hook in trace:
+                hook(sql, elapsed, parameters)
+        if out_sqlda is None:
+            return None
+        return tuple([None if sqlvar.sqlind[0] == -1 else convert()
+                      for sqlvar, convert in zip(out_sqlda.sqlvar, converters)])
+    def __describe_immediate_input(self, connection, parameters, keep):
+        """Returns input XSQLDA with values of `parameters` described by their Python types.
+        Buffers that must be kept alive during execution are appended to `keep`.
+        """
+        xsqlda = xsqlda_factory(max(len(parameters), 1))
+        xsqlda.sqld = len(parameters)
+        python_charset = connection._python_charset
+        for i, value in enumerate(parameters):
+            sqlvar = xsqlda.sqlvar[i]
+            sqlvar.sqlscale = 0
+            sqlvar.sqlsubtype = 0
+            if value is None:
+                keep.append(_new_sqlvar_buffer(sqlvar, SQL_TEXT, b(' '), True))
+                continue
+            if isinstance(value, bool):
+                if connection.engine_version >= 3.0:
+                    sqltype, data = SQL_BOOLEAN, struct.pack('=b', value)
+                else:
+                    sqltype, data = SQL_SHORT, struct.pack('=h', value)
+            elif isinstance(value, (int, mylong)) and (LONG_MIN <= value <= LONG_MAX):
+                sqltype, data = SQL_INT64, struct.pack('=q', value)
+            elif isinstance(value, float):
+                sqltype, data = SQL_DOUBLE, struct.pack('=d', value)
+            elif isinstance(value, datetime.datetime):
+                sqltype = SQL_TIMESTAMP
+                data = _ISC_TIMESTAMP_STRUCT.pack(_date_to_isc_date(value),
+                                                  _time_to_isc_time(value))
+            elif isinstance(value, datetime.date):
+                sqltype, data = SQL_TYPE_DATE, _ISC_DATE_STRUCT.pack(_date_to_isc_date(value))
+            elif isinstance(value, datetime.time):
+                sqltype, data = SQL_TYPE_TIME, _ISC_TIME_STRUCT.pack(_time_to_isc_time(value))
+            elif isinstance(value, (BlobWriter, ISC_QUAD)) or hasattr(value, 'read'):
+                sqltype, data = SQL_BLOB, self.__write_immediate_blob(connection, value)
+            else:
+                sqltype = None
+                if isinstance(value, decimal.Decimal) and value.is_finite():
+                    # Decimals with up to 18 decimal places are passed as scaled INT64
+                    exponent = min(value.as_tuple().exponent, 0)
+                    if exponent >= -18:
+                        scaled = int(value.scaleb(-exponent))
+                        if LONG_MIN <= scaled <= LONG_MAX:
+                            sqltype, data = SQL_INT64, struct.pack('=q', scaled)
+                            sqlvar.sqlscale = exponent
+                if sqltype is None:
+                    # Everything else is passed as string
+                    if not isinstance(value, (UnicodeType, StringType, ibase.mybytes)):
+                        value = str(value)
+                    if isinstance(value, UnicodeType):
+                        value = value.encode(python_charset)
+                        if connection.charset:
+                            sqlvar.sqlsubtype = _CS_DYNAMIC
+                    if len(value) > SHRT_MAX:
+                        sqlvar.sqlsubtype = 0
+                        sqltype, data = SQL_BLOB, self.__write_immediate_blob(connection, value)
+                    else:
+                        sqltype, data = SQL_TEXT, value
+            keep.append(_new_sqlvar_buffer(sqlvar, sqltype, data))
+        return xsqlda
+    def __write_immediate_blob(self, connection, value):
+        "Writes `value` to new BLOB, and returns BLOB ID as bytes."
+        if isinstance(value, BlobWriter):
+            # BLOB was already written by application
+            value.close()
+            blobid = value.blob_id
+        elif isinstance(value, ISC_QUAD):
+            blobid = value
+        else:
+            writer = BlobWriter(connection._db_handle, self._tr_handle,
+                                stream=hasattr(value, 'read'))
+            if writer.is_stream:
+                writer.write_from(value)
+            else:
+                writer.write(value)
+            writer.close()
+            blobid = writer.blob_id
+        return ctypes.string_at(ctypes.addressof(blobid), ctypes.sizeof(ISC_QUAD))
+    def __describe_immediate_output(self, connection, returning, keep):
+        """Returns output XSQLDA and list of value converters for values of
+        Python types listed in `returning`. Buffers that must be kept alive
+        during execution are appended to `keep`.
+        """
+        xsqlda = xsqlda_factory(len(returning))
+        xsqlda.sqld = len(returning)
+        charset = connection._python_charset
+        converters = []
+        for i, kind in enumerate(returning):
+            sqlvar = xsqlda.sqlvar[i]
+            sqlvar.sqlscale = 0
+            sqlvar.sqlsubtype = 0
+            if kind is bool:
+                sqltype, code, converter = SQL_BOOLEAN, '=b', bool
+            elif kind in (int, mylong):
+                sqltype, code, converter = SQL_INT64, '=q', None
+            elif kind is float:
+                sqltype, code, converter = SQL_DOUBLE, '=d', None
+            elif kind is datetime.datetime:
+                sqltype, code, converter = SQL_TIMESTAMP, '=8s', _isc_timestamp_to_datetime
+            elif kind is datetime.date:
+                sqltype, code, converter = SQL_TYPE_DATE, '=i', _isc_date_to_date
+            elif kind is datetime.time:
+                sqltype, code, converter = SQL_TYPE_TIME, '=I', _isc_time_to_time
+            elif kind is ibase.mybytes:
+                sqltype, code, converter = SQL_VARYING, None, None
+            elif kind in (UnicodeType, StringType):
+                sqltype, code = SQL_VARYING, None
+                converter = lambda value: value.decode(charset, 'replace')
+                if connection.charset:
+                    sqlvar.sqlsubtype = _CS_DYNAMIC
+            elif kind is decimal.Decimal:
+                sqltype, code = SQL_VARYING, None
+                converter = lambda value: decimal.Decimal(value.decode('ascii'))
+            else:
+                raise TypeError("Type %s is not supported for returned values." % kind)
+            if code is None:
+                buffers = _new_sqlvar_buffer(sqlvar, sqltype,
+                                             b('\0') * (_IMMEDIATE_VARYING_SIZE + 2))
+                sqlvar.sqllen = _IMMEDIATE_VARYING_SIZE
+                converters.append(_make_varying_output_converter(buffers[0], converter))
+            else:
+                unpacker = struct.Struct(code)
+                buffers = _new_sqlvar_buffer(sqlvar, sqltype, b('\0') * unpacker.size)
+                converters.append(_make_fixed_output_converter(buffers[0], unpacker, converter))
+            keep.append(buffers)
+        return xsqlda, converters
+    def __execute_immediate(self, sql):
         if not self.active:
             self.begin()
+        operation = sql
+        trace = hooks.get(HOOK_STATEMENT_EXECUTED)
         for connection in self._connections:
             con = connection()
-            sql = b(sql, con._python_charset)
+            if trace:
+                start = _hook_timer()
+            sql = b(operation, con._python_charset)
             xsqlda = xsqlda_factory(1)
 
                 # For yet unknown reason, the isc_dsql_execute_immediate segfaults when
@@ -4112,6 +5938,10 @@ class Transaction(object):
             if db_api_error(self._isc_status):
                 raise exception_from_status(DatabaseError, self._isc_status,
                                             "Error while executing SQL statement:")
+            if trace:
+                elapsed = _hook_timer() - start
+                for hook in trace:
+                    hook(operation, elapsed, None)
     def _finish(self):
         if self._tr_handle != None:
             try:
@@ -4184,6 +6014,9 @@ class Transaction(object):
                 self._tr_handle = None
                 raise exception_from_status(DatabaseError, self._isc_status,
                                             "Error while starting transaction:")
+        if _handle_tracker is not None:
+            _handle_tracker._register(HANDLE_TRANSACTION, self._tr_handle,
+                                      tuple(con()._db_handle.value for con in self._connections))
     def commit(self, retaining=False):
         """Commit any pending transaction to the database.
 
@@ -4202,6 +6035,10 @@ class Transaction(object):
         """
         if not self.active:
             return
+        trace = hooks.get(HOOK_TRANSACTION_COMMITTED)
+        if trace:
+            start = _hook_timer()
+        self._blob_cache.clear()
         if retaining:
             api.isc_commit_retaining(self._isc_status, self._tr_handle)
         else:
@@ -4210,8 +6047,16 @@ class Transaction(object):
         if db_api_error(self._isc_status):
             raise exception_from_status(DatabaseError, self._isc_status,
                                         "Error while commiting transaction:")
+        if trace:
+            elapsed = _hook_timer() - start
+            for hook in trace:
+                hook(self, elapsed, retaining)
         if not retaining:
+            if _handle_tracker is not None:
+                _handle_tracker._release(HANDLE_TRANSACTION, self._tr_handle)
             self._tr_handle = None
+        if self._ddl_executed:
+            self.__invalidate_statement_caches()
     def rollback(self, retaining=False, savepoint=None):
         """Rollback any pending transaction to the database.
 
@@ -4239,9 +6084,13 @@ class Transaction(object):
         if retaining and savepoint:
             raise ProgrammingError("Can't rollback to savepoint while"
                                    " retaining context")
+        self._blob_cache.clear()
         if savepoint:
-            self.execute_immediate('rollback to %s' % savepoint)
+            self.__execute_immediate('rollback to %s' % savepoint)
         else:
+            trace = hooks.get(HOOK_TRANSACTION_ROLLED_BACK)
+            if trace:
+                start = _hook_timer()
             if retaining:
                 api.isc_rollback_retaining(self._isc_status, self._tr_handle)
             else:
@@ -4250,8 +6099,16 @@ class Transaction(object):
             if db_api_error(self._isc_status):
                 raise exception_from_status(DatabaseError, self._isc_status,
                                             "Error while rolling back transaction:")
+            if trace:
+                elapsed = _hook_timer() - start
+                for hook in trace:
+                    hook(self, elapsed, retaining)
             if not retaining:
+                if _handle_tracker is not None:
+                    _handle_tracker._release(HANDLE_TRANSACTION, self._tr_handle)
                 self._tr_handle = None
+            if self._ddl_executed:
+                self.__invalidate_statement_caches()
     def close(self):
         """Permanently closes the Transaction object and severs its associations
         with other objects (:class:`Cursor` and :class:`Connection` instances).
@@ -4268,6 +6125,7 @@ class Transaction(object):
             self._finish()
         except Exception as e:
             exc = e
+        self.__invalidate_statement_caches(True)
         del self._cursors[:]
         del self._connections[:]
         self.__closed = True
@@ -4289,7 +6147,7 @@ class Transaction(object):
         Args:
             name (str): Savepoint name.
         """
-        self.execute_immediate('SAVEPOINT %s' % name)
+        self.__execute_immediate('SAVEPOINT %s' % name)
     def cursor(self, connection=None):
         """Creates a new :class:`Cursor` that will operate in the context of this
         Transaction.
@@ -4467,6 +6325,9 @@ class Transaction(object):
     isolation = property(__get_isolation)
     #: int: (R/O) Lock timeout (seconds or -1 for unlimited).
     lock_timeout = property(__get_lock_timeout)
+    #: :class:`~fdb.fbcore._BlobCache`: (R/O) Cache of materialized BLOB values
+    #: read in this transaction. Disabled by default, set its `size` to enable it.
+    blob_cache = property(__get_blob_cache)
 
 class ConnectionGroup(object):
     """Manager for distributed transactions, i.e. transactions that span multiple
@@ -4657,7 +6518,7 @@ class ConnectionGroup(object):
             self._transaction = Transaction(self._cons,
                                             default_tpb=self.default_tpb)
     # Transactional methods:
-    def execute_immediate(self, sql):
+    def execute_immediate(self, sql, parameters=None):
         """Executes a statement on all member connections without caching its
         prepared form.
 
@@ -4666,6 +6527,11 @@ class ConnectionGroup(object):
         Args:
             sql (str): SQL statement to execute.
 
+        Keyword Args:
+            parameters (list or tuple): Sequence of parameters. Statement with
+                parameters is executed without prepare, see
+                :meth:`Transaction.execute_immediate` for details.
+
         .. important::
 
            **The statement must not be of a type that returns a result set.**
@@ -4678,7 +6544,7 @@ class ConnectionGroup(object):
             fdb.DatabaseError: When error is returned from server.
         """
         self.__ensure_transaction()
-        self._transaction.execute_immediate(sql)
+        self._transaction.execute_immediate(sql, parameters)
     def begin(self, tpb=None):
         """Starts distributed transaction over member connections.
 
@@ -4767,10 +6633,16 @@ class ConnectionGroup(object):
     default_tpb = property(__get_default_tpb, __set_default_tpb)
 
 
-class BlobReader(object):
+class BlobReader(io.RawIOBase):
     """BlobReader is a “file-like” class, so it acts much like a file instance
     opened in `rb` mode.
 
+    BlobReader implements :class:`io.RawIOBase` interface, so it could be wrapped
+    by :class:`io.BufferedReader` or passed to any function that expects binary
+    stream. Methods :meth:`readinto` and :meth:`readall` always work with raw
+    bytes, while :meth:`read` and :meth:`readline` return `unicode` for TEXT BLOBs
+    (see notes below).
+
     .. important::
 
        DO NOT create instances of this class directly! BlobReader instances are
@@ -4811,16 +6683,21 @@ class BlobReader(object):
             raise exception_from_status(DatabaseError,
                                         self._isc_status,
                                         "Cursor.read_output_blob/isc_open_blob2:")
-        # Get BLOB total length and max. size of segment
-        result = ctypes.cast(ctypes.create_string_buffer(20),
+        if _handle_tracker is not None:
+            _handle_tracker._register(HANDLE_BLOB, self._blob_handle,
+                                      (self.__db_handle.value,), 'BlobReader')
+        # Get BLOB total length, max. size of segment and BLOB type
+        result = ctypes.cast(ctypes.create_string_buffer(30),
                              buf_pointer)
-        api.isc_blob_info(self._isc_status, self._blob_handle, 2,
-                          bs([isc_info_blob_total_length, isc_info_blob_max_segment]),
-                          20, result)
+        api.isc_blob_info(self._isc_status, self._blob_handle, 3,
+                          bs([isc_info_blob_total_length, isc_info_blob_max_segment,
+                              isc_info_blob_type]),
+                          30, result)
         if db_api_error(self._isc_status):
             raise exception_from_status(DatabaseError,
                                         self._isc_status,
                                         "Cursor.read_output_blob/isc_blob_info:")
+        self._blob_type = ibase.isc_bpb_type_segmented
         offset = 0
         while bytes_to_uint(result[offset]) != isc_info_end:
             code = bytes_to_uint(result[offset])
@@ -4835,35 +6712,45 @@ class BlobReader(object):
                 self._segment_size = bytes_to_uint(result[
                     offset + 2:offset + 2 + length])
                 offset += length + 2
-        # Create internal buffer
-        self.__buf = ctypes.create_string_buffer(self._segment_size)
+            elif code == isc_info_blob_type:
+                length = bytes_to_uint(result[offset:offset + 2])
+                self._blob_type = bytes_to_uint(result[
+                    offset + 2:offset + 2 + length])
+                offset += length + 2
+        # Create internal buffer (read-ahead window). It holds BLOB data
+        # from position __buf_start, and __buf_data bytes are valid.
+        self.__buf = ctypes.create_string_buffer(MAX_BLOB_SEGMENT_SIZE)
+        self.__buf_start = 0
         self.__buf_pos = 0
         self.__buf_data = 0
+        self.__segment_length = ctypes.c_ushort(0)
         self.__opened = True
-    def __reset_buffer(self):
-        ctypes.memset(self.__buf, 0, self._segment_size)
+    def __get_segment(self, target, size):
+        """Reads next portion of BLOB (at most `size` bytes) into `target`.
+        Returns number of bytes read (zero on EOF).
+        """
+        trace = hooks.get(HOOK_BLOB_READ)
+        if trace:
+            start = _hook_timer()
+        status = api.isc_get_segment(self._isc_status, self._blob_handle, self.__segment_length,
+                                     size, target)
+        if status == 0 or status == isc_segment:
+            if trace:
+                elapsed = _hook_timer() - start
+                for hook in trace:
+                    hook(self, elapsed, self.__segment_length.value)
+            return self.__segment_length.value
+        elif status == isc_segstr_eof:
+            return 0
+        raise exception_from_status(DatabaseError,
+                                    self._isc_status,
+                                    "BlobReader.__BLOB_get/isc_get_segment:")
+    def __blob_get(self):
+        # Refill the read-ahead window from current position
+        self.__buf_start = self.__pos
         self.__buf_pos = 0
         self.__buf_data = 0
-    def __blob_get(self):
-        self.__reset_buffer()
-        # Load BLOB
-        allow_incomplete_segment_read = True
-        status = ISC_STATUS(0)
-        bytes_read = 0
-        bytes_actually_read = ctypes.c_ushort(0)
-        status = api.isc_get_segment(self._isc_status, self._blob_handle, bytes_actually_read,
-                                     self._segment_size, ctypes.byref(self.__buf))
-        if status != 0:
-            if status == ibase.isc_segstr_eof:
-                self.__buf_data = 0
-            elif (status == isc_segment) and allow_incomplete_segment_read:
-                self.__buf_data = bytes_actually_read.value
-            else:
-                raise exception_from_status(DatabaseError,
-                                            self._isc_status,
-                                            "BlobReader.__BLOB_get/isc_get_segment:")
-        else:
-            self.__buf_data = bytes_actually_read.value
+        self.__buf_data = self.__get_segment(self.__buf, MAX_BLOB_SEGMENT_SIZE)
     def close(self):
         """Closes the Reader. Like :meth:`file.close`.
 
@@ -4872,6 +6759,8 @@ class BlobReader(object):
         """
         if self.__opened and not self.closed:
             self.__closed = True
+            if _handle_tracker is not None:
+                _handle_tracker._release(HANDLE_BLOB, self._blob_handle)
             api.isc_close_blob(self._isc_status, self._blob_handle)
             if db_api_error(self._isc_status):
                 raise exception_from_status(DatabaseError,
@@ -4881,6 +6770,14 @@ class BlobReader(object):
         """Flush the internal buffer. Like :meth:`file.flush`. Does nothing as
         it's pointless for reader."""
         pass
+    def readable(self):
+        "Returns True. Part of :class:`io.RawIOBase` interface."
+        return True
+    def seekable(self):
+        """Returns True for `stream` BLOBs. Part of :class:`io.RawIOBase` interface.
+        """
+        self.__ensure_open()
+        return self._blob_type == ibase.isc_bpb_type_stream
     def next(self):
         """Return the next line from the BLOB. Part of *iterator protocol*.
 
@@ -4895,6 +6792,77 @@ class BlobReader(object):
     __next__ = next
     def __iter__(self):
         return self
+    def readinto(self, b):
+        """Read bytes into a pre-allocated, writable bytes-like object `b` (like
+        :class:`bytearray`, :class:`memoryview` or :class:`mmap.mmap`), and
+        return the number of bytes read. Returns 0 when EOF is encountered
+        immediately. Part of :class:`io.RawIOBase` interface.
+
+        Data are copied from server response directly to `b`, so it's the most
+        efficient way to read large BLOBs.
+
+        Raises:
+            fdb.ProgrammingError: When reader is closed.
+
+        Note:
+           Always reads raw bytes (no conversion to `unicode` for TEXT BLOBs).
+        """
+        self.__ensure_open()
+        if PYTHON_MAJOR_VER == 3:
+            target = memoryview(b)
+            nbytes = target.nbytes
+        elif isinstance(b, memoryview):
+            # ctypes in Python 2 doesn't support new buffer protocol, so data
+            # are read through temporary bytearray
+            data = bytearray(len(b) * b.itemsize)
+            count = self.readinto(data)
+            b[:count] = memoryview(data)[:count]
+            return count
+        else:
+            target = b
+            nbytes = len(b)
+        to_read = min(nbytes, self._blob_length - self.__pos)
+        if to_read <= 0:
+            return 0
+        target = (ctypes.c_char * nbytes).from_buffer(target)
+        done = 0
+        while done < to_read:
+            available = self.__buf_data - self.__buf_pos
+            if available == 0:
+                if to_read - done >= MAX_BLOB_SEGMENT_SIZE:
+                    # Large read bypasses the internal buffer
+                    count = self.__get_segment(ctypes.byref(target, done), MAX_BLOB_SEGMENT_SIZE)
+                    if count == 0:
+                        # BLOB EOF
+                        break
+                    done += count
+                    self.__pos += count
+                    self.__buf_start = self.__pos
+                    self.__buf_data = self.__buf_pos = 0
+                    continue
+                self.__blob_get()
+                available = self.__buf_data
+                if available == 0:
+                    # BLOB EOF
+                    break
+            count = min(available, to_read - done)
+            ctypes.memmove(ctypes.byref(target, done),
+                           ctypes.byref(self.__buf, self.__buf_pos), count)
+            done += count
+            self.__pos += count
+            self.__buf_pos += count
+        return done
+    def readall(self):
+        """Read all data until EOF as raw bytes. Part of :class:`io.RawIOBase` interface.
+
+        Note:
+           Always reads raw bytes (no conversion to `unicode` for TEXT BLOBs).
+        """
+        self.__ensure_open()
+        result = bytearray(self._blob_length - self.__pos)
+        count = self.readinto(result)
+        del result[count:]
+        return bytes(result)
     def read(self, size=-1):
         """Read at most size bytes from the file (less if the read hits EOF
         before obtaining size bytes). If the size argument is negative or omitted,
@@ -4910,38 +6878,26 @@ class BlobReader(object):
            Python is v3 or `connection charset` is defined.
         """
         self.__ensure_open()
-        if size >= 0:
-            to_read = min(size, self._blob_length - self.__pos)
+        if size is not None and size >= 0:
+            result = bytearray(min(size, self._blob_length - self.__pos))
+            count = self.readinto(result)
+            del result[count:]
+            result = bytes(result)
         else:
-            to_read = self._blob_length - self.__pos
-        return_size = to_read
-        result = ctypes.create_string_buffer(return_size)
-        pos = 0
-        while to_read > 0:
-            to_copy = min(to_read, self.__buf_data - self.__buf_pos)
-            if to_copy == 0:
-                self.__blob_get()
-                to_copy = min(to_read, self.__buf_data - self.__buf_pos)
-                if to_copy == 0:
-                    # BLOB EOF
-                    break
-            ctypes.memmove(ctypes.byref(result, pos),
-                           ctypes.byref(self.__buf, self.__buf_pos),
-                           to_copy)
-            pos += to_copy
-            self.__pos += to_copy
-            self.__buf_pos += to_copy
-            to_read -= to_copy
-        result = result.raw[:return_size]
+            result = self.readall()
         if (self.__charset or PYTHON_MAJOR_VER == 3) and self.__is_text:
             result = b2u(result, self.__python_charset)
         return result
-    def readline(self):
+    def readline(self, size=-1):
         """Read one entire line from the file. A trailing newline character is
         kept in the string (but may be absent when a file ends with an incomplete
         line). An empty string is returned when EOF is encountered immediately.
         Like :meth:`file.readline`.
 
+        Keyword Args:
+            size (int): When non-negative, at most `size` bytes are read (like
+                :meth:`read`, also for TEXT BLOBs), so incomplete line may be returned.
+
         Raises:
             fdb.ProgrammingError: When reader is closed.
 
@@ -4951,33 +6907,29 @@ class BlobReader(object):
         """
         self.__ensure_open()
         line = []
-        to_read = self._blob_length - self.__pos
-        to_copy = 0
-        found = False
-        while to_read > 0 and not found:
-            to_scan = min(to_read, self.__buf_data - self.__buf_pos)
-            if to_scan == 0:
+        if size is None or size < 0:
+            size = self._blob_length
+        while size > 0 and self.__pos < self._blob_length:
+            if self.__buf_pos == self.__buf_data:
                 self.__blob_get()
-                to_scan = min(to_read, self.__buf_data - self.__buf_pos)
-                if to_scan == 0:
+                if self.__buf_data == 0:
                     # BLOB EOF
                     break
-            pos = 0
-            result = ''
-            while pos < to_scan:
-                if self.__buf[self.__buf_pos+pos] == ibase.b('\n'):
-                    found = True
-                    pos += 1
-                    break
-                pos += 1
-            result = ctypes.string_at(ctypes.byref(self.__buf, self.__buf_pos), pos)
-            if (self.__charset or PYTHON_MAJOR_VER == 3)  and self.__is_text:
-                result = b2u(result, self.__python_charset)
-            line.append(result)
-            self.__buf_pos += pos
-            self.__pos += pos
-            to_read -= pos
-        return ''.join(line)
+            chunk = ctypes.string_at(ctypes.addressof(self.__buf) + self.__buf_pos,
+                                     min(self.__buf_data - self.__buf_pos, size))
+            end = chunk.find(b('\n'))
+            if end >= 0:
+                chunk = chunk[:end + 1]
+            line.append(chunk)
+            self.__buf_pos += len(chunk)
+            self.__pos += len(chunk)
+            size -= len(chunk)
+            if end >= 0:
+                break
+        result = b('').join(line)
+        if (self.__charset or PYTHON_MAJOR_VER == 3) and self.__is_text:
+            result = b2u(result, self.__python_charset)
+        return result
     def readlines(self, sizehint=None):
         """Read until EOF using :meth:`readline` and return a list containing
         the lines thus read. The optional sizehint argument (if present) is ignored.
@@ -5003,24 +6955,44 @@ class BlobReader(object):
         Keyword Args:
             whence (int): Context for offset. Accepted values: os.SEEK_SET, os.SEEK_CUR or os.SEEK_END
 
+        Returns:
+            int: New absolute position.
+
         Raises:
             fdb.ProgrammingError: When reader is closed.
 
+        Note:
+           Positions within the last read-ahead window (up to 64K of data read
+           from server) are reached without calling the server.
+
         Warning:
            If BLOB was NOT CREATED as `stream` BLOB, this method raises
-           :exc:`DatabaseError` exception. This constraint is set by Firebird.
+           :exc:`DatabaseError` exception when new position is outside the
+           read-ahead window. This constraint is set by Firebird.
         """
         self.__ensure_open()
+        if whence == os.SEEK_SET:
+            target = offset
+        elif whence == os.SEEK_CUR:
+            target = self.__pos + offset
+        else:
+            target = self._blob_length + offset
+        if self.__buf_start <= target <= self.__buf_start + self.__buf_data:
+            self.__buf_pos = target - self.__buf_start
+            self.__pos = target
+            return self.__pos
         pos = ISC_LONG(0)
         api.isc_seek_blob(self._isc_status,
                           self._blob_handle,
-                          whence, ISC_LONG(offset), ctypes.byref(pos))
+                          os.SEEK_SET, ISC_LONG(target), ctypes.byref(pos))
         if db_api_error(self._isc_status):
             raise exception_from_status(DatabaseError,
                                         self._isc_status,
                                         "BlobReader.seek/isc_blob_info:")
         self.__pos = pos.value
-        self.__reset_buffer()
+        self.__buf_start = self.__pos
+        self.__buf_pos = self.__buf_data = 0
+        return self.__pos
     def tell(self):
         """Return current position in BLOB, like stdio‘s `ftell()`
         and :meth:`file.tell`."""
@@ -5091,6 +7063,254 @@ class BlobReader(object):
     charset = property(lambda self: self.__python_charset, doc="Python character set for BLOB")
 
 
+class BlobWriter(io.RawIOBase):
+    """BlobWriter is a “file-like” class for writing new BLOB values, so it
+    acts much like a file instance opened in `wb` mode.
+
+    Data are sent to server directly from memory of passed objects whenever
+    possible (`bytes`, writable bytes-like objects like :class:`bytearray`
+    or :class:`mmap.mmap`, and streams that support `readinto`), without
+    intermediate copies.
+
+    Written BLOB is stored into database when :class:`BlobWriter` instance is
+    passed as value of BLOB parameter (or when its :attr:`blob_id` is passed
+    after writer is closed) in statement executed by the same cursor.
+
+    .. important::
+
+       DO NOT create instances of this class directly! BlobWriter instances are
+       returned by :meth:`Cursor.create_blob`.
+    """
+    def __init__(self, db_handle, tr_handle, stream=True):
+        self.__closed = False
+        self.__bytes_written = 0
+        self.__stream = stream
+        self.__buf = None
+        self.__buf_ptr = None
+        self.__blobid = ISC_QUAD(0, 0)
+        self._blob_handle = isc_blob_handle()
+        self._isc_status = ISC_STATUS_ARRAY()
+        if stream:
+            bpb = bs([ibase.isc_bpb_version1, ibase.isc_bpb_type, 1,
+                      ibase.isc_bpb_type_stream])
+            api.isc_create_blob2(self._isc_status, db_handle, tr_handle,
+                                 self._blob_handle, self.__blobid, len(bpb), bpb)
+        else:
+            api.isc_create_blob2(self._isc_status, db_handle, tr_handle,
+                                 self._blob_handle, self.__blobid, 0, None)
+        if db_api_error(self._isc_status):
+            self.__closed = True
+            raise exception_from_status(DatabaseError,
+                                        self._isc_status,
+                                        "BlobWriter/isc_create_blob2:")
+        if _handle_tracker is not None:
+            _handle_tracker._register(HANDLE_BLOB, self._blob_handle, (db_handle.value,),
+                                      'BlobWriter')
+    def __check_open(self):
+        if self.__closed:
+            raise ProgrammingError("BlobWriter is closed.")
+    def __put(self, address, size):
+        "Writes `size` bytes from memory at `address` as BLOB segments."
+        trace = hooks.get(HOOK_BLOB_WRITTEN)
+        if trace:
+            start = _hook_timer()
+        written = 0
+        while written < size:
+            count = min(size - written, MAX_BLOB_SEGMENT_SIZE)
+            api.isc_put_segment(self._isc_status, self._blob_handle, count, address + written)
+            if db_api_error(self._isc_status):
+                error = exception_from_status(DatabaseError, self._isc_status,
+                                              "BlobWriter.write/isc_put_segment:")
+                self.cancel()
+                raise error
+            written += count
+        self.__bytes_written += size
+        if trace:
+            elapsed = _hook_timer() - start
+            for hook in trace:
+                hook(self, elapsed, size)
+    def __get_buffer(self):
+        if self.__buf is None:
+            self.__buf = bytearray(MAX_BLOB_SEGMENT_SIZE)
+            self.__buf_ptr = (ctypes.c_char * MAX_BLOB_SEGMENT_SIZE).from_buffer(self.__buf)
+        return self.__buf
+    def writable(self):
+        "Returns True. Part of :class:`io.RawIOBase` interface."
+        return True
+    def write(self, b):
+        """Write bytes-like object `b` to BLOB, and return the number of bytes
+        written (always ``len(b)`` in bytes). Part of :class:`io.RawIOBase` interface.
+
+        Content of `bytes` and writable bytes-like objects is passed to server
+        without copying. Read-only buffers (like :class:`memoryview` of `bytes`
+        or :class:`mmap.mmap` opened with `ACCESS_READ`) are copied segment by
+        segment into internal buffer.
+
+        Raises:
+            fdb.ProgrammingError: When writer is closed.
+            fdb.DatabaseError: When error is returned by server. BLOB is cancelled.
+        """
+        self.__check_open()
+        if isinstance(b, mybytes):
+            size = len(b)
+            if size:
+                self.__put(ctypes.cast(ctypes.c_char_p(b), ctypes.c_void_p).value, size)
+            return size
+        if PYTHON_MAJOR_VER == 3:
+            view = memoryview(b)
+            if view.ndim != 1 or view.format not in ('B', 'b', 'c'):
+                view = view.cast('B')
+            size = view.nbytes
+            target = None if view.readonly else view
+        elif isinstance(b, memoryview):
+            # ctypes in Python 2 supports only old buffer protocol, so content
+            # of memoryview is copied
+            view = b
+            size = len(view) * view.itemsize
+            target = None
+        else:
+            view = buffer(b)
+            size = len(view)
+            target = b
+        if size == 0:
+            return 0
+        data = None
+        if target is not None:
+            try:
+                data = (ctypes.c_char * size).from_buffer(target)
+            except TypeError:
+                # Read-only buffer in Python 2
+                pass
+        if data is not None:
+            self.__put(ctypes.addressof(data), size)
+        else:
+            buf = self.__get_buffer()
+            for offset in xrange(0, size, MAX_BLOB_SEGMENT_SIZE):
+                chunk = view[offset:offset + MAX_BLOB_SEGMENT_SIZE]
+                buf[:len(chunk)] = chunk
+                self.__put(ctypes.addressof(self.__buf_ptr), len(chunk))
+        return size
+    def write_from(self, stream):
+        """Write all remaining data from file-like object `stream` to BLOB, and
+        return the number of bytes written.
+
+        Streams that support `readinto` (binary files, sockets made by
+        `makefile`, :class:`io.BytesIO` etc.) are read directly into internal
+        buffer that is passed to server. :class:`mmap.mmap` is written from its
+        current position without copying (see :meth:`write`). Other streams
+        are read by `read` in segment-sized chunks. Text chunks are encoded using
+        `latin-1`.
+
+        Raises:
+            fdb.ProgrammingError: When writer is closed.
+            fdb.DatabaseError: When error is returned by server. BLOB is cancelled.
+        """
+        self.__check_open()
+        total = 0
+        if isinstance(stream, mmap.mmap) and PYTHON_MAJOR_VER == 3:
+            start = stream.tell()
+            total = self.write(memoryview(stream)[start:])
+            stream.seek(start + total)
+        elif hasattr(stream, 'readinto'):
+            buf = self.__get_buffer()
+            count = stream.readinto(buf)
+            while count:
+                self.__put(ctypes.addressof(self.__buf_ptr), count)
+                total += count
+                count = stream.readinto(buf)
+        else:
+            chunk = stream.read(MAX_BLOB_SEGMENT_SIZE)
+            while chunk:
+                total += self.write(ibase.b(chunk) if isinstance(chunk, myunicode) else chunk)
+                chunk = stream.read(MAX_BLOB_SEGMENT_SIZE)
+        return total
+    def flush(self):
+        """Does nothing, as data are passed to server by each write."""
+        pass
+    def tell(self):
+        """Return number of bytes written so far."""
+        return self.__bytes_written
+    def close(self):
+        """Closes the writer and stores BLOB in database. Once closed, BLOB
+        could be used as value of input parameter via :attr:`blob_id`.
+
+        Raises:
+            fdb.DatabaseError: When error is returned by server.
+        """
+        if not self.__closed:
+            self.__closed = True
+            if _handle_tracker is not None:
+                _handle_tracker._release(HANDLE_BLOB, self._blob_handle)
+            api.isc_close_blob(self._isc_status, self._blob_handle)
+            if db_api_error(self._isc_status):
+                raise exception_from_status(DatabaseError,
+                                            self._isc_status,
+                                            "BlobWriter.close/isc_close_blob:")
+    def cancel(self):
+        """Closes the writer and discards the BLOB.
+
+        Raises:
+            fdb.DatabaseError: When error is returned by server.
+        """
+        if not self.__closed:
+            self.__closed = True
+            if _handle_tracker is not None:
+                _handle_tracker._release(HANDLE_BLOB, self._blob_handle)
+            api.isc_cancel_blob(self._isc_status, self._blob_handle)
+            if db_api_error(self._isc_status):
+                raise exception_from_status(DatabaseError,
+                                            self._isc_status,
+                                            "BlobWriter.cancel/isc_cancel_blob:")
+    def __del__(self):
+        if not self.__closed:
+            try:
+                self.cancel()
+            except DatabaseError:
+                # Finalizer must not raise (connection may be already lost)
+                pass
+    #: bool: (R/O) True if BlobWriter is closed.
+    closed = property(lambda self: self.__closed, doc="True if BlobWriter is closed")
+    #: str: (R/O) File mode - always "wb"
+    mode = property(lambda self: 'wb', doc="File mode - always 'wb'")
+    #: ISC_QUAD: (R/O) BLOB ID
+    blob_id = property(lambda self: self.__blobid, doc="BLOB ID")
+    #: bool: (R/O) True if BLOB is created as `stream` BLOB
+    is_stream = property(lambda self: self.__stream, doc="True if BLOB is created as stream BLOB")
+
+
+class _FieldIndex(object):
+    """An internal class that maps field names of result set to their positions.
+    Single instance is shared by all rows from the result set.
+    """
+    __slots__ = ('names', 'positions')
+    def __init__(self, description):
+        #: Ordered list of field names
+        self.names = [field_spec[DESCRIPTION_NAME] for field_spec in description]
+        #: Mapping of field names to their positions
+        self.positions = positions = {}
+        for pos, name in enumerate(self.names):
+            # It's possible for a result set from the database engine to return
+            # multiple fields with the same name, but kinterbasdb's key-based
+            # row interface only honors the first (thus setdefault, which won't
+            # store the position if it's already present in positions).
+            positions.setdefault(name, pos)
+    def position(self, field_name):
+        "Returns position of field with given name"
+        positions = self.positions
+        # Straightforward, unnormalized lookup will work if the fieldName is
+        # already uppercase and/or if it refers to a database field whose
+        # name is case-sensitive.
+        if field_name in positions:
+            return positions[field_name]
+        else:
+            field_name_normalized = _normalize_db_identifier(field_name)
+            try:
+                return positions[field_name_normalized]
+            except KeyError:
+                raise KeyError('Result set has no field named "%s".  The field'
+                               ' name must be one of: (%s)'
+                               % (field_name, ', '.join(positions.keys())))
+
 class _RowMapping(object):
     """An internal dictionary-like class that wraps a row of results in order to
     map field name to field value.
@@ -5106,34 +7326,14 @@ class _RowMapping(object):
        Therefore, client programmers should NOT rely on the return value being
        an instance of a particular class or type.
     """
-    def __init__(self, description, row):
-        self._description = description
-        fields = self._fields = {}
-        pos = 0
-        for field_spec in description:
-            # It's possible for a result set from the database engine to return
-            # multiple fields with the same name, but kinterbasdb's key-based
-            # row interface only honors the first (thus setdefault, which won't
-            # store the position if it's already present in self._fields).
-            fields.setdefault(field_spec[DESCRIPTION_NAME], row[pos])
-            pos += 1
+    __slots__ = ('_index', '_row')
+    def __init__(self, index, row):
+        self._index = index
+        self._row = row
     def __len__(self):
-        return len(self._fields)
+        return len(self._index.positions)
     def __getitem__(self, field_name):
-        fields = self._fields
-        # Straightforward, unnormalized lookup will work if the fieldName is
-        # already uppercase and/or if it refers to a database field whose
-        # name is case-sensitive.
-        if field_name in fields:
-            return fields[field_name]
-        else:
-            field_name_normalized = _normalize_db_identifier(field_name)
-            try:
-                return fields[field_name_normalized]
-            except KeyError:
-                raise KeyError('Result set has no field named "%s".  The field'
-                               ' name must be one of: (%s)'
-                               % (field_name, ', '.join(fields.keys())))
+        return self._row[self._index.position(field_name)]
     def get(self, field_name, default_value=None):
         try:
             return self[field_name]
@@ -5151,19 +7351,18 @@ class _RowMapping(object):
         # corresponding values.
         return '<result set row with %s>' % ', '.join([
             '%s = %s' % (field_name, self[field_name])
-            for field_name in self._fields.keys()
+            for field_name in self._index.positions.keys()
         ])
     def keys(self):
         # Note that this is an *ordered* list of keys.
-        return [fieldSpec[DESCRIPTION_NAME] for fieldSpec in self._description]
+        return list(self._index.names)
     def values(self):
         # Note that this is an *ordered* list of values.
-        return [self[field_name] for field_name in self.keys()]
+        return [self[field_name] for field_name in self._index.names]
     def items(self):
-        return [(field_name, self[field_name]) for field_name in self.keys()]
+        return [(field_name, self[field_name]) for field_name in self._index.names]
     def iterkeys(self):
-        for field_desc in self._description:
-            yield field_desc[DESCRIPTION_NAME]
+        return iter(self._index.names)
     __iter__ = iterkeys
     def itervalues(self):
         for field_name in self:
@@ -5173,6 +7372,181 @@ class _RowMapping(object):
             yield field_name, self[field_name]
 
 
+#: Marker for values of :class:`_LazyRow` that were not decoded yet.
+_UNDECODED = object()
+
+#: Shifts of values in copy of row buffer without VARCHAR fields.
+_NO_SHIFTS = (0,)
+
+class _LazyRowPlan(object):
+    """An internal class that holds decoders and field index shared by all
+    :class:`_LazyRow` instances from single result set.
+    """
+    __slots__ = ('index', 'decoders', 'eager', 'varying', 'groups')
+    def __init__(self, index, decoders, eager, varying, groups):
+        #: :class:`_FieldIndex` for result set
+        self.index = index
+        #: Functions that decode field value from raw row data
+        self.decoders = decoders
+        #: Positions of fields that are decoded when row is fetched
+        self.eager = eager
+        #: (offset, max. length) of VARCHAR fields in row buffer
+        self.varying = varying
+        #: Number of VARCHAR fields that precede each field in row buffer
+        self.groups = groups
+
+class _LazyRow(object):
+    """An internal sequence-like class returned by fetch methods of :class:`Cursor`
+    in :attr:`~Cursor.lazy_rows` mode. It holds copy of raw row data, and decodes
+    field values only when they are accessed for the first time.
+
+    Fields could be accessed by position (like tuple) or by name (like
+    :class:`_RowMapping`). Unused parts of VARCHAR fields are not copied.
+
+    .. warning::
+
+       We make ABSOLUTELY NO GUARANTEES about the return value of the
+       `fetch(one|many|all)` methods except that it is a sequence indexed by field
+       position, and no guarantees about the return value of the
+       `fetch(one|many|all)map` methods except that it is a mapping of field name
+       to field value.
+
+       Therefore, client programmers should NOT rely on the return value being
+       an instance of a particular class or type.
+    """
+    __slots__ = ('_plan', '_raw', '_nulls', '_values', '_shifts')
+    def __init__(self, plan, raw, nulls, values, shifts):
+        self._plan = plan
+        self._raw = raw
+        self._nulls = nulls
+        self._values = values
+        self._shifts = shifts
+    def __value(self, pos):
+        value = self._values[pos]
+        if value is _UNDECODED:
+            if self._nulls[pos] == -1:
+                value = None
+            else:
+                plan = self._plan
+                value = plan.decoders[pos](self._raw, self._shifts[plan.groups[pos]])
+            self._values[pos] = value
+        return value
+    def __len__(self):
+        return len(self._values)
+    def __getitem__(self, key):
+        if isinstance(key, (StringType, UnicodeType)):
+            return self.__value(self._plan.index.position(key))
+        elif isinstance(key, slice):
+            return tuple([self.__value(pos) for pos in xrange(*key.indices(len(self._values)))])
+        if key < 0:
+            key += len(self._values)
+        if not 0 <= key < len(self._values):
+            raise IndexError("Row index out of range")
+        return self.__value(key)
+    def __iter__(self):
+        for pos in xrange(len(self._values)):
+            yield self.__value(pos)
+    def __eq__(self, other):
+        if isinstance(other, _LazyRow):
+            other = tuple(other)
+        return tuple(self) == other
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    def __hash__(self):
+        return hash(tuple(self))
+    def __repr__(self):
+        return repr(tuple(self))
+    def get(self, field_name, default_value=None):
+        try:
+            return self[field_name]
+        except KeyError:
+            return default_value
+    def keys(self):
+        # Note that this is an *ordered* list of keys.
+        return list(self._plan.index.names)
+    def values(self):
+        # Note that this is an *ordered* list of values.
+        return list(self)
+    def items(self):
+        return list(zip(self._plan.index.names, self))
+
+class _RowPrefetcher(object):
+    """An internal class that fetches and decodes rows of result set ahead
+    in background thread, and passes them to :class:`Cursor` via bounded queue.
+    Used by :class:`Cursor` when :attr:`~Cursor.prefetch` is set.
+
+    Worker thread stops when result set is exhausted, when fetch fails (the
+    exception is passed through the queue and raised by :meth:`get`), or when
+    :meth:`close` is called.
+
+    Each fetch is done while `lock` is held, so owner can use the statement handle
+    while rows are prefetched.
+    """
+    def __init__(self, statement, depth, lazy, lock):
+        self.__rows = queue.Queue(depth)
+        self.__stop = threading.Event()
+        # Worker holds only weak reference to statement, so it does not keep
+        # abandoned statement and its cursor alive. Statement could be already
+        # a proxy (for statements created by Cursor.prep()).
+        self.__thread = threading.Thread(target=_RowPrefetcher.__run,
+                                         name='fdb-prefetch',
+                                         args=(weakref.proxy(statement.__repr__.__self__), lazy,
+                                               self.__rows, self.__stop, lock))
+        self.__thread.daemon = True
+        self.__thread.start()
+    @staticmethod
+    def __run(statement, lazy, rows, stop, lock):
+        def put(item):
+            while not stop.is_set():
+                try:
+                    rows.put(item, True, 0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        while not stop.is_set():
+            try:
+                with lock:
+                    row = statement._fetchone(lazy)
+            except BaseException as e:
+                put(_PrefetchError(e))
+                return
+            if not put(row) or row is None:
+                return
+    def get(self):
+        """Returns next row from queue, or None when result set is exhausted.
+        Blocks until row is available.
+
+        Raises:
+            Exception raised by fetch in worker thread.
+        """
+        item = self.__rows.get()
+        if isinstance(item, _PrefetchError):
+            raise item.error
+        return item
+    def close(self):
+        """Stops the worker thread and discards rows that were not consumed.
+        Waits until worker finishes the fetch that is in progress.
+        """
+        self.__stop.set()
+        try:
+            while True:
+                self.__rows.get_nowait()
+        except queue.Empty:
+            pass
+        if self.__thread is not threading.current_thread():
+            self.__thread.join()
+    def __del__(self):
+        self.__stop.set()
+
+class _PrefetchError(object):
+    """An internal wrapper for exception passed from worker thread of
+    :class:`_RowPrefetcher`.
+    """
+    __slots__ = ('error',)
+    def __init__(self, error):
+        self.error = error
+
 class _TableAccessStats(object):
     """An internal class that wraps results from :meth:`~fdb.Connection.get_table_access_stats()`"""
     def __init__(self, table_id):
@@ -5206,6 +7580,693 @@ class _TableAccessStats(object):
         else:
             ProgrammingError("Unsupported info code: %d" % info_code)
 
+#: Database info codes of I/O counters reported by Connection.io_stats.
+_IO_STATS_INFO_CODES = (isc_info_reads, isc_info_writes, isc_info_fetches, isc_info_marks)
+#: Database info codes of table access counters.
+_TABLE_STATS_INFO_CODES = (isc_info_read_seq_count, isc_info_read_idx_count,
+                           isc_info_insert_count, isc_info_update_count,
+                           isc_info_delete_count, isc_info_backout_count,
+                           isc_info_purge_count, isc_info_expunge_count)
+
+class _StatementProfile(object):
+    """An internal class that holds server-side execution statistics for single
+    statement execution. Collected by :meth:`~fdb.Connection.profile`.
+    """
+    def __init__(self, sql, plan):
+        #: str: SQL command.
+        self.sql = sql
+        #: str: Execution plan.
+        self.plan = plan
+        #: float: Time (in seconds) spent in statement execution.
+        self.execute_time = 0.0
+        #: float: Time (in seconds) spent in fetch of result set.
+        self.fetch_time = 0.0
+        #: int: Number of fetched rows.
+        self.rows = 0
+        #: dict: Number of processed records by `isc_info_req_select_count`,
+        #: `isc_info_req_insert_count`, `isc_info_req_update_count` and
+        #: `isc_info_req_delete_count` codes.
+        self.records = {}
+        #: dict: Differences of page reads, writes, fetches and marks, with the
+        #: same keys as :attr:`~fdb.Connection.io_stats`.
+        self.io_stats = {}
+        #: list: :class:`_TableAccessStats` instances with differences of
+        #: access counters, for tables accessed by statement.
+        self.tables = []
+    def __repr__(self):
+        return '<%s %r>' % (self.__class__.__name__, self.sql)
+    def __get_sequential_reads(self):
+        return sum(table.sequential for table in self.tables)
+    def __get_indexed_reads(self):
+        return sum(table.indexed for table in self.tables)
+    #: int: (R/O) Number of records read sequentially (NATURAL) from all tables.
+    sequential_reads = property(__get_sequential_reads)
+    #: int: (R/O) Number of records read via index from all tables.
+    indexed_reads = property(__get_indexed_reads)
+
+class _StatementProfiler(object):
+    """An internal class that collects server-side execution statistics for
+    statements executed on connection. Returned by :meth:`~fdb.Connection.profile`.
+
+    Statistics are collected between :meth:`start` and :meth:`stop` calls, or
+    in context of `with` statement. Attachment counters are read when each
+    statement is completed, i.e. after execution, or (for statements that return
+    result set) when all rows are fetched or statement is closed.
+
+    Args:
+        connection (Connection): Profiled connection.
+    """
+    def __init__(self, connection):
+        self.__connection = connection
+        self.__isc_status = ISC_STATUS_ARRAY()
+        self.__buf_size = 1024
+        self.__counters = None
+        self.__open = {}
+        self.__plans = {}
+        #: list: :class:`_StatementProfile` instances for executed statements,
+        #: in order of execution.
+        self.statements = []
+    def __enter__(self):
+        self.start()
+        return self
+    def __exit__(self, *args):
+        self.stop()
+    def __get_counters(self):
+        """Returns dictionary with attachment counters, read by single
+        `isc_database_info` call.
+        """
+        codes = _IO_STATS_INFO_CODES + _TABLE_STATS_INFO_CODES
+        request = bs(codes)
+        while True:
+            buf = ctypes.create_string_buffer(self.__buf_size)
+            api.isc_database_info(self.__isc_status, self.__connection._db_handle,
+                                  len(request), request, len(buf), buf)
+            if db_api_error(self.__isc_status):
+                raise exception_from_status(DatabaseError, self.__isc_status,
+                                            "Error while requesting database information:")
+            data = buf.raw
+            counters = {}
+            pos = 0
+            while ord2(data[pos]) not in (isc_info_end, isc_info_truncated):
+                code = ord2(data[pos])
+                length = struct.unpack_from('<H', data, pos + 1)[0]
+                pos += 3
+                if code in _IO_STATS_INFO_CODES:
+                    counters[code] = bytes_to_int(data[pos:pos + length])
+                else:
+                    # Sequence of (relation id, count) pairs
+                    counts = {}
+                    for item in xrange(pos, pos + length, 6):
+                        relation_id, count = struct.unpack_from('<Hi', data, item)
+                        counts[relation_id] = count
+                    counters[code] = counts
+                pos += length
+            if ord2(data[pos]) == isc_info_end:
+                return counters
+            if self.__buf_size == SHRT_MAX:
+                # Too many tables, read counters one by one
+                return self.__connection.db_info(list(codes))
+            self.__buf_size = min(self.__buf_size * 4, SHRT_MAX)
+    def __is_profiled(self, statement):
+        if not isinstance(statement, PreparedStatement):
+            # Statement executed without prepare
+            return False
+        cursor = statement.cursor
+        return (cursor is not None and not is_dead_proxy(cursor) and
+                cursor._connection._db_handle is self.__connection._db_handle)
+    def __executed(self, statement, elapsed, parameters):
+        if not self.__is_profiled(statement):
+            return
+        profile = _StatementProfile(statement.sql, self.__plans.get(statement.sql))
+        profile.execute_time = elapsed
+        self.statements.append(profile)
+        # Errors in profiler must not break the profiled statement, so
+        # information that can't be obtained from server is left empty
+        try:
+            if profile.plan is None:
+                profile.plan = self.__plans[statement.sql] = statement.plan
+            if statement.statement_type in _ROWCOUNT_INFO_CODES:
+                profile.records = statement._get_record_counts()
+        except DatabaseError:
+            pass
+        if statement.n_output_params:
+            # Server-side work is done while result set is fetched
+            self.__open[id(statement)] = profile
+        else:
+            self.__complete(profile)
+    def __fetched(self, statement, elapsed, rows):
+        profile = self.__open.pop(id(statement), None)
+        if profile is not None:
+            profile.fetch_time = elapsed
+            profile.rows = rows
+            if statement.statement_type == isc_info_sql_stmt_select:
+                profile.records[isc_info_req_select_count] = rows
+            self.__complete(profile)
+    def __complete(self, profile):
+        "Assigns differences of attachment counters to `profile`."
+        before = self.__counters
+        try:
+            after = self.__counters = self.__get_counters()
+        except DatabaseError:
+            return
+        for code in _IO_STATS_INFO_CODES:
+            profile.io_stats[code] = after[code] - before[code]
+        tables = {}
+        for code in _TABLE_STATS_INFO_CODES:
+            old = before[code]
+            for table_id, count in after[code].items():
+                delta = count - old.get(table_id, 0)
+                if delta:
+                    if table_id not in tables:
+                        tables[table_id] = stats = _TableAccessStats(table_id)
+                        for other in _TABLE_STATS_INFO_CODES:
+                            stats._set_info(other, 0)
+                    tables[table_id]._set_info(code, delta)
+        profile.tables = [tables[table_id] for table_id in sorted(tables)]
+    def start(self):
+        "Starts collection of statistics."
+        self.__counters = self.__get_counters()
+        add_hook(HOOK_STATEMENT_EXECUTED, self.__executed)
+        add_hook(HOOK_STATEMENT_FETCHED, self.__fetched)
+    def stop(self):
+        """Stops collection of statistics. Statistics of statements with result
+        sets that are not fetched yet are completed with current counters.
+        """
+        remove_hook(HOOK_STATEMENT_EXECUTED, self.__executed)
+        remove_hook(HOOK_STATEMENT_FETCHED, self.__fetched)
+        for profile in sorted(self.__open.values(), key=self.statements.index):
+            self.__complete(profile)
+        self.__open.clear()
+        tables = [table for profile in self.statements for table in profile.tables]
+        if tables:
+            cur = self.__connection.query_transaction.cursor()
+            cur.execute('SELECT RDB$RELATION_ID, RDB$RELATION_NAME FROM RDB$RELATIONS')
+            names = dict((table_id, name.strip()) for table_id, name in cur)
+            cur.close()
+            for table in tables:
+                table.table_name = names.get(table.table_id)
+
+#: Query that returns precision and subtype of fields of tables and views.
+_LOAD_RELATION_FIELDS_SQL = ("SELECT REL_FIELDS.RDB$RELATION_NAME, REL_FIELDS.RDB$FIELD_NAME,"
+                             " FIELD_SPEC.RDB$FIELD_PRECISION, FIELD_SPEC.RDB$FIELD_SUB_TYPE"
+                             " FROM RDB$FIELDS FIELD_SPEC, RDB$RELATION_FIELDS REL_FIELDS"
+                             " WHERE"
+                             " FIELD_SPEC.RDB$FIELD_NAME = REL_FIELDS.RDB$FIELD_SOURCE"
+                             " AND REL_FIELDS.RDB$RELATION_NAME IN (%s)")
+#: Query that returns precision and subtype of output parameters of stored procedures.
+_LOAD_PROCEDURE_FIELDS_SQL = ("SELECT REL_FIELDS.RDB$PROCEDURE_NAME, REL_FIELDS.RDB$PARAMETER_NAME,"
+                              " FIELD_SPEC.RDB$FIELD_PRECISION, FIELD_SPEC.RDB$FIELD_SUB_TYPE"
+                              " FROM RDB$FIELDS FIELD_SPEC, RDB$PROCEDURE_PARAMETERS REL_FIELDS"
+                              " WHERE"
+                              " FIELD_SPEC.RDB$FIELD_NAME = REL_FIELDS.RDB$FIELD_SOURCE"
+                              " AND REL_FIELDS.RDB$PARAMETER_TYPE = 1"
+                              " AND REL_FIELDS.RDB$PROCEDURE_NAME IN (%s)")
+
+class _FieldMetadataCache(object):
+    """An internal class that caches precision and subtype of fields of tables,
+    views and stored procedure output parameters, used to describe fields of
+    result sets.
+
+    Fields are loaded in bulk for whole relations (see
+    :meth:`Connection._load_field_metadata`). Cache could be shared by
+    connections to the same database (:class:`~fdb.pool.ConnectionPool`
+    does that for its connections). It's cleared when transaction that
+    executed a DDL statement is committed or rolled back.
+    """
+    def __init__(self):
+        self.__relations = {}
+        self.__lock = threading.Lock()
+    def is_loaded(self, relation):
+        "Returns True if fields of relation are in cache."
+        return relation in self.__relations
+    def get(self, relation, field):
+        """Returns `(precision, subtype)` tuple for field, or None if field is
+        not known.
+        """
+        fields = self.__relations.get(relation)
+        if fields is not None:
+            return fields.get(field)
+    def update(self, relations):
+        """Stores fields of relations.
+
+        Args:
+            relations (dict): Mapping of relation name to dictionary that maps
+                field name to `(precision, subtype)` tuple.
+        """
+        with self.__lock:
+            self.__relations.update(relations)
+    def clear(self):
+        "Drops all cached values."
+        with self.__lock:
+            self.__relations.clear()
+
+class _StatementCache(object):
+    """An internal class that implements size-bounded LRU cache of
+    :class:`PreparedStatement` instances created by :meth:`Cursor.execute`
+    for SQL command strings. Each :class:`Connection` has its own cache
+    available as :attr:`Connection.statement_cache`.
+
+    Statements are cached under (SQL command, :class:`Transaction`) key while
+    they are not used by any :class:`Cursor`. Cursor takes the statement out
+    of cache for execution, and returns it back when it's closed or used
+    to execute another statement. When cache is full, the least recently
+    used statement is dropped.
+
+    Cached statements are dropped when their Transaction is closed. Whole cache
+    is cleared when transaction that executed a DDL statement (or any statement
+    executed via `execute_immediate()`) is committed or rolled back.
+    """
+    def __init__(self, connection, size=DEFAULT_STATEMENT_CACHE_SIZE):
+        self.__connection = weakref.ref(connection)
+        self.__statements = collections.OrderedDict()
+        self.__size = size
+        #: int: Number of statements found in cache.
+        self.hits = 0
+        #: int: Number of statements that had to be prepared because they were not in cache.
+        self.misses = 0
+        #: int: Number of statements dropped from cache to make room for new ones.
+        self.evictions = 0
+    def __len__(self):
+        return len(self.__statements)
+    def __get_size(self):
+        return self.__size
+    def __set_size(self, value):
+        if not isinstance(value, (int, mylong)) or value < 0:
+            raise ProgrammingError("Statement cache size must be non-negative integer.")
+        self.__size = value
+        while len(self.__statements) > self.__size:
+            self.__statements.popitem(last=False)[1]._close()
+            self.evictions += 1
+    def get(self, operation, transaction):
+        """Takes prepared statement out of cache.
+
+        Args:
+            operation (str): SQL command.
+            transaction (:class:`Transaction`): Transaction in which the statement
+                will be executed.
+
+        Returns:
+            :class:`PreparedStatement` or None if statement is not in cache.
+        """
+        if self.__size == 0:
+            return None
+        ps = self.__statements.pop((operation, transaction), None)
+        if ps is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return ps
+    def put(self, statement, transaction):
+        """Returns prepared statement to cache. Statement is dropped instead
+        when cache is disabled or the same statement is already cached.
+
+        Args:
+            statement (:class:`PreparedStatement`): Statement to be cached.
+            transaction (:class:`Transaction`): Transaction in which the statement
+                was executed.
+        """
+        key = (statement.sql, transaction)
+        con = self.__connection()
+        if ((self.__size == 0) or (con is None) or con.closed or
+                (statement._stmt_handle is None) or
+                (statement.statement_type == isc_info_sql_stmt_ddl) or
+                (key in self.__statements)):
+            statement._close()
+            return
+        self.__statements[key] = statement
+        if len(self.__statements) > self.__size:
+            self.__statements.popitem(last=False)[1]._close()
+            self.evictions += 1
+    def invalidate(self, transaction):
+        """Drops all statements cached for specified transaction.
+
+        Args:
+            transaction (:class:`Transaction`): Transaction.
+        """
+        for key in [key for key in self.__statements if key[1] is transaction]:
+            self.__statements.pop(key)._close()
+    def clear(self):
+        "Drops all cached statements."
+        while self.__statements:
+            self.__statements.popitem()[1]._close()
+
+    #: int: (R/W) Max. number of cached statements. Zero disables the cache.
+    size = property(__get_size, __set_size)
+
+class _StatementHandlePool(object):
+    """An internal class that implements size-bounded pool of allocated DSQL
+    statement handles. Each :class:`Connection` has its own pool available as
+    :attr:`Connection.statement_handle_pool`.
+
+    When :class:`PreparedStatement` is dropped, its statement handle is returned
+    to the pool (with cursor closed) instead of being freed, and next statement
+    prepared on the connection re-prepares it in place instead of allocating new
+    one. When pool is full, returned handles are freed. Pooled handles are
+    released when connection is closed.
+    """
+    def __init__(self, connection, size=DEFAULT_STATEMENT_HANDLE_POOL_SIZE):
+        self.__connection = weakref.ref(connection)
+        self.__handles = []
+        self.__size = size
+        self._isc_status = ISC_STATUS_ARRAY()
+        #: int: Number of statement handles allocated by server.
+        self.allocations = 0
+        #: int: Number of statement handles taken from pool for reuse.
+        self.reuses = 0
+        #: int: Number of returned statement handles that were freed because pool
+        #: was full or handle could not be reset.
+        self.drops = 0
+    def __len__(self):
+        return len(self.__handles)
+    def __get_size(self):
+        return self.__size
+    def __set_size(self, value):
+        if not isinstance(value, (int, mylong)) or value < 0:
+            raise ProgrammingError("Statement handle pool size must be non-negative integer.")
+        self.__size = value
+        while len(self.__handles) > self.__size:
+            self.__drop(self.__handles.pop(0))
+    def __drop(self, handle):
+        self.drops += 1
+        api.isc_dsql_free_statement(self._isc_status, handle, ibase.DSQL_drop)
+        if (db_api_error(self._isc_status) and
+                (self._isc_status[1] not in [335544528, 335544485])):
+            raise exception_from_status(DatabaseError, self._isc_status,
+                                        "Error while closing SQL statement:")
+    def get(self):
+        """Returns statement handle for new statement. Handle is taken from pool,
+        or allocated when pool is empty.
+
+        Returns:
+            :class:`~fdb.ibase.isc_stmt_handle`
+
+        Raises:
+            fdb.DatabaseError: When handle allocation fails.
+        """
+        if self.__handles:
+            self.reuses += 1
+            return self.__handles.pop()
+        handle = isc_stmt_handle(0)
+        api.isc_dsql_allocate_statement(self._isc_status,
+                                        self.__connection()._db_handle, handle)
+        if db_api_error(self._isc_status):
+            raise exception_from_status(DatabaseError, self._isc_status,
+                                        "Error while allocating SQL statement:")
+        self.allocations += 1
+        return handle
+    def put(self, handle, close_cursor=False):
+        """Returns statement handle to pool. Handle is freed instead when pool
+        is full or its cursor could not be closed.
+
+        Args:
+            handle (:class:`~fdb.ibase.isc_stmt_handle`): Statement handle.
+            close_cursor (bool): True if handle has open cursor that must be closed.
+
+        Raises:
+            fdb.DatabaseError: When handle could not be freed.
+        """
+        if len(self.__handles) >= self.__size:
+            self.__drop(handle)
+            return
+        if close_cursor:
+            api.isc_dsql_free_statement(self._isc_status, handle, ibase.DSQL_close)
+            if db_api_error(self._isc_status):
+                self.__drop(handle)
+                return
+        self.__handles.append(handle)
+    def clear(self, drop=True):
+        """Empties the pool.
+
+        Args:
+            drop (bool): When False, handles are just forgotten (used when they are
+                released by database detach).
+        """
+        while self.__handles:
+            handle = self.__handles.pop()
+            if drop:
+                self.__drop(handle)
+
+    #: int: (R/W) Max. number of idle statement handles kept in pool. Zero disables the pool.
+    size = property(__get_size, __set_size)
+
+class _BlobCache(object):
+    """An internal class that implements size-bounded LRU cache of materialized
+    BLOB values read in a :class:`Transaction`. Each Transaction has its own
+    cache available as :attr:`Transaction.blob_cache`.
+
+    Values are cached under BLOB ID, so BLOB value returned repeatedly (for
+    example in rows of join) is read from server only once. Values larger than
+    cache size and BLOBs returned as :class:`BlobReader` are not cached. When
+    cache is full, the least recently used values are dropped.
+
+    Cache is disabled by default (its size is zero), and it's cleared when
+    transaction is committed or rolled back.
+    """
+    def __init__(self, size=0):
+        self.__values = collections.OrderedDict()
+        self.__size = size
+        self.__bytes = 0
+        #: int: Number of BLOB values found in cache.
+        self.hits = 0
+        #: int: Number of BLOB values that had to be read from server because they were not in cache.
+        self.misses = 0
+        #: int: Number of BLOB bytes returned from cache instead of reading them from server.
+        self.hit_bytes = 0
+        #: int: Number of BLOB values dropped from cache to make room for new ones.
+        self.evictions = 0
+    def __len__(self):
+        return len(self.__values)
+    def __get_size(self):
+        return self.__size
+    def __set_size(self, value):
+        if not isinstance(value, (int, mylong)) or value < 0:
+            raise ProgrammingError("BLOB cache size must be non-negative integer.")
+        self.__size = value
+        self.__shrink(value)
+    def __get_bytes(self):
+        return self.__bytes
+    def __shrink(self, size):
+        while self.__bytes > size:
+            self.__bytes -= self.__values.popitem(last=False)[1][1]
+            self.evictions += 1
+    def get(self, key):
+        """Returns cached BLOB value.
+
+        Args:
+            key (tuple): BLOB key.
+
+        Returns:
+            BLOB value or None if value is not in cache.
+        """
+        item = self.__values.pop(key, None)
+        if item is None:
+            self.misses += 1
+            return None
+        # Move value to the end (most recently used)
+        self.__values[key] = item
+        self.hits += 1
+        self.hit_bytes += item[1]
+        return item[0]
+    def put(self, key, value, size):
+        """Stores BLOB value in cache. Value is not stored when it's larger than
+        cache size.
+
+        Args:
+            key (tuple): BLOB key.
+            value: BLOB value.
+            size (int): Size of BLOB value in bytes.
+        """
+        if size > self.__size or key in self.__values:
+            return
+        self.__shrink(self.__size - size)
+        self.__values[key] = (value, size)
+        self.__bytes += size
+    def clear(self):
+        "Drops all cached values."
+        self.__values.clear()
+        self.__bytes = 0
+
+    #: int: (R/W) Max. total size of cached BLOB values in bytes. Zero disables the cache.
+    size = property(__get_size, __set_size)
+    #: int: (R/O) Total size of cached BLOB values in bytes.
+    bytes = property(__get_bytes)
+
+class _HandleRecord(object):
+    """An internal class that describes live handle tracked by :class:`_HandleTracker`.
+    """
+    __slots__ = ('kind', 'handle', 'databases', 'created', 'stack', 'description',
+                 'warned')
+    def __init__(self, kind, handle, databases, stack, description):
+        #: str: Handle kind (`HANDLE_STATEMENT`, `HANDLE_BLOB` or `HANDLE_TRANSACTION`).
+        self.kind = kind
+        #: int: Handle value.
+        self.handle = handle
+        #: tuple: Values of database handles the handle belongs to.
+        self.databases = databases
+        #: float: Time (as returned by :func:`time.time`) when handle was allocated.
+        self.created = time.time()
+        #: list: Stack of code that allocated the handle (list of
+        #: (filename, line number, function name, text) tuples), or None.
+        self.stack = stack
+        #: str: SQL command for statement handles, class name for BLOB handles, or None.
+        self.description = description
+        self.warned = False
+    def __get_age(self):
+        return time.time() - self.created
+    def format(self):
+        "Returns description of handle (with allocation stack) as string."
+        lines = ['%s handle %d, age %.1f s' % (self.kind, self.handle, self.age)]
+        if self.description:
+            lines[0] += ': %s' % self.description
+        if self.stack:
+            lines.append(''.join(traceback.format_list(self.stack)).rstrip())
+        return '\n'.join(lines)
+    #: float: (R/O) Time in seconds since handle was allocated.
+    age = property(__get_age)
+
+class _HandleTracker(object):
+    """An internal class that tracks live statement, BLOB and transaction handles
+    allocated by the driver, to help with detection of handle leaks. Tracker
+    is installed by :func:`enable_handle_tracking`.
+
+    Statement handles are tracked while they are owned by :class:`PreparedStatement`
+    (including statements in statement cache, but not idle handles in statement
+    handle pool). Handles are released when they are freed, or when database
+    they belong to is detached.
+
+    Limits are checked when new handle is allocated (age limit at most once per
+    second), and :class:`HandleLeakWarning` is issued once for each handle that
+    exceeds `max_age`, and each time the number of live handles of some kind
+    exceeds its limit.
+    """
+    def __init__(self, capture_stack=True, limits=None, max_age=None):
+        #: bool: Whether stack of code that allocated handle is recorded.
+        self.capture_stack = capture_stack
+        #: dict: Max. numbers of live handles for handle kinds.
+        self.limits = dict(limits) if limits else {}
+        #: float: Max. age of live handle in seconds, or None.
+        self.max_age = max_age
+        self.__lock = threading.Lock()
+        self.__records = {}
+        self.__counts = {HANDLE_STATEMENT: 0, HANDLE_BLOB: 0, HANDLE_TRANSACTION: 0}
+        self.__checked = time.time()
+    def _register(self, kind, handle, databases, description=None):
+        "Registers newly allocated handle."
+        stack = traceback.extract_stack()[:-2] if self.capture_stack else None
+        record = _HandleRecord(kind, handle.value, databases, stack, description)
+        with self.__lock:
+            if self.__records.get((kind, record.handle)) is None:
+                self.__counts[kind] += 1
+            self.__records[(kind, record.handle)] = record
+            count = self.__counts[kind]
+        limit = self.limits.get(kind)
+        if limit is not None and count == limit + 1:
+            warnings.warn("Number of live %s handles exceeds limit %d." % (kind, limit),
+                          HandleLeakWarning, 3)
+        if self.max_age is not None and record.created - self.__checked >= 1.0:
+            self.check()
+    def _release(self, kind, handle):
+        "Removes released handle."
+        with self.__lock:
+            if self.__records.pop((kind, handle.value), None) is not None:
+                self.__counts[kind] -= 1
+    def _release_database(self, database):
+        "Removes all handles of detached database."
+        with self.__lock:
+            for key, record in list(self.__records.items()):
+                if database in record.databases:
+                    del self.__records[key]
+                    self.__counts[record.kind] -= 1
+    def __get_counts(self):
+        with self.__lock:
+            return dict(self.__counts)
+    def handles(self, kind=None, min_age=None):
+        """Returns list of live handles, in order of allocation.
+
+        Keyword Args:
+            kind (str): Handle kind (`HANDLE_STATEMENT`, `HANDLE_BLOB` or
+                `HANDLE_TRANSACTION`). All handles are returned when not specified.
+            min_age (float): Min. age of returned handles in seconds.
+
+        Returns:
+            List of :class:`_HandleRecord` instances.
+        """
+        with self.__lock:
+            records = list(self.__records.values())
+        if kind is not None:
+            records = [record for record in records if record.kind == kind]
+        if min_age is not None:
+            limit = time.time() - min_age
+            records = [record for record in records if record.created <= limit]
+        records.sort(key=lambda record: record.created)
+        return records
+    def check(self):
+        """Issues :class:`HandleLeakWarning` for each live handle older than
+        :attr:`max_age` (once per handle).
+
+        Returns:
+            List of :class:`_HandleRecord` instances older than `max_age`.
+        """
+        self.__checked = time.time()
+        if self.max_age is None:
+            return []
+        records = self.handles(min_age=self.max_age)
+        for record in records:
+            if not record.warned:
+                record.warned = True
+                warnings.warn("Live handle exceeds max. age %.1f s: %s"
+                              % (self.max_age, record.format()), HandleLeakWarning, 2)
+        return records
+    def report(self, kind=None, min_age=None):
+        """Returns description of live handles (with their allocation stacks).
+
+        Keyword Args:
+            kind (str): Handle kind. All handles are described when not specified.
+            min_age (float): Min. age of described handles in seconds.
+
+        Returns:
+            str: Description of handles.
+        """
+        return '\n'.join(record.format() for record in self.handles(kind, min_age))
+    #: dict: (R/O) Numbers of live handles, as mapping from handle kind to number.
+    counts = property(__get_counts)
+
+class _ArrayDescriptor(object):
+    """An internal class that holds ISC_ARRAY_DESC of ARRAY column together with
+    values derived from it. Descriptors are cached by :class:`Connection`.
+    """
+    __slots__ = ('desc', 'subtype', 'dtype', 'scale', 'esize', 'dimensions',
+                 'total_size', 'numpy_plan')
+    def __init__(self, desc, subtype):
+        #: ISC_ARRAY_DESC: Descriptor returned by `isc_array_lookup_bounds`.
+        self.desc = desc
+        #: int: Subtype of ARRAY column (RDB$FIELD_SUB_TYPE).
+        self.subtype = subtype
+        #: int: BLR data type of ARRAY elements.
+        self.dtype = desc.array_desc_dtype
+        #: int: Number of decimal digits after decimal point for scaled integers.
+        self.scale = abs(256 - desc.array_desc_scale) if desc.array_desc_scale else 0
+        #: int: Size of ARRAY element in slice buffer.
+        self.esize = desc.array_desc_length
+        if self.dtype in (blr_varying, blr_varying2):
+            self.esize += 2
+        #: list: Number of elements in each dimension.
+        self.dimensions = []
+        count = 1
+        for dimension in xrange(desc.array_desc_dimensions):
+            bounds = desc.array_desc_bounds[dimension]
+            self.dimensions.append((bounds.array_bound_upper + 1) - bounds.array_bound_lower)
+            count *= self.dimensions[dimension]
+        #: int: Size of ARRAY slice buffer.
+        self.total_size = count * self.esize
+        #: Cached result of :func:`_get_numpy_array_plan`.
+        self.numpy_plan = False
+    def get_numpy_plan(self):
+        "Returns (and caches) NumPy plan for ARRAY elements, see :func:`_get_numpy_array_plan`."
+        if self.numpy_plan is False:
+            self.numpy_plan = _get_numpy_array_plan(self)
+        return self.numpy_plan
+
 class _RequestBufferBuilder(object):
     def __init__(self, clusterIdentifier=None):
         self.clear()
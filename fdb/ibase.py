@@ -24,7 +24,7 @@
 #from ctypes import *
 from ctypes import c_char_p, c_wchar_p, c_char, c_byte, c_ubyte, c_int, c_uint, c_short, c_ushort, \
      c_long, c_ulong, c_longlong, c_ulonglong, c_void_p, c_int8, c_int16, c_int32, c_int64, c_uint8, \
-     c_uint16, c_uint32, c_uint64, POINTER, Structure, CFUNCTYPE, CDLL
+     c_uint16, c_uint32, c_uint64, POINTER, Structure, CFUNCTYPE, CDLL, cast
 from ctypes.util import find_library
 import sys
 from locale import getpreferredencoding
@@ -1337,6 +1337,158 @@ ptrdiff_t = c_long
 size_t = c_ulong
 uintmax_t = c_ulong
 
+# Firebird 4 OO API - subset of interfaces used for batch execution (IBatch).
+#
+# Interfaces are passed as c_void_p. Each interface object starts with dummy
+# pointer followed by pointer to its virtual method table. Method tables start
+# with dummy pointer and version, followed by methods in the order of
+# declaration (including inherited ones). Methods not used by FDB are declared
+# as c_void_p just to keep the table layout.
+
+Cardinal = c_uint
+
+#: Status vector argument types
+isc_arg_end = 0
+isc_arg_gds = 1
+isc_arg_string = 2
+isc_arg_cstring = 3
+
+class FB_INTERFACE(Structure):
+    "Firebird OO API interface object"
+    pass
+FB_INTERFACE._fields_ = [('dummy', c_void_p), ('vtable', c_void_p)]
+
+class IStatus_VTable(Structure):
+    "IStatus (Disposable) virtual method table"
+    pass
+IStatus_VTable._fields_ = [
+    ('dummy', c_void_p), ('version', uintptr_t),
+    ('dispose', CFUNCTYPE(None, c_void_p)),
+    ('init', CFUNCTYPE(None, c_void_p)),
+    ('getState', CFUNCTYPE(Cardinal, c_void_p)),
+    ('setErrors2', c_void_p), ('setWarnings2', c_void_p),
+    ('setErrors', c_void_p), ('setWarnings', c_void_p),
+    ('getErrors', CFUNCTYPE(c_void_p, c_void_p)),
+    ('getWarnings', c_void_p), ('clone', c_void_p),
+]
+#: IStatus state flags
+IStatus_STATE_WARNINGS = 1
+IStatus_STATE_ERRORS = 2
+
+class IMaster_VTable(Structure):
+    "IMaster (Versioned) virtual method table"
+    pass
+IMaster_VTable._fields_ = [
+    ('dummy', c_void_p), ('version', uintptr_t),
+    ('getStatus', CFUNCTYPE(c_void_p, c_void_p)),
+]
+
+class IReferenceCounted_VTable(Structure):
+    "IReferenceCounted virtual method table (used for ITransaction)"
+    pass
+IReferenceCounted_VTable._fields_ = [
+    ('dummy', c_void_p), ('version', uintptr_t),
+    ('addRef', CFUNCTYPE(None, c_void_p)),
+    ('release', CFUNCTYPE(c_int, c_void_p)),
+]
+
+class IStatement_VTable(Structure):
+    "IStatement (ReferenceCounted) virtual method table"
+    pass
+IStatement_VTable._fields_ = [
+    ('dummy', c_void_p), ('version', uintptr_t),
+    ('addRef', CFUNCTYPE(None, c_void_p)),
+    ('release', CFUNCTYPE(c_int, c_void_p)),
+    ('getInfo', c_void_p), ('getType', c_void_p), ('getPlan', c_void_p),
+    ('getAffectedRecords', c_void_p), ('getInputMetadata', c_void_p),
+    ('getOutputMetadata', c_void_p), ('execute', c_void_p), ('openCursor', c_void_p),
+    ('setCursorName', c_void_p), ('deprecatedFree', c_void_p), ('getFlags', c_void_p),
+    # Firebird 4
+    ('getTimeout', c_void_p), ('setTimeout', c_void_p),
+    ('createBatch', CFUNCTYPE(c_void_p, c_void_p, c_void_p, c_void_p, Cardinal, c_char_p)),
+]
+#: IStatement version that introduced createBatch
+IStatement_VERSION_BATCH = 4
+
+class IMessageMetadata_VTable(Structure):
+    "IMessageMetadata (ReferenceCounted) virtual method table"
+    pass
+IMessageMetadata_VTable._fields_ = [
+    ('dummy', c_void_p), ('version', uintptr_t),
+    ('addRef', CFUNCTYPE(None, c_void_p)),
+    ('release', CFUNCTYPE(c_int, c_void_p)),
+    ('getCount', CFUNCTYPE(Cardinal, c_void_p, c_void_p)),
+    ('getField', c_void_p), ('getRelation', c_void_p), ('getOwner', c_void_p),
+    ('getAlias', c_void_p),
+    ('getType', CFUNCTYPE(Cardinal, c_void_p, c_void_p, Cardinal)),
+    ('isNullable', CFUNCTYPE(c_int, c_void_p, c_void_p, Cardinal)),
+    ('getSubType', CFUNCTYPE(c_int, c_void_p, c_void_p, Cardinal)),
+    ('getLength', CFUNCTYPE(Cardinal, c_void_p, c_void_p, Cardinal)),
+    ('getScale', CFUNCTYPE(c_int, c_void_p, c_void_p, Cardinal)),
+    ('getCharSet', CFUNCTYPE(Cardinal, c_void_p, c_void_p, Cardinal)),
+    ('getOffset', CFUNCTYPE(Cardinal, c_void_p, c_void_p, Cardinal)),
+    ('getNullOffset', CFUNCTYPE(Cardinal, c_void_p, c_void_p, Cardinal)),
+    ('getBuilder', c_void_p),
+    ('getMessageLength', CFUNCTYPE(Cardinal, c_void_p, c_void_p)),
+    # Firebird 4
+    ('getAlignment', CFUNCTYPE(Cardinal, c_void_p, c_void_p)),
+    ('getAlignedLength', CFUNCTYPE(Cardinal, c_void_p, c_void_p)),
+]
+
+class IBatch_VTable(Structure):
+    "IBatch (ReferenceCounted) virtual method table"
+    pass
+IBatch_VTable._fields_ = [
+    ('dummy', c_void_p), ('version', uintptr_t),
+    ('addRef', CFUNCTYPE(None, c_void_p)),
+    ('release', CFUNCTYPE(c_int, c_void_p)),
+    ('add', CFUNCTYPE(None, c_void_p, c_void_p, Cardinal, c_void_p)),
+    ('addBlob', c_void_p), ('appendBlobData', c_void_p), ('addBlobStream', c_void_p),
+    ('registerBlob', CFUNCTYPE(None, c_void_p, c_void_p, POINTER(ISC_QUAD), POINTER(ISC_QUAD))),
+    ('execute', CFUNCTYPE(c_void_p, c_void_p, c_void_p, c_void_p)),
+    ('cancel', CFUNCTYPE(None, c_void_p, c_void_p)),
+    ('getBlobAlignment', c_void_p),
+    ('getMetadata', CFUNCTYPE(c_void_p, c_void_p, c_void_p)),
+]
+#: IBatch parameter block version and tags
+IBatch_VERSION1 = 1
+IBatch_TAG_MULTIERROR = 1
+IBatch_TAG_RECORD_COUNTS = 2
+IBatch_TAG_BUFFER_BYTES_SIZE = 3
+IBatch_TAG_BLOB_POLICY = 4
+IBatch_TAG_DETAILED_ERRORS = 5
+#: IBatch BLOB policies
+IBatch_BLOB_NONE = 0
+IBatch_BLOB_ID_ENGINE = 1
+IBatch_BLOB_ID_USER = 2
+IBatch_BLOB_STREAM = 3
+
+class IBatchCompletionState_VTable(Structure):
+    "IBatchCompletionState (Disposable) virtual method table"
+    pass
+IBatchCompletionState_VTable._fields_ = [
+    ('dummy', c_void_p), ('version', uintptr_t),
+    ('dispose', CFUNCTYPE(None, c_void_p)),
+    ('getSize', CFUNCTYPE(Cardinal, c_void_p, c_void_p)),
+    ('getState', CFUNCTYPE(c_int, c_void_p, c_void_p, Cardinal)),
+    ('findError', CFUNCTYPE(Cardinal, c_void_p, c_void_p, Cardinal)),
+    ('getStatus', CFUNCTYPE(None, c_void_p, c_void_p, c_void_p, Cardinal)),
+]
+#: IBatchCompletionState values
+IBatchCompletionState_EXECUTE_FAILED = -1
+IBatchCompletionState_SUCCESS_NO_INFO = -2
+IBatchCompletionState_NO_MORE_ERRORS = 0xFFFFFFFF
+
+def oo_vtable(interface, vtable_type):
+    """Returns virtual method table of Firebird OO API interface.
+
+    Args:
+        interface (int or c_void_p): Interface pointer.
+        vtable_type: Structure of virtual method table.
+    """
+    obj = cast(interface, POINTER(FB_INTERFACE)).contents
+    return cast(obj.vtable, POINTER(vtable_type)).contents
+
 class fbclient_API(object):
     """Firebird Client API interface object. Loads Firebird Client Library and exposes
     API functions as member methods. Uses :ref:`ctypes <python:module-ctypes>` for bindings.
@@ -2197,6 +2349,26 @@ class fbclient_API(object):
         self.fb_shutdown = fb_library.fb_shutdown
         self.fb_shutdown.restype = c_int
         self.fb_shutdown.argtypes = [c_uint, c_int]
+        # Firebird 4: OO API interfaces for legacy handles (used for batch execution)
+        try:
+            #: fb_get_master_interface()
+            self.fb_get_master_interface = fb_library.fb_get_master_interface
+            self.fb_get_master_interface.restype = c_void_p
+            self.fb_get_master_interface.argtypes = []
+            #: fb_get_statement_interface(POINTER(ISC_STATUS), POINTER(c_void_p), POINTER(isc_stmt_handle))
+            self.fb_get_statement_interface = fb_library.fb_get_statement_interface
+            self.fb_get_statement_interface.restype = ISC_STATUS
+            self.fb_get_statement_interface.argtypes = [POINTER(ISC_STATUS), POINTER(c_void_p),
+                                                        POINTER(isc_stmt_handle)]
+            #: fb_get_transaction_interface(POINTER(ISC_STATUS), POINTER(c_void_p), POINTER(isc_tr_handle))
+            self.fb_get_transaction_interface = fb_library.fb_get_transaction_interface
+            self.fb_get_transaction_interface.restype = ISC_STATUS
+            self.fb_get_transaction_interface.argtypes = [POINTER(ISC_STATUS), POINTER(c_void_p),
+                                                          POINTER(isc_tr_handle)]
+        except AttributeError:
+            self.fb_get_master_interface = None
+            self.fb_get_statement_interface = None
+            self.fb_get_transaction_interface = None
 
     def isc_event_block(self, event_buffer, result_buffer, *args):
         "Injects variable number of parameters into C_isc_event_block call"
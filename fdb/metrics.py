@@ -0,0 +1,433 @@
+#coding:utf-8
+#
+#   PROGRAM:     fdb
+#   MODULE:      metrics.py
+#   DESCRIPTION: Python driver for Firebird - Driver metrics in Prometheus text format
+#   CREATED:     17.10.2026
+#
+#  Software distributed under the License is distributed AS IS,
+#  WITHOUT WARRANTY OF ANY KIND, either express or implied.
+#  See the License for the specific language governing rights
+#  and limitations under the License.
+#
+#  The Original Code was created by Pavel Cisar
+#
+#  Copyright (c) Pavel Cisar <pcisar@users.sourceforge.net>
+#  and all contributors signed below.
+#
+#  All Rights Reserved.
+#  Contributor(s): ______________________________________.
+
+"""Process-wide driver metrics rendered in Prometheus text exposition format.
+
+:class:`MetricsRegistry` collects counters and histograms from driver hooks for
+all connections in the process, and renders them together with statistics of
+connections, statement caches and server-side counters (sampled periodically)
+without any external dependencies.
+
+Example:
+    .. code-block:: python
+
+        registry = fdb.metrics.MetricsRegistry()
+        registry.start()
+        ...
+        # In HTTP handler of metrics endpoint
+        return registry.render(), fdb.metrics.CONTENT_TYPE
+"""
+
+import fdb
+import time
+import bisect
+import weakref
+import threading
+
+#: Content type of rendered metrics (Prometheus text format 0.0.4).
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+#: Default upper bounds (in seconds) of histogram buckets.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+#: Default min. interval (in seconds) between samples of server counters for connection.
+DEFAULT_SERVER_STATS_INTERVAL = 30.0
+
+# Statement type names used as label values
+_STATEMENT_TYPES = dict((getattr(fdb.ibase, name), name[len('isc_info_sql_stmt_'):])
+                        for name in dir(fdb.ibase)
+                        if name.startswith('isc_info_sql_stmt_') and
+                        name not in ('isc_info_sql_stmt_type', 'isc_info_sql_stmt_flags'))
+
+# Server counters: info code -> (metric name, help, aggregation over connections to database)
+_SERVER_STATS = (
+    (fdb.isc_info_reads, 'fdb_server_page_reads',
+     'Page reads from disk by connections to database.', sum),
+    (fdb.isc_info_writes, 'fdb_server_page_writes',
+     'Page writes to disk by connections to database.', sum),
+    (fdb.isc_info_fetches, 'fdb_server_page_fetches',
+     'Page reads from page cache by connections to database.', sum),
+    (fdb.isc_info_marks, 'fdb_server_page_marks',
+     'Page writes to page cache by connections to database.', sum),
+    (fdb.isc_info_current_memory, 'fdb_server_current_memory_bytes',
+     'Memory currently used by server.', max),
+    (fdb.isc_info_max_memory, 'fdb_server_max_memory_bytes',
+     'Max. memory used by server since the first connection to database.', max),
+    (fdb.isc_info_oldest_transaction, 'fdb_server_oldest_interesting_transaction',
+     'ID of the oldest interesting transaction (OIT).', max),
+    (fdb.isc_info_oldest_active, 'fdb_server_oldest_active_transaction',
+     'ID of the oldest active transaction (OAT).', max),
+    (fdb.isc_info_oldest_snapshot, 'fdb_server_oldest_snapshot_transaction',
+     'ID of the oldest snapshot transaction (OST).', max),
+    (fdb.isc_info_next_transaction, 'fdb_server_next_transaction',
+     'ID of the next transaction.', max),
+    )
+_SERVER_STATS_CODES = [item[0] for item in _SERVER_STATS]
+
+def _connection_object(connection):
+    "Returns connection object for `connection` that could be weak proxy."
+    # Dirty trick (see Cursor.execute) to get object referenced by weak proxy
+    return connection.__repr__.__self__
+
+def _format_value(value):
+    if isinstance(value, float):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(value)
+    return str(value)
+
+def _format_labels(labelnames, values):
+    if not labelnames:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (name, str(value).replace('\\', '\\\\')
+                                          .replace('"', '\\"').replace('\n', '\\n'))
+                             for name, value in zip(labelnames, values))
+
+class _Metric(object):
+    "Base class for metrics. Values are stored under tuples of label values."
+    kind = 'untyped'
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values = {}
+        if not labelnames:
+            self.values[()] = self._zero()
+    def _zero(self):
+        "Returns initial value."
+        return 0
+    def _samples(self):
+        "Yields (name suffix, label names, label values, value) tuples."
+        for labels in sorted(self.values):
+            yield '', self.labelnames, labels, self.values[labels]
+    def render(self, lines):
+        "Appends lines in Prometheus text format to `lines`."
+        lines.append('# HELP %s %s' % (self.name, self.help))
+        lines.append('# TYPE %s %s' % (self.name, self.kind))
+        for suffix, labelnames, labels, value in self._samples():
+            lines.append('%s%s%s %s' % (self.name, suffix, _format_labels(labelnames, labels),
+                                        _format_value(value)))
+
+class _Counter(_Metric):
+    kind = 'counter'
+    def inc(self, amount=1, labels=()):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+class _Gauge(_Metric):
+    kind = 'gauge'
+    def set(self, value, labels=()):
+        self.values[labels] = value
+
+class _Histogram(_Metric):
+    kind = 'histogram'
+    def __init__(self, name, help, buckets, labelnames=()):
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        super(_Histogram, self).__init__(name, help, labelnames)
+    def _zero(self):
+        # Non-cumulative bucket counts, sum
+        return [[0] * len(self.buckets), 0.0]
+    def observe(self, value, labels=()):
+        data = self.values.get(labels)
+        if data is None:
+            data = self.values[labels] = self._zero()
+        data[0][bisect.bisect_left(self.buckets, value)] += 1
+        data[1] += value
+    def _samples(self):
+        names = self.labelnames + ('le',)
+        for labels in sorted(self.values):
+            counts, total = self.values[labels]
+            count = 0
+            for bound, bucket in zip(self.buckets, counts):
+                count += bucket
+                yield '_bucket', names, labels + (_format_value(float(bound)),), count
+            yield '_sum', self.labelnames, labels, total
+            yield '_count', self.labelnames, labels, count
+
+class _ConnectionState(object):
+    "Internal record for connection tracked by :class:`MetricsRegistry`."
+    def __init__(self, connection):
+        self.connection = weakref.proxy(connection)
+        #: Database name (label value)
+        self.database = connection.database_name
+        #: Time of last sample of server counters
+        self.sampled = None
+        #: Last sample of server counters (info code -> value)
+        self.server_stats = None
+
+class MetricsRegistry(object):
+    """Process-wide registry of driver metrics.
+
+    When started, registry installs driver hooks to count prepared and executed
+    statements, fetched rows, size of fetched row buffers, BLOB bytes, commits and
+    rollbacks, and to collect histograms of prepare, execute, fetch and commit
+    times. It tracks connections attached while it's active (and connections
+    used for statement execution), to report numbers of open connections,
+    active transactions, cached statements and pooled statement handles, and
+    counters of statement caches.
+
+    Server counters (page I/O, memory usage and transaction markers) are sampled
+    for each connection at most once per `server_stats_interval` seconds, by
+    thread that executes statement on the connection (connections must not be
+    used by multiple threads at once). They are reported per database.
+
+    Metrics could be rendered (for example in response to scrape request) from
+    any thread.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS,
+                 server_stats_interval=DEFAULT_SERVER_STATS_INTERVAL):
+        """
+        Keyword Args:
+            buckets (sequence): Upper bounds (in seconds) of histogram buckets.
+            server_stats_interval (float): Min. interval (in seconds) between samples
+                of server counters for connection. None disables the sampling.
+        """
+        #: float: Min. interval (in seconds) between samples of server counters.
+        self.server_stats_interval = server_stats_interval
+        self.__lock = threading.Lock()
+        self.__active = False
+        self.__connections = weakref.WeakKeyDictionary()
+        # Statement cache and handle pool counters of closed connections
+        self.__retired = {'hits': 0, 'misses': 0, 'evictions': 0, 'allocations': 0,
+                          'reuses': 0}
+        # Output message sizes of statements
+        self.__row_sizes = weakref.WeakKeyDictionary()
+        self.__prepared = _Counter('fdb_statements_prepared_total',
+                                   'Number of prepared statements.')
+        self.__executed = _Counter('fdb_statements_executed_total',
+                                   'Number of executed statements.', ('type',))
+        self.__rows = _Counter('fdb_rows_fetched_total', 'Number of fetched rows.')
+        self.__row_bytes = _Counter('fdb_fetched_row_bytes_total',
+                                    'Size of decoded row buffers (declared size of columns).')
+        self.__blob_read = _Counter('fdb_blob_read_bytes_total',
+                                    'Number of bytes read from BLOBs.')
+        self.__blob_written = _Counter('fdb_blob_written_bytes_total',
+                                       'Number of bytes written to BLOBs.')
+        self.__commits = _Counter('fdb_transactions_committed_total',
+                                  'Number of transaction commits.')
+        self.__rollbacks = _Counter('fdb_transactions_rolled_back_total',
+                                    'Number of transaction rollbacks.')
+        self.__prepare_time = _Histogram('fdb_statement_prepare_seconds',
+                                         'Time spent by statement prepare.', buckets)
+        self.__execute_time = _Histogram('fdb_statement_execute_seconds',
+                                         'Time spent by statement execution.', buckets)
+        self.__fetch_time = _Histogram('fdb_statement_fetch_seconds',
+                                       'Time spent by fetching of result set.', buckets)
+        self.__commit_time = _Histogram('fdb_transaction_commit_seconds',
+                                        'Time spent by transaction commit.', buckets)
+        self.__metrics = [self.__prepared, self.__executed, self.__rows, self.__row_bytes,
+                          self.__blob_read, self.__blob_written, self.__commits,
+                          self.__rollbacks, self.__prepare_time, self.__execute_time,
+                          self.__fetch_time, self.__commit_time]
+        self.__hooks = [(fdb.HOOK_DATABASE_ATTACHED, self.__attached),
+                        (fdb.HOOK_DATABASE_CLOSED, self.__closed),
+                        (fdb.HOOK_STATEMENT_PREPARED, self.__statement_prepared),
+                        (fdb.HOOK_STATEMENT_EXECUTED, self.__statement_executed),
+                        (fdb.HOOK_STATEMENT_FETCHED, self.__statement_fetched),
+                        (fdb.HOOK_TRANSACTION_COMMITTED, self.__committed),
+                        (fdb.HOOK_TRANSACTION_ROLLED_BACK, self.__rolled_back),
+                        (fdb.HOOK_BLOB_READ, self.__blob_read_hook),
+                        (fdb.HOOK_BLOB_WRITTEN, self.__blob_written_hook)]
+    def __enter__(self):
+        self.start()
+        return self
+    def __exit__(self, *args):
+        self.stop()
+    def __get_active(self):
+        return self.__active
+    def __attached(self, connection):
+        self.add_connection(connection)
+    def __closed(self, connection):
+        with self.__lock:
+            if self.__connections.pop(connection, None) is not None:
+                self.__retire(connection)
+    def __retire(self, connection):
+        "Moves statement cache counters of closed `connection` to totals."
+        retired = self.__retired
+        cache = connection.statement_cache
+        retired['hits'] += cache.hits
+        retired['misses'] += cache.misses
+        retired['evictions'] += cache.evictions
+        pool = connection.statement_handle_pool
+        retired['allocations'] += pool.allocations
+        retired['reuses'] += pool.reuses
+    def __statement_prepared(self, statement, elapsed):
+        with self.__lock:
+            self.__prepared.inc()
+            self.__prepare_time.observe(elapsed)
+    def __statement_executed(self, statement, elapsed, parameters):
+        prepared = isinstance(statement, fdb.PreparedStatement)
+        with self.__lock:
+            if prepared:
+                kind = _STATEMENT_TYPES.get(statement.statement_type, 'unknown')
+            else:
+                # SQL command executed without prepare
+                kind = 'immediate'
+            self.__executed.inc(labels=(kind,))
+            self.__execute_time.observe(elapsed)
+        if self.server_stats_interval is None or not prepared or statement.cursor is None:
+            return
+        connection = _connection_object(statement.cursor._connection)
+        state = self.__connections.get(connection)
+        if state is None:
+            state = self.add_connection(connection)
+        now = time.time()
+        if state.sampled is None or now - state.sampled >= self.server_stats_interval:
+            try:
+                state.server_stats = connection.db_info(_SERVER_STATS_CODES)
+            except fdb.DatabaseError:
+                # Errors in metrics must not break the executed statement,
+                # previous sample is kept and new one is taken next time.
+                return
+            state.sampled = now
+    def __statement_fetched(self, statement, elapsed, rows):
+        size = self.__row_sizes.get(statement)
+        if size is None:
+            sqlda = statement._out_sqlda
+            size = sum(sqlda.sqlvar[i].sqllen for i in range(statement.n_output_params))
+            self.__row_sizes[statement] = size
+        with self.__lock:
+            self.__rows.inc(rows)
+            self.__row_bytes.inc(rows * size)
+            self.__fetch_time.observe(elapsed)
+    def __committed(self, transaction, elapsed, retaining):
+        with self.__lock:
+            self.__commits.inc()
+            self.__commit_time.observe(elapsed)
+    def __rolled_back(self, transaction, elapsed, retaining):
+        with self.__lock:
+            self.__rollbacks.inc()
+    def __blob_read_hook(self, source, elapsed, size):
+        with self.__lock:
+            self.__blob_read.inc(size)
+    def __blob_written_hook(self, writer, elapsed, size):
+        with self.__lock:
+            self.__blob_written.inc(size)
+    def add_connection(self, connection):
+        """Adds connection to connections tracked by registry. Connections attached
+        while registry is active are added automatically.
+
+        Args:
+            connection (:class:`~fdb.Connection`): Connection.
+
+        Returns:
+            Internal record for tracked connection.
+        """
+        state = self.__connections.get(connection)
+        if state is None:
+            state = _ConnectionState(connection)
+            with self.__lock:
+                self.__connections[connection] = state
+        return state
+    def start(self):
+        """Installs driver hooks that collect metrics.
+
+        Raises:
+            fdb.ProgrammingError: When registry is already active.
+        """
+        if self.__active:
+            raise fdb.ProgrammingError("Metrics registry is already active.")
+        self.__active = True
+        for hook_type, hook in self.__hooks:
+            fdb.add_hook(hook_type, hook)
+    def stop(self):
+        "Removes driver hooks. Collected values are retained."
+        if not self.__active:
+            return
+        for hook_type, hook in self.__hooks:
+            fdb.remove_hook(hook_type, hook)
+        self.__active = False
+    def __collect(self):
+        "Returns list of metrics computed from tracked connections."
+        hits = _Counter('fdb_statement_cache_hits_total',
+                        'Number of statements taken from statement cache.')
+        misses = _Counter('fdb_statement_cache_misses_total',
+                          'Number of statements not found in statement cache.')
+        evictions = _Counter('fdb_statement_cache_evictions_total',
+                             'Number of statements dropped from full statement cache.')
+        allocations = _Counter('fdb_statement_handles_allocated_total',
+                               'Number of statement handles allocated by server.')
+        reuses = _Counter('fdb_statement_handles_reused_total',
+                          'Number of statement handles reused from handle pool.')
+        connections = _Gauge('fdb_connections', 'Number of open connections.')
+        transactions = _Gauge('fdb_transactions_active', 'Number of active transactions.')
+        cached = _Gauge('fdb_statements_cached', 'Number of statements in statement caches.')
+        pooled = _Gauge('fdb_statement_handles_pooled',
+                        'Number of idle statement handles in handle pools.')
+        retired = self.__retired
+        totals = dict(retired)
+        counts = {'connections': 0, 'transactions': 0, 'cached': 0, 'pooled': 0}
+        server = {}
+        for state in list(self.__connections.values()):
+            try:
+                con = state.connection
+                if con.closed:
+                    continue
+                cache = con.statement_cache
+                pool = con.statement_handle_pool
+                totals['hits'] += cache.hits
+                totals['misses'] += cache.misses
+                totals['evictions'] += cache.evictions
+                totals['allocations'] += pool.allocations
+                totals['reuses'] += pool.reuses
+                counts['connections'] += 1
+                counts['transactions'] += len([tr for tr in con.transactions if tr.active])
+                counts['cached'] += len(cache)
+                counts['pooled'] += len(pool)
+            except ReferenceError:
+                continue
+            if state.server_stats is not None:
+                server.setdefault(state.database, []).append(state.server_stats)
+        hits.inc(totals['hits'])
+        misses.inc(totals['misses'])
+        evictions.inc(totals['evictions'])
+        allocations.inc(totals['allocations'])
+        reuses.inc(totals['reuses'])
+        connections.set(counts['connections'])
+        transactions.set(counts['transactions'])
+        cached.set(counts['cached'])
+        pooled.set(counts['pooled'])
+        metrics = [hits, misses, evictions, allocations, reuses, connections,
+                   transactions, cached, pooled]
+        tracker = fdb.get_handle_tracker()
+        if tracker is not None:
+            handles = _Gauge('fdb_handles_live', 'Number of live handles (see '
+                             'fdb.enable_handle_tracking).', ('kind',))
+            for kind, count in tracker.counts.items():
+                handles.set(count, (kind,))
+            metrics.append(handles)
+        for code, name, help, aggregate in _SERVER_STATS:
+            gauge = _Gauge(name, help, ('database',))
+            for database, samples in server.items():
+                gauge.set(aggregate([sample[code] for sample in samples]), (database,))
+            metrics.append(gauge)
+        return metrics
+    def render(self):
+        """Returns all metrics in Prometheus text exposition format.
+
+        Returns:
+            str: Metrics (see :data:`CONTENT_TYPE`).
+        """
+        lines = []
+        with self.__lock:
+            for metric in self.__metrics + self.__collect():
+                metric.render(lines)
+        lines.append('')
+        return '\n'.join(lines)
+    #: (Read Only) (bool) True if registry collects metrics from driver hooks.
+    active = property(__get_active)
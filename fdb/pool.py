@@ -0,0 +1,423 @@
+#coding:utf-8
+#
+#   PROGRAM:     fdb
+#   MODULE:      pool.py
+#   DESCRIPTION: Python driver for Firebird - Connection pool
+#   CREATED:     17.10.2026
+#
+#  Software distributed under the License is distributed AS IS,
+#  WITHOUT WARRANTY OF ANY KIND, either express or implied.
+#  See the License for the specific language governing rights
+#  and limitations under the License.
+#
+#  The Original Code was created by Pavel Cisar
+#
+#  Copyright (c) Pavel Cisar <pcisar@users.sourceforge.net>
+#  and all contributors signed below.
+#
+#  All Rights Reserved.
+#  Contributor(s): ______________________________________.
+
+"""Thread-safe pool of database connections.
+
+Pooled connections are ordinary :class:`~fdb.Connection` instances. Calling
+:meth:`~fdb.Connection.close` on connection borrowed from pool (directly or
+when `with` block ends) returns it to the pool instead detaching from database.
+
+Example:
+    .. code-block:: python
+
+        pool = fdb.pool.ConnectionPool(max_size=20, idle_timeout=300,
+                                       dsn='host:employee', user='sysdba',
+                                       password='masterkey')
+        with pool.get() as con:
+            cur = con.cursor()
+            cur.execute('select * from country')
+            ...
+            con.commit()
+"""
+
+import fdb
+import os
+import time
+import weakref
+import threading
+import collections
+
+try:
+    _clock = time.monotonic
+except AttributeError:
+    _clock = time.time
+
+# Pool that owns each borrowed connection (used by detach request hook)
+_owners = weakref.WeakKeyDictionary()
+# Connections inherited from parent process, that must not be detached in child.
+_inherited = []
+_hook_lock = threading.Lock()
+_hook_installed = False
+
+def _detach_request(connection):
+    "HOOK_DATABASE_DETACH_REQUEST hook that returns borrowed connections to their pool."
+    pool = _owners.get(connection)
+    if pool is not None:
+        pool.release(connection)
+        return True
+    return False
+
+def _install_hook():
+    global _hook_installed
+    with _hook_lock:
+        if not _hook_installed:
+            fdb.add_hook(fdb.HOOK_DATABASE_DETACH_REQUEST, _detach_request)
+            _hook_installed = True
+
+class PoolTimeout(fdb.OperationalError):
+    "Exception raised when connection could not be borrowed from pool in time."
+    pass
+
+class PoolStats(object):
+    """Connection pool usage statistics.
+
+    Counters are cumulative since pool was created.
+    """
+    def __init__(self):
+        #: int: Number of connections borrowed from pool.
+        self.checkouts = 0
+        #: int: Number of borrow requests that had to wait for available connection.
+        self.waits = 0
+        #: float: Total time (in seconds) spent by waiting for available connection.
+        self.wait_time = 0.0
+        #: int: Number of borrow requests that failed because time limit expired.
+        self.timeouts = 0
+        #: int: Number of connections created by pool.
+        self.created = 0
+        #: int: Number of connections closed by pool (expired, failed or not reusable).
+        self.closed = 0
+        #: int: Number of pooled connections that failed the health check.
+        self.failed_checks = 0
+    def __repr__(self):
+        return ('PoolStats(checkouts=%d, waits=%d, wait_time=%.3f, timeouts=%d,'
+                ' created=%d, closed=%d, failed_checks=%d)'
+                % (self.checkouts, self.waits, self.wait_time, self.timeouts,
+                   self.created, self.closed, self.failed_checks))
+
+class _PoolEntry(object):
+    "Internal record for pooled connection."
+    __slots__ = ('connection', 'created', 'released', 'default_tpb')
+    # Connection is held only while it's idle
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = _clock()
+        self.released = self.created
+        self.default_tpb = connection.default_tpb
+
+class ConnectionPool(object):
+    """Thread-safe pool of database connections.
+
+    Connections are created on demand (up to `max_size`) by :func:`fdb.connect`
+    called with keyword arguments passed to constructor, and are returned to
+    pool when they are closed or passed to :meth:`release`.
+
+    When connection is returned to pool, all its active transactions are rolled
+    back, transactions started by :meth:`~fdb.Connection.trans` are closed and
+    default TPB of connection and its :attr:`~fdb.Connection.main_transaction`
+    is restored. Connections that can't be reset or outlived `max_lifetime` are
+    closed.
+
+    Connections in pool share cache of metadata (precision and subtype of
+    fields) used to describe result sets, so it's loaded from database only once.
+
+    Pool detects that the process was forked. Connections inherited from parent
+    process are abandoned without detaching (they can't be safely used nor
+    closed by child process), and child process gets new connections.
+    """
+    def __init__(self, min_size=0, max_size=10, idle_timeout=None, max_lifetime=None,
+                 timeout=None, health_check=True, **kwargs):
+        """
+        Keyword Args:
+            min_size (int): Number of connections created in advance and kept open
+                even when they are idle.
+            max_size (int): Max. number of connections (idle and borrowed).
+            idle_timeout (float): Number of seconds after which idle connections
+                above `min_size` are closed. None means no limit.
+            max_lifetime (float): Number of seconds after which connection is closed
+                (when it's idle). None means no limit.
+            timeout (float): Default max. number of seconds :meth:`get` waits for
+                available connection. None means wait indefinitely.
+            health_check (bool): Check whether idle connection is still usable
+                (with round trip to server) before it's borrowed.
+            kwargs: Arguments for :func:`fdb.connect`.
+
+        Raises:
+            fdb.ProgrammingError: For bad parameter values.
+            fdb.DatabaseError: When initial connections cannot be established.
+        """
+        if max_size < 1:
+            raise fdb.ProgrammingError("Pool max_size must be positive number.")
+        if not 0 <= min_size <= max_size:
+            raise fdb.ProgrammingError("Pool min_size must be between zero and max_size.")
+        #: int: Number of connections kept open even when they are idle.
+        self.min_size = min_size
+        #: int: Max. number of connections.
+        self.max_size = max_size
+        #: float: Seconds after which idle connections above `min_size` are closed.
+        self.idle_timeout = idle_timeout
+        #: float: Seconds after which connection is closed.
+        self.max_lifetime = max_lifetime
+        #: float: Default max. number of seconds :meth:`get` waits for connection.
+        self.timeout = timeout
+        #: bool: Check idle connections before they're borrowed.
+        self.health_check = health_check
+        self.__connect_args = kwargs
+        self.__lock = threading.Condition(threading.RLock())
+        self.__idle = collections.deque()
+        self.__borrowed = {}
+        self.__pending = 0
+        self.__waiters = 0
+        self.__closed = False
+        self.__pid = os.getpid()
+        self.__stats = PoolStats()
+        # Connections to the same database share cached metadata
+        self.__metadata_cache = fdb.fbcore._FieldMetadataCache()
+        _install_hook()
+        for i in range(min_size):
+            self.__idle.append(self.__create())
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
+    def __create(self):
+        connection = fdb.connect(**self.__connect_args)
+        connection._metadata_cache = self.__metadata_cache
+        with self.__lock:
+            self.__stats.created += 1
+        return _PoolEntry(connection)
+    def __discard(self, entry):
+        with self.__lock:
+            self.__stats.closed += 1
+        _owners.pop(entry.connection, None)
+        try:
+            entry.connection.close()
+        except fdb.Error:
+            pass
+    def __check_fork(self):
+        # Must be called with lock held
+        if os.getpid() != self.__pid:
+            for entry in self.__idle:
+                entry.connection._db_handle = None
+                _inherited.append(entry.connection)
+            for ref, entry in list(self.__borrowed.values()):
+                connection = ref()
+                if connection is not None:
+                    _inherited.append(connection)
+            self.__idle.clear()
+            self.__borrowed.clear()
+            self.__pending = 0
+            self.__pid = os.getpid()
+    def __expired(self, entry, now):
+        return self.max_lifetime is not None and now - entry.created >= self.max_lifetime
+    def __collect_expired(self):
+        # Must be called with lock held. Returns idle entries that should be closed.
+        now = _clock()
+        expired = []
+        keep = collections.deque()
+        idle = len(self.__idle)
+        for entry in self.__idle:
+            total = idle + len(self.__borrowed) + self.__pending - len(expired)
+            if self.__expired(entry, now) or (self.idle_timeout is not None and total > self.min_size
+                                              and now - entry.released >= self.idle_timeout):
+                expired.append(entry)
+            else:
+                keep.append(entry)
+        self.__idle = keep
+        return expired
+    def __is_usable(self, entry):
+        connection = entry.connection
+        if connection.closed:
+            return False
+        if self.health_check:
+            try:
+                connection.db_info(fdb.isc_info_attachment_id)
+            except fdb.Error:
+                return False
+        return True
+    def __reset(self, entry):
+        connection = entry.connection
+        for transaction in connection.transactions[2:]:
+            transaction.default_action = 'rollback'
+            transaction.close()
+        del connection._transactions[2:]
+        for transaction in connection.transactions:
+            if transaction.active:
+                transaction.rollback()
+        connection.default_tpb = entry.default_tpb
+        connection.main_transaction.default_tpb = entry.default_tpb
+    def __borrowed_deleted(self, key):
+        # Borrowed connection was garbage collected without returning to pool
+        with self.__lock:
+            if self.__borrowed.pop(key, None) is not None:
+                self.__lock.notify()
+    def __checkout(self, entry):
+        # Must be called with lock held
+        connection = entry.connection
+        key = id(connection)
+        pool_ref = weakref.ref(self)
+        def deleted(ref):
+            pool = pool_ref()
+            if pool is not None:
+                pool.__borrowed_deleted(key)
+        # Pool must not keep borrowed connection alive
+        entry.connection = None
+        self.__borrowed[key] = (weakref.ref(connection, deleted), entry)
+        _owners[connection] = self
+        self.__stats.checkouts += 1
+        return connection
+    def get(self, timeout=-1):
+        """Borrow connection from pool.
+
+        Connection is returned to pool by its :meth:`~fdb.Connection.close`
+        method, or by :meth:`release`.
+
+        Keyword Args:
+            timeout (float): Max. number of seconds to wait for available connection.
+                None means wait indefinitely. If not specified, :attr:`timeout`
+                is used.
+
+        Returns:
+            :class:`~fdb.Connection` instance.
+
+        Raises:
+            fdb.ProgrammingError: When pool is closed.
+            PoolTimeout: When no connection is available in time.
+            fdb.DatabaseError: When new connection cannot be established.
+        """
+        if timeout == -1:
+            timeout = self.timeout
+        deadline = None if timeout is None else _clock() + timeout
+        waited = None
+        while True:
+            with self.__lock:
+                while True:
+                    if self.__closed:
+                        raise fdb.ProgrammingError("Connection pool is closed.")
+                    self.__check_fork()
+                    expired = self.__collect_expired()
+                    entry = None
+                    create = False
+                    # New requests must not take connections from those who wait longer
+                    if len(self.__idle) > (0 if waited is not None else self.__waiters):
+                        entry = self.__idle.pop()
+                        # Reserve the slot while connection is checked
+                        self.__pending += 1
+                        break
+                    if len(self.__idle) + len(self.__borrowed) + self.__pending < self.max_size:
+                        self.__pending += 1
+                        create = True
+                        break
+                    if expired:
+                        break
+                    now = _clock()
+                    if waited is None:
+                        waited = now
+                        self.__stats.waits += 1
+                    if deadline is not None and now >= deadline:
+                        self.__stats.timeouts += 1
+                        self.__stats.wait_time += now - waited
+                        raise PoolTimeout("Timeout while waiting for available connection.")
+                    self.__waiters += 1
+                    try:
+                        self.__lock.wait(None if deadline is None else deadline - now)
+                    finally:
+                        self.__waiters -= 1
+            for item in expired:
+                self.__discard(item)
+            if entry is None and not create:
+                continue
+            try:
+                if create:
+                    entry = self.__create()
+                elif not self.__is_usable(entry):
+                    with self.__lock:
+                        self.__stats.failed_checks += 1
+                        self.__pending -= 1
+                    self.__discard(entry)
+                    continue
+            except:
+                with self.__lock:
+                    self.__pending -= 1
+                    self.__lock.notify()
+                raise
+            with self.__lock:
+                self.__pending -= 1
+                if waited is not None:
+                    self.__stats.wait_time += _clock() - waited
+                return self.__checkout(entry)
+    def release(self, connection):
+        """Return borrowed connection to pool.
+
+        Args:
+            connection (:class:`~fdb.Connection`): Connection borrowed from this pool.
+
+        Raises:
+            fdb.ProgrammingError: When connection was not borrowed from this pool.
+        """
+        with self.__lock:
+            if os.getpid() != self.__pid:
+                # Connection inherited from parent process
+                self.__check_fork()
+                _owners.pop(connection, None)
+                return
+            item = self.__borrowed.get(id(connection))
+            if item is None or item[0]() is not connection:
+                raise fdb.ProgrammingError("Connection was not borrowed from this pool.")
+            del self.__borrowed[id(connection)]
+            _owners.pop(connection, None)
+            entry = item[1]
+            entry.connection = connection
+            self.__pending += 1
+        reusable = not (self.__closed or connection.closed or connection.group is not None
+                        or self.__expired(entry, _clock()))
+        if reusable:
+            try:
+                self.__reset(entry)
+            except fdb.Error:
+                reusable = False
+        if not reusable:
+            self.__discard(entry)
+        with self.__lock:
+            self.__pending -= 1
+            if reusable:
+                entry.released = _clock()
+                self.__idle.append(entry)
+            self.__lock.notify()
+    def close(self):
+        """Close all idle connections and the pool. Borrowed connections are
+        closed when they are returned to pool.
+        """
+        with self.__lock:
+            self.__closed = True
+            self.__check_fork()
+            idle = list(self.__idle)
+            self.__idle.clear()
+            self.__lock.notify_all()
+        for entry in idle:
+            self.__discard(entry)
+    def __get_size(self):
+        with self.__lock:
+            return len(self.__idle) + len(self.__borrowed)
+    def __get_idle(self):
+        with self.__lock:
+            return len(self.__idle)
+    def __get_borrowed(self):
+        with self.__lock:
+            return len(self.__borrowed)
+    #: bool: True if pool is closed.
+    closed = property(lambda self: self.__closed)
+    #: int: Number of open connections (idle and borrowed).
+    size = property(__get_size)
+    #: int: Number of idle connections.
+    idle = property(__get_idle)
+    #: int: Number of borrowed connections.
+    borrowed = property(__get_borrowed)
+    #: :class:`PoolStats`: Pool usage statistics.
+    stats = property(lambda self: self.__stats)
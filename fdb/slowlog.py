@@ -0,0 +1,274 @@
+#coding:utf-8
+#
+#   PROGRAM:     fdb
+#   MODULE:      slowlog.py
+#   DESCRIPTION: Python driver for Firebird - Client-side log of slow statements
+#   CREATED:     17.10.2026
+#
+#  Software distributed under the License is distributed AS IS,
+#  WITHOUT WARRANTY OF ANY KIND, either express or implied.
+#  See the License for the specific language governing rights
+#  and limitations under the License.
+#
+#  The Original Code was created by Pavel Cisar
+#
+#  Copyright (c) Pavel Cisar <pcisar@users.sourceforge.net>
+#  and all contributors signed below.
+#
+#  All Rights Reserved.
+#  Contributor(s): ______________________________________.
+
+"""Client-side log of slow SQL statements.
+
+:class:`SlowQueryLog` uses statement hooks (:data:`~fdb.HOOK_STATEMENT_PREPARED`,
+:data:`~fdb.HOOK_STATEMENT_EXECUTED` and :data:`~fdb.HOOK_STATEMENT_FETCHED`)
+to measure each execution of statement in the process, and records executions
+that took longer than specified threshold together with their execution plan.
+It's much lighter than server trace, as additional information (plan, row count,
+attachment and transaction IDs) is requested from server only for slow statements.
+
+Example:
+    .. code-block:: python
+
+        log = fdb.slowlog.SlowQueryLog(threshold=0.5, filename='slow.jsonl',
+                                       max_bytes=10485760, backup_count=5)
+        log.start()
+"""
+
+import fdb
+import json
+import time
+import random
+import decimal
+import datetime
+import weakref
+import threading
+import logging.handlers
+
+#: Default max. length of string parameter values in records.
+DEFAULT_MAX_PARAMETER_LENGTH = 100
+
+def _summarize(value, max_length):
+    "Returns JSON-compatible summary of parameter value."
+    if value is None or isinstance(value, (bool, int, fdb.ibase.mylong, float)):
+        return value
+    if isinstance(value, fdb.ibase.UnicodeType):
+        text = value
+    elif isinstance(value, fdb.ibase.StringType):
+        # Python 2 str
+        try:
+            text = value.decode('utf-8')
+        except UnicodeDecodeError:
+            return '<%d bytes>' % len(value)
+    elif isinstance(value, (fdb.ibase.mybytes, bytearray)):
+        return '<%d bytes>' % len(value)
+    elif isinstance(value, decimal.Decimal):
+        return str(value)
+    elif isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    elif isinstance(value, (list, tuple)):
+        return '<array of %d items>' % len(value)
+    else:
+        return '<%s>' % type(value).__name__
+    if len(text) > max_length:
+        text = text[:max_length] + '...'
+    return text
+
+class SlowQueryLog(object):
+    """Log of SQL statements with execution time over specified threshold.
+
+    Time of each statement execution consists from time spent by prepare (zero
+    for statements taken from statement cache), execution, and fetch of all rows
+    from result set (statements that return result set are completed when all
+    rows are fetched, or when statement is closed or executed again). Commands
+    executed without prepare (by :meth:`~fdb.Connection.execute_immediate` or by
+    cursors with :attr:`~fdb.Cursor.immediate_dml` enabled) are recorded only
+    with SQL command, parameters and execution time.
+
+    Each record is dictionary with next items:
+
+    - `timestamp`: Local date and time when statement was completed (ISO format).
+    - `sql`: SQL command.
+    - `parameters`: List with summary of parameter values (strings are truncated,
+      binary values, BLOB streams and arrays are replaced by description), or None.
+    - `plan`: Execution plan (None when `capture_plan` is False).
+    - `rows`: Number of fetched rows for statements that return result set,
+      otherwise number of affected rows.
+    - `elapsed`: Total time in seconds.
+    - `prepare_time`, `execute_time` and `fetch_time`: Parts of total time.
+    - `attachment_id` and `transaction_id`: IDs assigned by server.
+
+    Records are written as JSON lines to file and/or passed to callback.
+    Information that can't be obtained from server is recorded as None.
+    """
+    def __init__(self, threshold=1.0, filename=None, callback=None, max_bytes=0,
+                 backup_count=0, sample_rate=1.0, max_rate=None, capture_plan=True,
+                 max_parameter_length=DEFAULT_MAX_PARAMETER_LENGTH):
+        """
+        Keyword Args:
+            threshold (float): Min. time (in seconds) of recorded statement executions.
+            filename (str): Name of file to which records are written as JSON lines.
+            callback (callable): Function called with each record (dictionary).
+            max_bytes (int): File is rotated when it would exceed this size.
+                Zero means that file is never rotated.
+            backup_count (int): Number of kept rotated files (`filename.1`,
+                `filename.2` etc.).
+            sample_rate (float): Fraction (0.0 to 1.0) of slow statements that are
+                recorded.
+            max_rate (float): Max. number of records per second, or None for no limit.
+            capture_plan (bool): Whether execution plan should be recorded.
+            max_parameter_length (int): Max. length of string parameter values
+                in records.
+
+        Raises:
+            fdb.ProgrammingError: When neither `filename` nor `callback` is specified.
+        """
+        if filename is None and callback is None:
+            raise fdb.ProgrammingError("Either filename or callback must be specified.")
+        #: float: Min. time (in seconds) of recorded statement executions.
+        self.threshold = threshold
+        #: float: Fraction of slow statements that are recorded.
+        self.sample_rate = sample_rate
+        #: float: Max. number of records per second (None for no limit).
+        self.max_rate = max_rate
+        #: bool: Whether execution plan should be recorded.
+        self.capture_plan = capture_plan
+        #: int: Max. length of string parameter values in records.
+        self.max_parameter_length = max_parameter_length
+        #: int: Number of recorded statement executions.
+        self.recorded = 0
+        #: int: Number of slow statement executions that were not recorded
+        #: because of sampling or rate limit.
+        self.skipped = 0
+        self.__filename = filename
+        self.__callback = callback
+        self.__max_bytes = max_bytes
+        self.__backup_count = backup_count
+        self.__handler = None
+        self.__lock = threading.Lock()
+        # Prepare times of statements that were not executed yet
+        self.__prepared = weakref.WeakKeyDictionary()
+        # [prepare_time, execute_time, parameters] of statements with open result set
+        self.__open = weakref.WeakKeyDictionary()
+        self.__window = 0
+        self.__window_count = 0
+        self.__active = False
+    def __enter__(self):
+        self.start()
+        return self
+    def __exit__(self, *args):
+        self.stop()
+    def __get_active(self):
+        return self.__active
+    def __prepared_hook(self, statement, elapsed):
+        with self.__lock:
+            self.__prepared[statement] = elapsed
+    def __executed_hook(self, statement, elapsed, parameters):
+        if not isinstance(statement, fdb.PreparedStatement):
+            # SQL command executed without prepare
+            if elapsed >= self.threshold:
+                self.__slow(statement, 0.0, elapsed, 0.0, None, parameters)
+            return
+        with self.__lock:
+            prepare_time = self.__prepared.pop(statement, 0.0)
+            if statement.n_output_params:
+                self.__open[statement] = [prepare_time, elapsed, parameters]
+                return
+        if prepare_time + elapsed >= self.threshold:
+            self.__slow(statement, prepare_time, elapsed, 0.0, None, parameters)
+    def __fetched_hook(self, statement, elapsed, rows):
+        with self.__lock:
+            times = self.__open.pop(statement, None)
+        if times is not None:
+            prepare_time, execute_time, parameters = times
+            if prepare_time + execute_time + elapsed >= self.threshold:
+                self.__slow(statement, prepare_time, execute_time, elapsed, rows, parameters)
+    def __sampled(self):
+        "Returns True if slow statement should be recorded."
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        if self.max_rate is not None:
+            with self.__lock:
+                window = int(time.time())
+                if window != self.__window:
+                    self.__window = window
+                    self.__window_count = 0
+                if self.__window_count >= self.max_rate:
+                    return False
+                self.__window_count += 1
+        return True
+    def __slow(self, statement, prepare_time, execute_time, fetch_time, rows, parameters):
+        if not self.__sampled():
+            self.skipped += 1
+            return
+        prepared = isinstance(statement, fdb.PreparedStatement)
+        record = {'timestamp': datetime.datetime.now().isoformat(),
+                  'sql': statement.sql if prepared else statement,
+                  'parameters': None,
+                  'plan': None,
+                  'rows': rows,
+                  'elapsed': prepare_time + execute_time + fetch_time,
+                  'prepare_time': prepare_time,
+                  'execute_time': execute_time,
+                  'fetch_time': fetch_time,
+                  'attachment_id': None,
+                  'transaction_id': None}
+        if parameters is not None:
+            record['parameters'] = [_summarize(value, self.max_parameter_length)
+                                    for value in parameters]
+        if prepared:
+            try:
+                if self.capture_plan:
+                    record['plan'] = statement.plan
+                if rows is None:
+                    record['rows'] = statement.rowcount
+                cursor = statement.cursor
+                if cursor is not None and not fdb.fbcore.is_dead_proxy(cursor):
+                    record['attachment_id'] = cursor._connection.attachment_id
+                    if cursor._transaction.active:
+                        record['transaction_id'] = cursor._transaction.transaction_id
+            except fdb.DatabaseError:
+                # Slow statement is recorded with information obtained so far
+                pass
+        self.recorded += 1
+        if self.__handler is not None:
+            line = json.dumps(record, sort_keys=True)
+            self.__handler.handle(logging.makeLogRecord({'msg': line}))
+        if self.__callback is not None:
+            self.__callback(record)
+    def start(self):
+        """Starts recording of slow statements.
+
+        Raises:
+            fdb.ProgrammingError: When log is already active.
+        """
+        if self.__active:
+            raise fdb.ProgrammingError("Slow query log is already active.")
+        if self.__filename is not None:
+            self.__handler = logging.handlers.RotatingFileHandler(self.__filename,
+                                                                  maxBytes=self.__max_bytes,
+                                                                  backupCount=self.__backup_count,
+                                                                  delay=True)
+        self.__active = True
+        fdb.add_hook(fdb.HOOK_STATEMENT_PREPARED, self.__prepared_hook)
+        fdb.add_hook(fdb.HOOK_STATEMENT_EXECUTED, self.__executed_hook)
+        fdb.add_hook(fdb.HOOK_STATEMENT_FETCHED, self.__fetched_hook)
+    def stop(self):
+        """Stops recording of slow statements and closes the log file.
+
+        Executions of statements that still have open result set are not recorded.
+        """
+        if not self.__active:
+            return
+        fdb.remove_hook(fdb.HOOK_STATEMENT_PREPARED, self.__prepared_hook)
+        fdb.remove_hook(fdb.HOOK_STATEMENT_EXECUTED, self.__executed_hook)
+        fdb.remove_hook(fdb.HOOK_STATEMENT_FETCHED, self.__fetched_hook)
+        self.__active = False
+        with self.__lock:
+            self.__prepared.clear()
+            self.__open.clear()
+        if self.__handler is not None:
+            self.__handler.close()
+            self.__handler = None
+    #: (Read Only) (bool) True if slow statements are recorded.
+    active = property(__get_active)
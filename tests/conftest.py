@@ -0,0 +1,28 @@
+#coding:utf-8
+#
+#   PROGRAM/MODULE: fdb
+#   FILE:           conftest.py
+#   DESCRIPTION:    Python driver for Firebird - Configuration of unit tests
+#   CREATED:        17.10.2026
+#
+#  Software distributed under the License is distributed AS IS,
+#  WITHOUT WARRANTY OF ANY KIND, either express or implied.
+#  See the License for the specific language governing rights
+#  and limitations under the License.
+#
+#  The Original Code was created by Pavel Cisar
+#
+#  Copyright (c) Pavel Cisar <pcisar@users.sourceforge.net>
+#  and all contributors signed below.
+#
+#  All Rights Reserved.
+#  Contributor(s): ______________________________________.
+#
+# See LICENSE.TXT for details.
+
+import sys
+
+collect_ignore = []
+if sys.version_info < (3, 6):
+    # Module uses asynchronous comprehensions
+    collect_ignore.append('test_aio.py')
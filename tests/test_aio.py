@@ -0,0 +1,103 @@
+#coding:utf-8
+#
+#   PROGRAM/MODULE: fdb
+#   FILE:           test_aio.py
+#   DESCRIPTION:    Python driver for Firebird - Unit tests of asyncio support
+#   CREATED:        17.10.2026
+#
+#  Software distributed under the License is distributed AS IS,
+#  WITHOUT WARRANTY OF ANY KIND, either express or implied.
+#  See the License for the specific language governing rights
+#  and limitations under the License.
+#
+#  The Original Code was created by Pavel Cisar
+#
+#  Copyright (c) Pavel Cisar <pcisar@users.sourceforge.net>
+#  and all contributors signed below.
+#
+#  All Rights Reserved.
+#  Contributor(s): ______________________________________.
+#
+# See LICENSE.TXT for details.
+
+# Tests use asynchronous comprehensions, so this module is not collected by
+# Python older than 3.6 (see conftest.py), and fdb.aio requires Python 3.7.
+
+import unittest
+import sys, os
+import asyncio
+import fdb
+import fdb.pool
+from io import StringIO
+from test_fdb import FDBTestBase, FBTEST_HOST, FBTEST_USER, FBTEST_PASSWORD
+
+@unittest.skipUnless(sys.version_info >= (3, 7), "fdb.aio requires Python 3.7 or newer")
+class TestAio(FDBTestBase):
+    def setUp(self):
+        super(TestAio, self).setUp()
+        import fdb.aio
+        self.aio = fdb.aio
+        self.dbfile = os.path.join(self.dbpath, self.FBTEST_DB)
+        self.loop = asyncio.new_event_loop()
+    def tearDown(self):
+        self.loop.close()
+    def connect(self):
+        return self.aio.connect(host=FBTEST_HOST, database=self.dbfile,
+                                user=FBTEST_USER, password=FBTEST_PASSWORD)
+    def test_query(self):
+        async def run():
+            async with await self.connect() as con:
+                cur = con.cursor()
+                cur.batch_size = 5
+                await cur.execute('select * from country order by country')
+                self.assertEqual(len(cur.description), 2)
+                self.assertEqual(cur.description[0][fdb.DESCRIPTION_NAME], 'COUNTRY')
+                rows = [row async for row in cur]
+                self.assertEqual(len(rows), 16 if con.connection.ods >= fdb.ODS_FB_30 else 14)
+                self.assertEqual(cur.rowcount, len(rows))
+                await cur.execute('select * from country order by country')
+                self.assertTupleEqual(await cur.fetchone(), rows[0])
+                self.assertListEqual(await cur.fetchmany(2), rows[1:3])
+                row = await cur.fetchonemap()
+                self.assertEqual(row['COUNTRY'], rows[3][0])
+                self.assertListEqual(await cur.fetchall(), rows[4:])
+                await cur.execute("insert into country values ('Aio', 'Coin')")
+                self.assertEqual(cur.rowcount, 1)
+                self.assertFalse(cur.description)
+                await con.rollback()
+                await cur.execute("select * from country where country = 'Aio'")
+                self.assertIsNone(await cur.fetchone())
+            self.assertTrue(con.closed)
+        self.loop.run_until_complete(run())
+    def test_stream_blob(self):
+        blob = "Firebird supports two types of blobs, stream and segmented.\nThe database stores segmented blobs in chunks."
+        async def run():
+            async with await self.connect() as con:
+                cur = con.cursor()
+                await cur.execute('insert into T2 (C1,C9) values (?,?)', [4, blob])
+                p = await cur.prep('select C1,C9 from T2 where C1 = 4')
+                p.set_stream_blob('C9')
+                await cur.execute(p)
+                row = await cur.fetchone()
+                self.assertIsInstance(row[1], self.aio.AsyncBlobReader)
+                self.assertEqual(await row[1].read(20), 'Firebird supports tw')
+                self.assertListEqual([line async for line in row[1]],
+                                     StringIO(blob[20:]).readlines())
+                await row[1].close()
+                await con.run(p.close)
+                await con.rollback()
+        self.loop.run_until_complete(run())
+    def test_pool(self):
+        async def run():
+            pool = self.aio.AsyncConnectionPool(
+                fdb.pool.ConnectionPool(max_size=1, host=FBTEST_HOST, database=self.dbfile,
+                                        user=FBTEST_USER, password=FBTEST_PASSWORD))
+            async with await pool.get() as con:
+                connection = con.connection
+            async with await pool.get() as con:
+                self.assertIs(con.connection, connection)
+            await pool.close()
+        self.loop.run_until_complete(run())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -32,6 +32,8 @@ import fdb.log as log
 import sys, os
 import threading
 import time
+import warnings
+import io
 import collections.abc as collections
 from collections import namedtuple
 from decimal import Decimal
@@ -384,6 +386,64 @@ class TestConnection(FDBTestBase):
                 self.assertListEqual(con.get_active_transaction_ids(),
                                      [t1.transaction_id, t2.transaction_id])
                 self.assertEqual(con.get_active_transaction_count(), 2)
+    def test_profile(self):
+        with fdb.connect(host=FBTEST_HOST, database=self.dbfile,
+                         user=FBTEST_USER, password=FBTEST_PASSWORD) as con:
+            cur = con.cursor()
+            with con.profile() as profile:
+                cur.execute('select * from country')
+                cur.fetchall()
+                cur.execute('select * from country where country = ?', ('USA',))
+                cur.fetchall()
+                cur.execute('create table profile_ddl (c1 integer)')
+            con.commit()
+            con.execute_immediate('drop table profile_ddl')
+            con.commit()
+            self.assertListEqual(fdb.get_hooks(fdb.HOOK_STATEMENT_EXECUTED), [])
+            self.assertEqual(len(profile.statements), 3)
+            natural, indexed, ddl = profile.statements
+            self.assertEqual(natural.sql, 'select * from country')
+            self.assertEqual(natural.plan, 'PLAN (COUNTRY NATURAL)')
+            self.assertEqual(natural.rows, 14)
+            self.assertEqual(natural.records[fdb.isc_info_req_select_count], 14)
+            self.assertEqual(natural.sequential_reads, 14)
+            self.assertEqual(natural.tables[0].table_name, 'COUNTRY')
+            self.assertSetEqual(set(natural.io_stats), set(con.io_stats))
+            self.assertGreater(natural.io_stats[fdb.isc_info_fetches], 0)
+            self.assertEqual(indexed.plan, 'PLAN (COUNTRY INDEX (RDB$PRIMARY1))')
+            self.assertEqual(indexed.rows, 1)
+            self.assertEqual(indexed.sequential_reads, 0)
+            self.assertEqual(indexed.indexed_reads, 1)
+            self.assertEqual(ddl.sql, 'create table profile_ddl (c1 integer)')
+            self.assertDictEqual(ddl.records, {})
+            self.assertEqual(ddl.rows, 0)
+    def test_handle_tracking(self):
+        tracker = fdb.enable_handle_tracking(limits={fdb.HANDLE_STATEMENT: 1})
+        try:
+            self.assertIs(fdb.get_handle_tracker(), tracker)
+            with fdb.connect(host=FBTEST_HOST, database=self.dbfile,
+                             user=FBTEST_USER, password=FBTEST_PASSWORD) as con:
+                cur = con.cursor()
+                cur.execute('select * from country')
+                self.assertEqual(tracker.counts[fdb.HANDLE_TRANSACTION], 1)
+                self.assertEqual(tracker.counts[fdb.HANDLE_STATEMENT], 1)
+                record = tracker.handles(fdb.HANDLE_STATEMENT)[0]
+                self.assertEqual(record.description, 'select * from country')
+                self.assertGreaterEqual(record.age, 0)
+                self.assertIn('test_handle_tracking', tracker.report())
+                with warnings.catch_warnings(record=True) as caught:
+                    warnings.simplefilter('always')
+                    cur2 = con.cursor()
+                    cur2.execute('select * from job')
+                self.assertEqual(len(caught), 1)
+                self.assertIs(caught[0].category, fdb.HandleLeakWarning)
+                con.commit()
+                self.assertEqual(tracker.counts[fdb.HANDLE_TRANSACTION], 0)
+            self.assertDictEqual(tracker.counts, {fdb.HANDLE_STATEMENT: 0, fdb.HANDLE_BLOB: 0,
+                                                  fdb.HANDLE_TRANSACTION: 0})
+        finally:
+            fdb.disable_handle_tracking()
+        self.assertIsNone(fdb.get_handle_tracker())
 
 class TestTransaction(FDBTestBase):
     def setUp(self):
@@ -898,6 +958,143 @@ class TestCursor(FDBTestBase):
         cur.execute('select * from country')
         row = cur.fetchone()
         self.assertTupleEqual(row, ('USA', 'Dollar'))
+    def test_fetch_decoding(self):
+        cur = self.con.cursor()
+        cur.execute("select cast('0001-01-01' as date), cast('9999-12-31' as date),"
+                    " cast('1858-11-17 23:59:59.9999' as timestamp), cast('12:34:56.7891' as time),"
+                    " cast(null as integer), cast(-12345 as numeric(9,2)), cast('ab' as char(5)),"
+                    " cast('xyz' as varchar(10)), cast('' as varchar(10)) from rdb$database")
+        row = cur.fetchone()
+        self.assertTupleEqual(row, (datetime.date(1, 1, 1), datetime.date(9999, 12, 31),
+                                    datetime.datetime(1858, 11, 17, 23, 59, 59, 999900),
+                                    datetime.time(12, 34, 56, 789100), None,
+                                    decimal.Decimal('-12345'), 'ab   ', 'xyz', ''))
+    def test_fetch_arrays(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("NumPy is not installed")
+        cur = self.con.cursor()
+        select = 'select emp_no, salary, hire_date, phone_ext from employee order by emp_no'
+        rows = cur.execute(select).fetchall()
+        cur.execute(select)
+        columns = cur.fetch_arrays(5)
+        self.assertListEqual(list(columns.keys()), ['EMP_NO', 'SALARY', 'HIRE_DATE', 'PHONE_EXT'])
+        self.assertEqual(columns['EMP_NO'].dtype, numpy.int16)
+        self.assertEqual(columns['SALARY'].dtype, numpy.float64)
+        self.assertEqual(columns['HIRE_DATE'].dtype, numpy.dtype('datetime64[us]'))
+        self.assertEqual(len(columns['EMP_NO']), 5)
+        self.assertEqual(columns['SALARY'][0], float(rows[0][1]))
+        self.assertEqual(columns['HIRE_DATE'][0].item(), rows[0][2])
+        self.assertEqual(columns['PHONE_EXT'][0], rows[0][3])
+        emp_no = columns['EMP_NO'].tolist()
+        for batch in cur.iter_arrays(10):
+            self.assertLessEqual(len(batch['EMP_NO']), 10)
+            emp_no.extend(batch['EMP_NO'].tolist())
+        self.assertListEqual(emp_no, [row[0] for row in rows])
+        cur.execute("select cast(null as integer), 1 from rdb$database")
+        columns = cur.fetch_arrays()
+        self.assertListEqual(columns['CAST'].mask.tolist(), [True])
+        self.assertEqual(len(cur.fetch_arrays()['CONSTANT']), 0)
+        # Columns with the same name
+        cur.execute('select emp_no + 1, emp_no + 2, emp_no + 3 from employee order by emp_no')
+        columns = cur.fetch_arrays(1)
+        self.assertListEqual(list(columns.keys()), ['ADD', 'ADD_1', 'ADD_2'])
+        self.assertListEqual([column[0] for column in columns.values()],
+                             [rows[0][0] + 1, rows[0][0] + 2, rows[0][0] + 3])
+    def test_iter_record_batches(self):
+        try:
+            import pyarrow
+            import fdb.arrow
+        except ImportError:
+            self.skipTest("PyArrow is not installed")
+        cur = self.con.cursor()
+        select = 'select emp_no, first_name, salary, hire_date from employee order by emp_no'
+        rows = cur.execute(select).fetchall()
+        cur.execute(select)
+        batches = list(cur.iter_record_batches(10))
+        self.assertEqual(sum(batch.num_rows for batch in batches), len(rows))
+        self.assertTrue(all(batch.num_rows <= 10 for batch in batches))
+        schema = batches[0].schema
+        self.assertListEqual(schema.names, ['EMP_NO', 'FIRST_NAME', 'SALARY', 'HIRE_DATE'])
+        self.assertEqual(schema.field('EMP_NO').type, pyarrow.int16())
+        self.assertEqual(schema.field('FIRST_NAME').type, pyarrow.string())
+        self.assertTrue(pyarrow.types.is_decimal(schema.field('SALARY').type))
+        self.assertEqual(schema.field('HIRE_DATE').type, pyarrow.timestamp('us'))
+        table = pyarrow.Table.from_batches(batches)
+        self.assertListEqual(list(zip(*[column.to_pylist() for column in table.columns])), rows)
+        # IPC writer
+        cur.execute(select)
+        sink = BytesIO()
+        self.assertEqual(fdb.arrow.write_ipc(cur, sink, batch_rows=10), len(rows))
+        table = pyarrow.ipc.open_file(pyarrow.py_buffer(sink.getvalue())).read_all()
+        self.assertEqual(table.num_rows, len(rows))
+        self.assertListEqual(table.column('EMP_NO').to_pylist(), [row[0] for row in rows])
+    def test_lazy_rows(self):
+        cur = self.con.cursor()
+        select = 'select emp_no, first_name, last_name, salary, hire_date from employee order by emp_no'
+        rows = cur.execute(select).fetchall()
+        cur.lazy_rows = True
+        cur.execute(select)
+        row = cur.fetchone()
+        self.assertEqual(row[1], rows[0][1])
+        self.assertEqual(row['last_name'], rows[0][2])
+        self.assertEqual(row[-1], rows[0][4])
+        self.assertTupleEqual(row[3:], rows[0][3:])
+        self.assertEqual(row, rows[0])
+        self.assertListEqual(row.keys(), ['EMP_NO', 'FIRST_NAME', 'LAST_NAME', 'SALARY', 'HIRE_DATE'])
+        self.assertListEqual(cur.fetchall(), rows[1:])
+        row = cur.execute(select).fetchonemap()
+        self.assertEqual(row['FIRST_NAME'], rows[0][1])
+        with self.assertRaises(KeyError):
+            row['NO_SUCH_FIELD']
+        # Only used part of VARCHAR values is kept
+        cur.execute("select cast('abc' as varchar(8000)), 1, cast('' as varchar(8000)), 2"
+                    " from rdb$database")
+        row = cur.fetchone()
+        self.assertEqual(row, ('abc', 1, '', 2))
+        self.assertLess(len(row._raw), 100)
+    def test_prefetch(self):
+        cur = self.con.cursor()
+        select = 'select emp_no, first_name, last_name, salary, hire_date from employee order by emp_no'
+        rows = cur.execute(select).fetchall()
+        cur.prefetch = 4
+        self.assertListEqual(cur.execute(select).fetchall(), rows)
+        self.assertIsNone(cur.fetchone())
+        # Restart with pending rows
+        cur.execute(select)
+        self.assertEqual(cur.fetchone(), rows[0])
+        self.assertListEqual(cur.execute(select).fetchmany(3), rows[:3])
+        # Explicitly prepared statement
+        ps = cur.prep(select)
+        cur.execute(ps)
+        self.assertListEqual(cur.fetchall(), rows)
+        # Statement information is available while rows are prefetched
+        cur.execute('select * from employee')
+        fetched = [cur.fetchone()]
+        self.assertIsNotNone(cur._prefetcher)
+        self.assertGreater(cur.rowcount, 0)
+        self.assertEqual(cur.plan, 'PLAN (EMPLOYEE NATURAL)')
+        self.assertEqual(len(cur.description), 11)
+        fetched.extend(cur.fetchall())
+        self.assertEqual(len(fetched), len(rows))
+        # Transaction end stops prefetch
+        self.con.commit()
+        self.assertIsNone(cur._prefetcher)
+        # Error is reported by fetch
+        cur.execute('select 1/(emp_no - 2) from employee order by emp_no')
+        with self.assertRaises(fdb.DatabaseError):
+            cur.fetchall()
+        self.assertIsNone(cur._prefetcher)
+    def test_field_metadata(self):
+        cur = self.con.cursor()
+        self.assertFalse(self.con._metadata_cache.is_loaded('JOB'))
+        cur.execute('select job_code, min_salary, max_salary from job')
+        self.assertListEqual([d[fdb.DESCRIPTION_PRECISION] for d in cur.description], [0, 10, 10])
+        # Fields of whole table are loaded at once
+        self.assertTrue(self.con._metadata_cache.is_loaded('JOB'))
+        self.assertEqual(self.con._metadata_cache.get('JOB', 'MAX_SALARY')[0], 10)
+        self.assertIsNotNone(self.con._metadata_cache.get('JOB', 'JOB_TITLE'))
     def test_fetchall(self):
         cur = self.con.cursor()
         cur.execute('select * from country')
@@ -950,6 +1147,18 @@ class TestCursor(FDBTestBase):
         cur.execute('select * from country')
         row = cur.fetchonemap()
         self.assertListEqual(row.items(), [('COUNTRY', 'USA'), ('CURRENCY', 'Dollar')])
+    def test_fetchonemap_duplicate_names(self):
+        cur = self.con.cursor()
+        cur.execute('select 1 as a, 2 as "b", 3 as a from rdb$database')
+        row = cur.fetchonemap()
+        self.assertEqual(row['A'], 1)
+        self.assertEqual(row['a'], 1)
+        self.assertEqual(row['"b"'], 2)
+        self.assertNotIn('B', row)
+        self.assertEqual(len(row), 2)
+        self.assertListEqual(row.keys(), ['A', 'b', 'A'])
+        self.assertListEqual(row.values(), [1, 2, 1])
+        self.assertListEqual(list(row), ['A', 'b', 'A'])
     def test_fetchallmap(self):
         cur = self.con.cursor()
         cur.execute('select * from country')
@@ -1061,6 +1270,179 @@ class TestCursor(FDBTestBase):
         row = cur.fetchone()
         self.assertTupleEqual(row, ('USA', 'Dollar'))
 
+class TestStatementCache(FDBTestBase):
+    def setUp(self):
+        super(TestStatementCache, self).setUp()
+        self.dbfile = os.path.join(self.dbpath, self.FBTEST_DB)
+        self.con = fdb.connect(host=FBTEST_HOST, database=self.dbfile,
+                               user=FBTEST_USER, password=FBTEST_PASSWORD,
+                               statement_cache_size=2)
+    def tearDown(self):
+        self.con.close()
+    def test_reuse(self):
+        cache = self.con.statement_cache
+        self.assertEqual(cache.size, 2)
+        cur = self.con.cursor()
+        cur.execute('select * from country')
+        ps = cur._ps
+        cur.execute('select * from job')
+        self.assertEqual(len(cache), 1)
+        cur.execute('select * from country')
+        self.assertIs(cur._ps, ps)
+        self.assertTupleEqual(cur.fetchone(), ('USA', 'Dollar'))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 2)
+    def test_eviction(self):
+        cache = self.con.statement_cache
+        cur = self.con.cursor()
+        for cmd in ['select * from country', 'select * from job',
+                    'select * from project', 'select * from employee']:
+            cur.execute(cmd)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        cache.size = 1
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.evictions, 2)
+    def test_disabled(self):
+        cache = self.con.statement_cache
+        cache.size = 0
+        cur = self.con.cursor()
+        cur.execute('select * from country')
+        cur.execute('select * from country')
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 0)
+    def test_invalidation(self):
+        cache = self.con.statement_cache
+        cur = self.con.cursor()
+        cur.execute('select * from country')
+        cur.close()
+        self.assertEqual(len(cache), 1)
+        self.con.commit()
+        self.assertEqual(len(cache), 1)
+        self.con.execute_immediate("/* no DDL */ delete from t")
+        self.con.commit()
+        self.assertEqual(len(cache), 1)
+        self.con.execute_immediate("recreate table t2 (c1 integer)")
+        self.con.commit()
+        self.assertEqual(len(cache), 0)
+        tr = self.con.trans()
+        cur = tr.cursor()
+        cur.execute('select * from country')
+        cur.close()
+        self.assertEqual(len(cache), 1)
+        tr.close()
+        self.assertEqual(len(cache), 0)
+        self.con.execute_immediate("drop table t2")
+        self.con.commit()
+    def test_handle_pool(self):
+        self.con.statement_cache.size = 0
+        pool = self.con.statement_handle_pool
+        self.assertEqual(pool.size, fdb.fbcore.DEFAULT_STATEMENT_HANDLE_POOL_SIZE)
+        allocations = pool.allocations
+        cur = self.con.cursor()
+        cur.execute('select * from country')
+        self.assertTupleEqual(cur.fetchone(), ('USA', 'Dollar'))
+        # Dropped statement returns handle to pool, next one reuses it
+        cur.execute('select currency from country')
+        self.assertTupleEqual(cur.fetchone(), ('Dollar',))
+        self.assertEqual(pool.allocations, allocations + 1)
+        self.assertEqual(pool.reuses, 1)
+        self.assertEqual(len(pool), 0)
+        # Handle with open cursor
+        ps = cur.prep('select * from country')
+        self.assertEqual(pool.allocations, allocations + 2)
+        cur.execute(ps)
+        self.assertEqual(len(pool), 1)
+        self.assertTupleEqual(cur.fetchone(), ('USA', 'Dollar'))
+        ps._close()
+        self.assertEqual(len(pool), 2)
+        cur.execute('select * from country')
+        self.assertTupleEqual(cur.fetchone(), ('USA', 'Dollar'))
+        self.assertEqual(pool.reuses, 2)
+        cur.close()
+        self.assertEqual(pool.drops, 0)
+        pool.size = 1
+        self.assertEqual(len(pool), 1)
+        self.assertEqual(pool.drops, 1)
+        pool.size = 0
+        self.assertEqual(pool.drops, 2)
+        ps = cur.prep('select * from country')
+        ps._close()
+        self.assertEqual(len(pool), 0)
+        self.assertEqual(pool.drops, 3)
+        self.assertEqual(pool.allocations, allocations + 3)
+        with self.assertRaises(fdb.ProgrammingError):
+            pool.size = -1
+
+class TestConnectionPool(FDBTestBase):
+    def setUp(self):
+        super(TestConnectionPool, self).setUp()
+        self.dbfile = os.path.join(self.dbpath, self.FBTEST_DB)
+        self.pool = fdb.pool.ConnectionPool(min_size=1, max_size=2, timeout=0.1,
+                                            host=FBTEST_HOST, database=self.dbfile,
+                                            user=FBTEST_USER, password=FBTEST_PASSWORD)
+    def tearDown(self):
+        self.pool.close()
+    def test_borrow_return(self):
+        self.assertEqual(self.pool.size, 1)
+        con = self.pool.get()
+        cur = con.cursor()
+        cur.execute("insert into country values ('Pool', 'Coin')")
+        tr = con.trans()
+        tr.begin()
+        con.close()
+        self.assertFalse(con.closed)
+        self.assertEqual(self.pool.idle, 1)
+        self.assertEqual(len(con.transactions), 2)
+        with self.pool.get() as con2:
+            self.assertIs(con2, con)
+            self.assertFalse(con2.main_transaction.active)
+            cur = con2.cursor()
+            cur.execute("select * from country where country = 'Pool'")
+            self.assertIsNone(cur.fetchone())
+        self.assertEqual(self.pool.stats.checkouts, 2)
+        self.assertEqual(self.pool.stats.created, 1)
+    def test_timeout(self):
+        con1 = self.pool.get()
+        con2 = self.pool.get()
+        with self.assertRaises(fdb.pool.PoolTimeout):
+            self.pool.get()
+        self.assertEqual(self.pool.stats.waits, 1)
+        self.assertEqual(self.pool.stats.timeouts, 1)
+        con1.close()
+        self.assertIs(self.pool.get(), con1)
+        self.pool.release(con1)
+        self.pool.release(con2)
+        self.assertEqual(self.pool.idle, 2)
+    def test_health_check(self):
+        con = self.pool.get()
+        self.pool.release(con)
+        # Connection that is not borrowed is really closed
+        con.close()
+        con2 = self.pool.get()
+        self.assertIsNot(con2, con)
+        self.assertFalse(con2.closed)
+        self.assertEqual(self.pool.stats.failed_checks, 1)
+        con2.close()
+    def test_max_lifetime(self):
+        self.pool.max_lifetime = 0
+        con = self.pool.get()
+        con.close()
+        self.assertTrue(con.closed)
+        self.assertEqual(self.pool.size, 0)
+    def test_metadata_cache(self):
+        with self.pool.get() as con1, self.pool.get() as con2:
+            self.assertIsNot(con1, con2)
+            self.assertIs(con1._metadata_cache, con2._metadata_cache)
+    def test_close(self):
+        con = self.pool.get()
+        self.pool.close()
+        with self.assertRaises(fdb.ProgrammingError):
+            self.pool.get()
+        con.close()
+        self.assertTrue(con.closed)
+
 class TestPreparedStatement(FDBTestBase):
     def setUp(self):
         super(TestPreparedStatement, self).setUp()
@@ -1348,6 +1730,44 @@ class TestArrays(FDBTestBase):
         with self.assertRaises(ValueError) as cm:
             cur.execute("insert into ar (c1,c2) values (102,?)", [self.c2[:-1]])
         self.assertTupleEqual(cm.exception.args, ('Incorrect ARRAY field value.',))
+    def test_numpy(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("NumPy is not installed")
+        cur = self.con.cursor()
+        c2 = numpy.array(self.c2, dtype=numpy.int32)
+        c5 = numpy.array(self.c5, dtype='datetime64[us]')
+        cur.execute("insert into ar (c1,c2,c3,c5,c7,c12) values (120,?,?,?,?,?)",
+                    [c2, numpy.array(self.c3), c5, numpy.array([10.22, 100000.33]),
+                     numpy.array(self.c12)])
+        self.con.commit()
+        cur.execute("select c2,c3,c5,c7,c12 from ar where c1=120")
+        self.assertTupleEqual(cur.fetchone(), (self.c2, self.c3, self.c5, self.c7, self.c12))
+        cur.numpy_arrays = True
+        cur.execute("select c2,c3,c5,c7,c12 from ar where c1=120")
+        row = cur.fetchone()
+        self.assertEqual(row[0].dtype, numpy.int32)
+        self.assertTupleEqual(row[0].shape, (4, 4, 2))
+        self.assertTrue((row[0] == c2).all())
+        self.assertEqual(row[1].dtype, object)
+        self.assertListEqual(row[1].tolist(), self.c3)
+        self.assertTrue((row[2] == c5).all())
+        self.assertTrue(numpy.allclose(row[3], [10.22, 100000.33]))
+        self.assertListEqual(row[4].tolist(), self.c12)
+        with self.assertRaises(ValueError) as cm:
+            cur.execute("insert into ar (c1,c2) values (120,?)", [c2[:-1]])
+        self.assertTupleEqual(cm.exception.args, ('Incorrect ARRAY field value.',))
+        # Values are converted only when they fit into column type
+        cur.execute("insert into ar (c1,c9) values (121,?)", [numpy.array([1, -2], dtype=numpy.int64)])
+        cur.execute("select c9 from ar where c1=121")
+        self.assertListEqual(cur.fetchone()[0].tolist(), [1, -2])
+        with self.assertRaises(ValueError) as cm:
+            cur.execute("insert into ar (c1,c9) values (122,?)", [numpy.array([70000, 1])])
+        self.assertTupleEqual(cm.exception.args, ('ARRAY value is out of range of column type.',))
+        with self.assertRaises(ValueError) as cm:
+            cur.execute("insert into ar (c1,c9) values (122,?)", [numpy.array([1.5, 2.0])])
+        self.assertTupleEqual(cm.exception.args, ('Incorrect ARRAY field value.',))
 
 class TestInsertData(FDBTestBase):
     def setUp(self):
@@ -1479,6 +1899,21 @@ class TestInsertData(FDBTestBase):
         self.assertListEqual(rows,
                              [(6, Decimal('1.1'), Decimal('1.1')),
                               (6, Decimal('100.11'), Decimal('100.11'))])
+    def test_insert_rebind(self):
+        cur = self.con.cursor()
+        ps = cur.prep('insert into T2 (C1,C2,C5,C6,C10) values (?,?,?,?,?)')
+        cur.executemany(ps, [(8, 1, 'a', datetime.date(2011, 11, 13), Decimal('1.25')),
+                             (8, None, None, None, None),
+                             (8, '12345', '0123456789', '2011-11-14', '2.5'),
+                             (8, 3, 'ccc', datetime.datetime(2011, 11, 15, 1, 2, 3), 7)])
+        self.con.commit()
+        cur.execute('select C2,C5,C6,C10 from T2 where C1 = 8 order by C6 nulls first')
+        rows = cur.fetchall()
+        self.assertListEqual(rows,
+                             [(None, None, None, None),
+                              (1, 'a', datetime.date(2011, 11, 13), Decimal('1.25')),
+                              (12345, '0123456789', datetime.date(2011, 11, 14), Decimal('2.5')),
+                              (3, 'ccc', datetime.date(2011, 11, 15), Decimal('7'))])
     def test_insert_returning(self):
         cur = self.con.cursor()
         cur.execute('insert into T2 (C1,C10,C11) values (?,?,?) returning C1', [7, 1.1, 1.1])
@@ -1492,6 +1927,87 @@ class TestInsertData(FDBTestBase):
             cur.execute('select C1,C17 from T2 where C1 = 8')
             result = cur.fetchall()
             self.assertListEqual(result, [(8, True), (8, False)])
+    def test_insert_immediate(self):
+        self.con2.execute_immediate('insert into T2 (C1,C2,C4,C5,C6,C8,C9,C10,C13) '
+                                    'values (?,?,?,?,?,?,?,?,?)',
+                                    [9, 10, 'žluť', 'ab', datetime.date(2011, 11, 13),
+                                     datetime.datetime(2011, 11, 13, 15, 0, 1, 200000),
+                                     'x' * 40000, decimal.Decimal('12.34'), None])
+        result = self.con2.execute_immediate('update T2 set C3 = ? where C1 = ? '
+                                             'returning C1, C4, C10, C6', [11, 9],
+                                             returning=[int, str, decimal.Decimal,
+                                                        datetime.date])
+        self.assertTupleEqual(result, (9, 'žluť ', decimal.Decimal('12.34'),
+                                       datetime.date(2011, 11, 13)))
+        cur = self.con2.cursor()
+        cur.immediate_dml = True
+        cur.execute('insert into T2 (C1,C5,C12) values (?,?,?)', [10, 'cd', 1.5])
+        self.assertIsNone(cur._ps)
+        self.assertEqual(cur.rowcount, -1)
+        self.con2.commit()
+        cur.execute('select C1,C2,C3,C5,C8,C9,C12,C13 from T2 where C1 >= 9 order by C1')
+        self.assertIsNotNone(cur._ps)
+        self.assertListEqual(cur.fetchall(),
+                             [(9, 10, 11, 'ab', datetime.datetime(2011, 11, 13, 15, 0, 1, 200000),
+                               'x' * 40000, None, None),
+                              (10, None, None, 'cd', None, None, 1.5, None)])
+        # Leading comment doesn't prevent execution without prepare
+        cur = self.con2.cursor()
+        cur.immediate_dml = True
+        cur.execute('/* immediate */ update T2 set C12 = ? where C1 = ?', [2.5, 10])
+        self.assertIsNone(cur._ps)
+        with self.assertRaises(TypeError):
+            self.con2.execute_immediate('delete from T2 where C1 = ?', [1],
+                                        returning=[object])
+    def test_insert_execute_block(self):
+        cur = self.con2.cursor()
+        cur.executemany_batch_size = 8
+        data = [(i, 'ž%d' % i, decimal.Decimal('%d.25' % i), 'blob %d' % i) for i in range(100, 121)]
+        cur.executemany('insert into T2 (C1,C5,C10,C9) values (?,?,?,?)', data)
+        template = self.con2._execute_block_cache['insert into T2 (C1,C5,C10,C9) values (?,?,?,?)']
+        self.assertEqual(template.n_params, 4)
+        self.assertGreater(template.max_rows, 8)
+        cur.execute('select C1,C5,C10,C9 from T2 where C1 >= 100 order by C1')
+        self.assertListEqual(cur.fetchall(), data)
+        # Parameter sets executed by one batch are applied as a whole
+        with self.assertRaises(fdb.DatabaseError):
+            cur.executemany('update T2 set C1 = C1 / ? where C1 = ?', [(1, 100), (0, 101)])
+        cur.execute('select count(*) from T2 where C1 in (100, 101)')
+        self.assertEqual(cur.fetchone()[0], 2)
+        with self.assertRaises(fdb.ProgrammingError):
+            cur.executemany('delete from T2 where C1 = ?', [(100,), (101, 1)])
+        # Statement that ends with line comment
+        cur.executemany('delete from T2 where C1 = ? -- note', [(119,), (120,)])
+        self.assertIsNotNone(self.con2._execute_block_cache['delete from T2 where C1 = ? -- note'])
+        cur.execute('select count(*) from T2 where C1 in (119, 120)')
+        self.assertEqual(cur.fetchone()[0], 0)
+        # Statements that could not be batched are executed one by one
+        cur.executemany('select C1 from T2 where C1 = ?', [(100,), (101,)])
+        self.assertIsNone(self.con2._execute_block_cache['select C1 from T2 where C1 = ?'])
+    def test_insert_batch(self):
+        cur = self.con2.cursor()
+        data = [(i, 'ž%d' % i, decimal.Decimal('%d.25' % i), 'blob %d' % i) for i in range(200, 221)]
+        # String value for numeric parameter is converted by server
+        data[5] = (205, 'ž205', '205.25', 'blob 205')
+        counts = cur.executebatch('insert into T2 (C1,C5,C10,C9) values (?,?,?,?)', data)
+        if self.con2.engine_version >= 4.0:
+            self.assertListEqual(counts, [1] * len(data))
+        else:
+            self.assertListEqual(counts, [cur.BATCH_SUCCESS_NO_INFO] * len(data))
+        data[5] = (205, 'ž205', decimal.Decimal('205.25'), 'blob 205')
+        cur.execute('select C1,C5,C10,C9 from T2 where C1 >= 200 order by C1')
+        self.assertListEqual(cur.fetchall(), data)
+        if self.con2.engine_version >= 4.0:
+            counts = cur.executebatch('update T2 set C5 = ? where C1 >= ?', [('a', 215), ('b', 300)])
+            self.assertListEqual(counts, [6, 0])
+        # Parameter sets preceding the failed one remain executed
+        with self.assertRaises(fdb.DatabaseError):
+            cur.executebatch('update T2 set C5 = ?, C1 = C1 / ? where C1 = ?',
+                             [('x', 1, 200), ('y', 0, 201)])
+        cur.execute('select C5 from T2 where C1 in (200, 201) order by C1')
+        self.assertListEqual(cur.fetchall(), [('x',), ('ž201',)])
+        with self.assertRaises(fdb.ProgrammingError):
+            cur.executebatch('delete from T2 where C1 = ?', [(200,), (201, 1)])
 
 class TestStoredProc(FDBTestBase):
     def setUp(self):
@@ -2077,8 +2593,27 @@ class TestStreamBLOBs(FDBTestBase):
     def tearDown(self):
         self.con.execute_immediate("delete from t")
         self.con.execute_immediate("delete from t2")
+        self.con.execute_immediate("delete from t3")
         self.con.commit()
         self.con.close()
+    def testBlobMaterialized(self):
+        cur = self.con.cursor()
+        values = ['', 'x' * 100, 'y' * 65535, 'z' * 65536, 'w' * 200000]
+        for i, value in enumerate(values):
+            cur.execute('insert into T2 (C1,C9) values (?,?)', [i, value])
+        self.con.commit()
+        p = cur.prep('select C1,C9 from T2 order by C1')
+        p.set_stream_blob_treshold(-1)
+        cur.execute(p)
+        self.assertListEqual([row[1] for row in cur.fetchall()], values)
+        p.set_stream_blob_treshold(65535)
+        cur.execute(p)
+        rows = cur.fetchall()
+        self.assertListEqual([row[1] for row in rows[:3]], values[:3])
+        with closing(p):
+            for row, value in zip(rows[3:], values[3:]):
+                self.assertIsInstance(row[1], fdb.BlobReader)
+                self.assertEqual(row[1].read(), value)
     def testBlobBasic(self):
         blob = """Firebird supports two types of blobs, stream and segmented.
 The database stores segmented blobs in chunks.
@@ -2127,6 +2662,113 @@ Stream blobs are stored as a continuous array of data bytes with no length indic
             self.assertTrue(blob_reader.is_text)
             self.assertEqual(blob_reader.blob_charset, None)
             self.assertEqual(blob_reader.charset, 'UTF-8')
+    def testBlobReadinto(self):
+        blob = ''.join('%06d\n' % i for i in range(50000))
+        cur = self.con.cursor()
+        cur.execute('insert into T2 (C1,C9) values (?,?)', [5, StringIO(blob)])
+        self.con.commit()
+        p = cur.prep('select C1,C9 from T2 where C1 = 5')
+        p.set_stream_blob('C9')
+        cur.execute(p)
+        blob_reader = cur.fetchone()[1]
+        with closing(p):
+            self.assertIsInstance(blob_reader, io.RawIOBase)
+            self.assertTrue(blob_reader.readable())
+            self.assertTrue(blob_reader.seekable())
+            buf = bytearray(10)
+            self.assertEqual(blob_reader.readinto(buf), 10)
+            self.assertEqual(buf, b'000000\n000')
+            buf = bytearray(len(blob))
+            self.assertEqual(blob_reader.readinto(buf), len(blob) - 10)
+            self.assertEqual(buf[:len(blob) - 10], blob[10:].encode())
+            self.assertEqual(blob_reader.readinto(buf), 0)
+            # Seek within read-ahead window
+            self.assertEqual(blob_reader.seek(-7, os.SEEK_END), len(blob) - 7)
+            self.assertEqual(blob_reader.read(), '049999\n')
+            blob_reader.seek(0)
+            self.assertEqual(blob_reader.readall(), blob.encode())
+            blob_reader.seek(7 * 1000)
+            self.assertEqual(blob_reader.readline(), '001000\n')
+            self.assertEqual(blob_reader.readline(4), '0010')
+            self.assertEqual(blob_reader.readline(10), '01\n')
+            self.assertEqual(blob_reader.readline(0), '')
+            blob_reader.seek(0)
+            self.assertEqual(io.BufferedReader(blob_reader).read(), blob.encode())
+    def testBlobReadintoMemoryview(self):
+        blob = ''.join('%06d\n' % i for i in range(20000))
+        cur = self.con.cursor()
+        cur.execute('insert into T2 (C1,C9) values (?,?)', [6, StringIO(blob)])
+        self.con.commit()
+        p = cur.prep('select C1,C9 from T2 where C1 = 6')
+        p.set_stream_blob('C9')
+        cur.execute(p)
+        blob_reader = cur.fetchone()[1]
+        with closing(p):
+            self.assertEqual(blob_reader.read(), blob)
+            blob_reader.seek(0)
+            buf = bytearray(len(blob))
+            self.assertEqual(blob_reader.readinto(buf), len(blob))
+            self.assertEqual(buf, blob.encode())
+            blob_reader.seek(0)
+            buf = bytearray(len(blob) + 10)
+            view = memoryview(buf)
+            self.assertEqual(blob_reader.readinto(view[:7]), 7)
+            self.assertEqual(blob_reader.readinto(view[7:]), len(blob) - 7)
+            self.assertEqual(buf[:len(blob)], blob.encode())
+            self.assertEqual(blob_reader.readinto(view), 0)
+    def testBlobCache(self):
+        cur = self.con.cursor()
+        cur.execute('insert into T2 (C1,C9) values (?,?)', [1, 'x' * 1000])
+        self.con.commit()
+        cache = self.con.main_transaction.blob_cache
+        self.assertEqual(cache.size, 0)
+        sql = 'select T2.C9 from T2 cross join (select first 5 rdb$type from rdb$types) x'
+        cur.execute(sql)
+        self.assertListEqual(cur.fetchall(), [('x' * 1000,)] * 5)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 0)
+        cache.size = 10000
+        cur.execute(sql)
+        self.assertListEqual(cur.fetchall(), [('x' * 1000,)] * 5)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hits, 4)
+        self.assertEqual(cache.hit_bytes, 4000)
+        self.assertEqual(cache.bytes, 1000)
+        self.assertEqual(len(cache), 1)
+        self.con.commit()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.bytes, 0)
+        cache.size = 500
+        cur.execute(sql)
+        self.assertListEqual(cur.fetchall(), [('x' * 1000,)] * 5)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 4)
+        with self.assertRaises(fdb.ProgrammingError):
+            cache.size = -1
+    def testBlobWriter(self):
+        data = bytes(bytearray(i % 256 for i in range(200000)))
+        cur = self.con.cursor()
+        writer = cur.create_blob()
+        self.assertIsInstance(writer, fdb.BlobWriter)
+        self.assertTrue(writer.writable())
+        self.assertEqual(writer.write(data[:100000]), 100000)
+        self.assertEqual(writer.write(bytearray(data[100000:150000])), 50000)
+        self.assertEqual(writer.write_from(BytesIO(data[150000:])), 50000)
+        self.assertEqual(writer.tell(), len(data))
+        cur.execute('insert into T3 (C1,C5) values (?,?)', [1, writer])
+        self.assertTrue(writer.closed)
+        with self.assertRaises(fdb.ProgrammingError):
+            writer.write(b'x')
+        writer = cur.create_blob(stream=False)
+        writer.write(memoryview(data)[:1000])
+        writer.close()
+        cur.execute('insert into T3 (C1,C5) values (?,?)', [2, writer.blob_id])
+        cur.execute('insert into T3 (C1,C5) values (?,?)', [3, bytearray(data)])
+        self.con.commit()
+        p = cur.prep('select C1,C5 from T3 order by C1')
+        p.set_stream_blob_treshold(-1)
+        cur.execute(p)
+        self.assertListEqual(cur.fetchall(), [(1, data), (2, data[:1000]), (3, data)])
     def testBlobExtended(self):
         blob = """Firebird supports two types of blobs, stream and segmented.
 The database stores segmented blobs in chunks.
@@ -2234,6 +2876,23 @@ class TestCharsetConversion(FDBTestBase):
         row = c_utf8.fetchone()
         self.assertTupleEqual(row, (1, s5, s30, s5, s30))
 
+    def test_execute_block_charset_none(self):
+        s30 = 'ěščřžýáíéúůďťňóĚŠČŘŽÝÁÍÉÚŮĎŤŇÓ'
+        if ibase.PYTHON_MAJOR_VER != 3:
+            s30 = s30.decode('utf8')
+        with fdb.connect(host=FBTEST_HOST, database=self.dbfile, user=FBTEST_USER,
+                         password=FBTEST_PASSWORD) as con_none:
+            cur = con_none.cursor()
+            cur.executemany_batch_size = 8
+            # UTF8 values that fill the column are longer than 30 bytes
+            cur.executemany("insert into T4 (C1, V_UTF8) values (?,?)",
+                            [(i, s30.encode('utf8')) for i in range(1, 11)])
+            self.assertIsNotNone(con_none._execute_block_cache["insert into T4 (C1, V_UTF8) values (?,?)"])
+            con_none.commit()
+        cur = self.con.cursor()
+        cur.execute("select C1, V_UTF8 from T4 order by C1")
+        self.assertListEqual(cur.fetchall(), [(i, s30) for i in range(1, 11)])
+
     def testCharVarchar(self):
         s = 'Introdução'
         if ibase.PYTHON_MAJOR_VER != 3:
@@ -6347,6 +7006,104 @@ class TestHooks(FDBTestBase):
         svc.close()
         fdb.remove_hook(fdb.HOOK_SERVICE_ATTACHED,
                         self.__hook_service_attached)
+    def test_hook_statement_lifecycle(self):
+        events = []
+        hook_types = {fdb.HOOK_STATEMENT_PREPARED: 'prepared',
+                      fdb.HOOK_STATEMENT_EXECUTED: 'executed',
+                      fdb.HOOK_STATEMENT_FETCHED: 'fetched',
+                      fdb.HOOK_TRANSACTION_COMMITTED: 'committed',
+                      fdb.HOOK_TRANSACTION_ROLLED_BACK: 'rolled back',
+                      fdb.HOOK_BLOB_READ: 'blob read',
+                      fdb.HOOK_BLOB_WRITTEN: 'blob written'}
+        immediate = []
+        def make_hook(name):
+            def hook(obj, elapsed, *args):
+                self.assertGreaterEqual(elapsed, 0)
+                events.append((name,) + args)
+                if isinstance(obj, (ibase.StringType, ibase.UnicodeType)):
+                    immediate.append(obj)
+            return hook
+        installed = [(hook_type, make_hook(name)) for hook_type, name in hook_types.items()]
+        for hook_type, hook in installed:
+            fdb.add_hook(hook_type, hook)
+        try:
+            with fdb.connect(dsn=self.dbfile, user=FBTEST_USER, password=FBTEST_PASSWORD) as con:
+                cur = con.cursor()
+                cur.execute('select first 3 rdb$relation_id from rdb$relations')
+                cur.fetchall()
+                con.commit(retaining=True)
+                cur.execute('insert into T2 (C1,C9) values (?,?)', [300, 'blob'])
+                cur.execute('select C9 from T2 where C1 = 300')
+                cur.fetchone()
+                cur.close()
+                con.execute_immediate('delete from T2 where C1 = 300')
+                con.execute_immediate('delete from T2 where C1 = ?', [300])
+                con.rollback()
+        finally:
+            for hook_type, hook in installed:
+                fdb.remove_hook(hook_type, hook)
+        self.assertListEqual(events, [('prepared',), ('executed', None), ('fetched', 3),
+                                      ('committed', True),
+                                      ('prepared',), ('blob written', 4),
+                                      ('executed', [300, 'blob']),
+                                      ('prepared',), ('executed', None), ('blob read', 4),
+                                      ('fetched', 1), ('executed', None), ('executed', [300]),
+                                      ('rolled back', False)])
+        # Statements executed without prepare are reported by SQL command
+        self.assertListEqual(immediate, ['delete from T2 where C1 = 300',
+                                         'delete from T2 where C1 = ?'])
+    def test_slow_query_log(self):
+        records = []
+        with fdb.slowlog.SlowQueryLog(threshold=0.0, callback=records.append,
+                                      max_parameter_length=2) as slowlog:
+            with fdb.connect(dsn=self.dbfile, user=FBTEST_USER, password=FBTEST_PASSWORD) as con:
+                cur = con.cursor()
+                cur.execute('select * from country where country = ?', ('USA',))
+                cur.fetchall()
+                cur.execute("update country set currency = currency where country = 'USA'")
+                attachment_id = con.attachment_id
+                transaction_id = con.main_transaction.transaction_id
+                con.rollback()
+        self.assertFalse(slowlog.active)
+        self.assertListEqual(fdb.get_hooks(fdb.HOOK_STATEMENT_FETCHED), [])
+        self.assertEqual(slowlog.recorded, 2)
+        select, update = records
+        self.assertEqual(select['sql'], 'select * from country where country = ?')
+        self.assertListEqual(select['parameters'], ['US...'])
+        self.assertEqual(select['plan'], 'PLAN (COUNTRY INDEX (RDB$PRIMARY1))')
+        self.assertEqual(select['rows'], 1)
+        self.assertAlmostEqual(select['elapsed'], select['prepare_time'] +
+                               select['execute_time'] + select['fetch_time'])
+        self.assertGreater(select['prepare_time'], 0)
+        self.assertIsNone(update['parameters'])
+        self.assertEqual(update['rows'], 1)
+        self.assertEqual(update['fetch_time'], 0.0)
+        self.assertEqual(update['attachment_id'], attachment_id)
+        self.assertEqual(update['transaction_id'], transaction_id)
+    def test_metrics(self):
+        with fdb.metrics.MetricsRegistry(buckets=(0.5,)) as registry:
+            with fdb.connect(dsn=self.dbfile, user=FBTEST_USER, password=FBTEST_PASSWORD) as con:
+                cur = con.cursor()
+                for i in range(2):
+                    cur.execute('select * from country')
+                    cur.fetchall()
+                lines = registry.render().splitlines()
+                con.commit()
+        self.assertFalse(registry.active)
+        self.assertIn('# TYPE fdb_statement_execute_seconds histogram', lines)
+        self.assertIn('fdb_statements_executed_total{type="select"} 2', lines)
+        self.assertIn('fdb_statements_prepared_total 1', lines)
+        self.assertIn('fdb_statement_cache_hits_total 1', lines)
+        self.assertIn('fdb_rows_fetched_total 28', lines)
+        self.assertIn('fdb_statement_fetch_seconds_count 2', lines)
+        self.assertIn('fdb_connections 1', lines)
+        self.assertIn('fdb_transactions_active 1', lines)
+        self.assertTrue([line for line in lines
+                         if line.startswith('fdb_server_next_transaction{database=')])
+        lines = registry.render().splitlines()
+        self.assertIn('fdb_connections 0', lines)
+        self.assertIn('fdb_statement_cache_hits_total 1', lines)
+        self.assertIn('fdb_transactions_committed_total 1', lines)
 
 
 class TestBugs(FDBTestBase):